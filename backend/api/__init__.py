@@ -1,11 +1,15 @@
 from fastapi import APIRouter
+from .export import export_router
 from .invoice import invoice_router
 from .order import order_router
 from .notification import notification_router
 from .status import status_router
+from .stock import stock_router
 
 router = APIRouter(prefix="/api")
+router.include_router(export_router)
 router.include_router(invoice_router)
 router.include_router(notification_router)
 router.include_router(order_router)
 router.include_router(status_router)
+router.include_router(stock_router)
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Query
+from starlette import status
+from starlette.responses import StreamingResponse
+
+from backend.export import MEDIA_TYPES, decode_cursor, iter_export
+from backend.models.export.enums import ExportFormat, ExportKind
+from backend.utils import throw_bad_request
+
+router = APIRouter(prefix="/export", tags=["Export"])
+
+
+def _export(kind: ExportKind, fmt: ExportFormat, cursor: str | None):
+    start = (0, 0)
+    if cursor:
+        try:
+            start = decode_cursor(cursor)
+        except ValueError:
+            throw_bad_request("Invalid export cursor")
+
+    # Генератор синхронный (общий с daily_stock_report): Starlette читает
+    # его в пуле потоков, event loop не блокируется
+    return StreamingResponse(
+        iter_export(kind, fmt, start),
+        media_type=MEDIA_TYPES[fmt],
+        headers={
+            "Cache-Control": "no-cache",
+            "Content-Disposition": f'attachment; filename="{kind.value}.{fmt.value}"',
+        },
+    )
+
+
+@router.get("/stock", status_code=status.HTTP_200_OK)
+async def export_stock(
+    format: ExportFormat = Query(ExportFormat.NDJSON),
+    cursor: str | None = Query(None, description="Resume token from a previous export"),
+) -> StreamingResponse:
+    """Остатки всех товаров: product, quantity"""
+    return _export(ExportKind.STOCK, format, cursor)
+
+
+@router.get("/orders", status_code=status.HTTP_200_OK)
+async def export_orders(
+    format: ExportFormat = Query(ExportFormat.NDJSON),
+    cursor: str | None = Query(None, description="Resume token from a previous export"),
+) -> StreamingResponse:
+    """Обработанные заказы: order_id, status, items"""
+    return _export(ExportKind.ORDERS, format, cursor)
@@ -1,24 +1,185 @@
-from io import BytesIO
+import asyncio
+import zlib
+from typing import AsyncIterator
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Header
 from starlette import status
-from starlette.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response, StreamingResponse
 
+from backend.config import CONFIG
+from backend.models.invoice.domains import InvoiceMeta
+from backend.models.invoice.enums import InvoiceEncoding
+from backend.models.order.enums import OrderStatus
 from backend.registry import async_backend_redis
+from backend.storage.db.keys import invoice_lock_key, order_key
+from backend.storage.db.redis_client import order_items
 from backend.utils import throw_not_found
+from celery_service.client import generate_invoice
 
 router = APIRouter(prefix="/invoice", tags=["Invoice"])
 
+# Генерации, которые ждёт этот процесс API: order_id -> задача ожидания
+_inflight: dict[int, asyncio.Task] = {}
 
-@router.get("/{order_id}", status_code=status.HTTP_200_OK, response_model=bytes)
-async def get_invoice_by_order_id(order_id: int):
-    file = await async_backend_redis.get(f"invoice:{order_id}")
 
-    if not len(file):
+async def _generate_once(order_id: int) -> InvoiceMeta | None:
+    order = await async_backend_redis.hgetall(order_key(order_id))
+    if order.get("status") != OrderStatus.PROCESSED:
         throw_not_found("File not found!")
 
+    # Между процессами API генерацию запускает только владелец блокировки
+    if await async_backend_redis.set(
+        invoice_lock_key(order_id), "1", ex=CONFIG.invoice_lock_ttl, nx=True
+    ):
+        await run_in_threadpool(
+            generate_invoice.delay, order_id=order_id, items=order_items(order)
+        )
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + CONFIG.invoice_lock_ttl
+    while loop.time() < deadline:
+        meta = await async_backend_redis.get_invoice_meta(order_id)
+        if meta is not None:
+            return meta
+        await asyncio.sleep(CONFIG.invoice_poll_interval)
+    return None
+
+
+async def _generate_on_demand(order_id: int) -> InvoiceMeta | None:
+    """
+    Ленивая генерация: все запросы одного процесса к одному заказу ждут
+    общую задачу, поэтому N клиентов дают один рендер и один опрос Redis.
+    """
+    task = _inflight.get(order_id)
+    if task is None:
+        task = asyncio.ensure_future(_generate_once(order_id))
+        _inflight[order_id] = task
+        task.add_done_callback(lambda _: _inflight.pop(order_id, None))
+    try:
+        return await asyncio.wait_for(asyncio.shield(task), CONFIG.invoice_wait_timeout)
+    except asyncio.TimeoutError:
+        return None
+
+
+def _etag_matches(etag: str, if_none_match: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return f'"{etag}"' in candidates
+
+
+def _parse_range(range_header: str, length: int) -> tuple[int, int] | None:
+    """
+    Один диапазон "bytes=start-end" -> (start, end) включительно.
+    None - заголовок не поддерживается и отдаётся весь файл,
+    ValueError - диапазон не пересекается с файлом.
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    if not (first or last) or not (first + last).isdigit():
+        return None
+    if not first:
+        suffix = int(last)
+        if suffix == 0:
+            raise ValueError("Empty suffix range")
+        return max(length - suffix, 0), length - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= length:
+        raise ValueError("Range not satisfiable")
+    return start, min(int(last), length - 1) if last else length - 1
+
+
+async def _decompress(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+    tail = decompressor.flush()
+    if tail:
+        yield tail
+
+
+@router.get("/{order_id}", status_code=status.HTTP_200_OK, response_model=bytes)
+async def get_invoice_by_order_id(
+    order_id: int,
+    range_header: str | None = Header(None, alias="Range"),
+    if_none_match: str | None = Header(None),
+    accept_encoding: str | None = Header(None),
+):
+    meta: InvoiceMeta | None = await async_backend_redis.get_invoice_meta(order_id)
+
+    if meta is None:
+        if not CONFIG.invoice_lazy_generation:
+            throw_not_found("File not found!")
+        meta = await _generate_on_demand(order_id)
+        if meta is None:
+            return JSONResponse(
+                {"message": "Invoice is being generated"},
+                status_code=status.HTTP_202_ACCEPTED,
+                headers={"Retry-After": "1"},
+            )
+
+    headers = {
+        "Content-Disposition": f"attachment; filename=invoice_{order_id}.pdf",
+    }
+    gzipped = meta.encoding == InvoiceEncoding.GZIP
+    send_gzip = gzipped and "gzip" in (accept_encoding or "")
+    if gzipped:
+        headers["Vary"] = "Accept-Encoding"
+    if meta.etag:
+        # Сжатое и распакованное представления - разные байты, и сильный
+        # ETag (по нему работает Range) у каждого свой
+        etag = f"{meta.etag}-gzip" if send_gzip else meta.etag
+        headers["ETag"] = f'"{etag}"'
+        if if_none_match and _etag_matches(etag, if_none_match):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    chunk_size = CONFIG.invoice_chunk_size
+
+    if gzipped:
+        if not send_gzip:
+            # Клиент не принимает gzip: распаковываем на лету, без Range
+            if meta.size is not None:
+                headers["Content-Length"] = str(meta.size)
+            return StreamingResponse(
+                _decompress(
+                    async_backend_redis.iter_invoice(
+                        order_id, 0, meta.length - 1, chunk_size
+                    )
+                ),
+                media_type="application/pdf",
+                headers=headers,
+            )
+        headers["Content-Encoding"] = "gzip"
+
+    headers["Accept-Ranges"] = "bytes"
+    start, end = 0, meta.length - 1
+    status_code = status.HTTP_200_OK
+
+    if range_header:
+        try:
+            byte_range = _parse_range(range_header, meta.length)
+        except ValueError:
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={"Content-Range": f"bytes */{meta.length}"},
+            )
+        if byte_range is not None:
+            start, end = byte_range
+            status_code = status.HTTP_206_PARTIAL_CONTENT
+            headers["Content-Range"] = f"bytes {start}-{end}/{meta.length}"
+
+    headers["Content-Length"] = str(end - start + 1)
+
     return StreamingResponse(
-        BytesIO(file),
+        async_backend_redis.iter_invoice(order_id, start, end, chunk_size),
+        status_code=status_code,
         media_type="application/pdf",
-        headers={"Content-Disposition": f"attachment; filename=invoice_{order_id}.pdf"},
+        headers=headers,
     )
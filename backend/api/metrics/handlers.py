@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+
+from backend.metrics import observe_pools, render_metrics
+from backend.storage.db.redis_client import iter_pools
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    observe_pools(iter_pools())
+    # Сбор включает чтение длины очередей из брокера - вне event loop
+    body, content_type = await run_in_threadpool(render_metrics)
+    return Response(body, media_type=content_type)
@@ -2,8 +2,11 @@ from fastapi import APIRouter
 from starlette import status
 
 from backend.models.notification.requests import RequestNotification
-from backend.tasks.worker_tasks import send_notification
+from backend.models.notification.responses import ResponseNotificationStats
+from backend.registry import async_backend_redis
+from backend.storage.db.keys import NOTIFICATION_STATS_KEY
 from backend.utils import get_ok_message
+from celery_service.client import send_notification
 
 router = APIRouter(prefix="/notification", tags=["Notification"])
 
@@ -12,3 +15,20 @@ router = APIRouter(prefix="/notification", tags=["Notification"])
 async def test_notification(data: RequestNotification) -> str:
     send_notification.delay(email=data.email, message=data.message)
     return get_ok_message()
+
+
+@router.get(
+    "/stats", status_code=status.HTTP_200_OK, response_model=ResponseNotificationStats
+)
+async def notification_stats() -> ResponseNotificationStats:
+    stats = await async_backend_redis.hgetall(NOTIFICATION_STATS_KEY)
+    counters = {
+        field: int(stats.get(field, 0))
+        for field in ("buffered", "digests", "digested", "immediate")
+    }
+    # Сколько сообщений приходится на одну реальную отправку
+    messages = counters["digested"] + counters["immediate"]
+    sends = counters["digests"] + counters["immediate"]
+    return ResponseNotificationStats(
+        **counters, reduction_ratio=messages / sends if sends else 1.0
+    )
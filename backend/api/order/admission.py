@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import math
+import time
+
+from fastapi import HTTPException, Request
+from redis.asyncio import Redis
+from starlette import status
+
+from backend.config import CONFIG
+from backend.metrics import ORDER_REJECTIONS
+from backend.registry import async_backend_redis
+from backend.storage.db.keys import ORDERS_PROCESSED_KEY
+from celery_service.queues import DEFAULT_QUEUE, broker_keys
+
+logger = logging.getLogger(__name__)
+
+# Вес нового замера в сглаженной скорости обработки заказов
+_SMOOTHING = 0.3
+# Верхняя граница Retry-After; её же получает клиент, когда воркеры стоят
+_MAX_RETRY_AFTER = 60
+
+
+class Backpressure:
+    """
+    Оценка ожидания нового заказа в очереди default (или в потоках заказов
+    при ORDER_PIPELINE=stream): её длина, делённая на сглаженную скорость
+    обработки заказов воркерами (счётчик ORDERS_PROCESSED_KEY) за интервалы
+    с непустой очередью. Замер делает фоновая задача процесса API раз в
+    interval секунд, сама проверка к Redis не обращается.
+    Пока оценки нет или она устарела (брокер недоступен), заказы принимаются:
+    отказ по старым данным хуже длинной очереди.
+    """
+
+    def __init__(self, interval: float):
+        self._interval = interval
+        self._broker: Redis | None = None
+        self._sampler: asyncio.Task | None = None
+        self.depth = 0
+        # Заказов в секунду; None - ещё не было интервала с очередью
+        self.throughput: float | None = None
+        self._processed: int | None = None
+        self._sampled_at = 0.0
+
+    @property
+    def _fresh(self) -> bool:
+        return time.monotonic() - self._sampled_at <= 3 * self._interval
+
+    def retry_after(self) -> int | None:
+        """Секунды до повтора, если ожидание выше ORDER_WAIT_SLO, иначе None"""
+        if not CONFIG.order_wait_slo:
+            return None
+        self._ensure_sampler()
+        if (
+            not self._fresh
+            or self.throughput is None
+            or self.depth < CONFIG.order_backpressure_min_depth
+        ):
+            return None
+        if self.throughput <= 0:
+            return _MAX_RETRY_AFTER
+        wait = self.depth / self.throughput
+        if wait <= CONFIG.order_wait_slo:
+            return None
+        # Через сколько очередь сократится до SLO при текущей скорости
+        return min(_MAX_RETRY_AFTER, math.ceil(wait - CONFIG.order_wait_slo))
+
+    def _broker_client(self) -> Redis:
+        if self._broker is None:
+            self._broker = Redis.from_url(
+                CONFIG.celery_broker_dsn,
+                socket_timeout=CONFIG.redis_socket_timeout,
+                socket_connect_timeout=CONFIG.redis_socket_connect_timeout,
+            )
+        return self._broker
+
+    def _ensure_sampler(self) -> None:
+        if self._sampler is None or self._sampler.done():
+            self._sampler = asyncio.create_task(self._sample())
+
+    async def _depth(self) -> int:
+        if CONFIG.order_pipeline == "stream":
+            return await async_backend_redis.order_stream_length()
+        async with self._broker_client().pipeline(transaction=False) as pipe:
+            for key in broker_keys(DEFAULT_QUEUE):
+                pipe.llen(key)
+            return sum(await pipe.execute())
+
+    async def _sample(self) -> None:
+        while True:
+            try:
+                depth = await self._depth()
+                processed = int(
+                    await async_backend_redis.get(ORDERS_PROCESSED_KEY) or 0
+                )
+                self._observe(depth, processed, time.monotonic())
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                logger.warning(f"Failed to sample order queue: {error}")
+                self._processed = None
+            await asyncio.sleep(self._interval)
+
+    def _observe(self, depth: int, processed: int, now: float) -> None:
+        # Скорость воркеров видна, только пока им есть что обрабатывать: при
+        # пустой очереди замер показывает поток заказов, и в простое оценка
+        # упала бы до нуля. Поэтому берутся интервалы, начатые с очередью
+        if self._processed is not None and self.depth > 0 and now > self._sampled_at:
+            # Счётчик мог обнулиться вместе с Redis
+            rate = max(0, processed - self._processed) / (now - self._sampled_at)
+            if self.throughput is None:
+                self.throughput = rate
+            else:
+                self.throughput += _SMOOTHING * (rate - self.throughput)
+        self._processed = processed
+        self.depth = depth
+        self._sampled_at = now
+
+    async def close(self) -> None:
+        sampler, self._sampler = self._sampler, None
+        if sampler is not None:
+            sampler.cancel()
+            try:
+                await sampler
+            except asyncio.CancelledError:
+                pass
+        broker, self._broker = self._broker, None
+        if broker is not None:
+            await broker.aclose()
+
+
+def _client_id(request: Request) -> str:
+    if CONFIG.order_client_header:
+        value = request.headers.get(CONFIG.order_client_header)
+        if value:
+            return value
+    return request.client.host if request.client else "unknown"
+
+
+def _reject(status_code: int, detail: str, retry_after: int, reason: str):
+    ORDER_REJECTIONS.labels(reason).inc()
+    raise HTTPException(
+        status_code, detail, headers={"Retry-After": str(max(1, retry_after))}
+    )
+
+
+class OrderAdmission:
+    """
+    Допуск заказа до постановки в очередь. Отказ дешёвый: по длине очереди -
+    без обращений к Redis, по лимиту клиента - один вызов TAKE_TOKENS
+    """
+
+    def __init__(self):
+        self.backpressure = Backpressure(CONFIG.order_backpressure_interval)
+
+    async def admit(self, request: Request, cost: int = 1) -> None:
+        """cost - число заказов запроса; отказ - HTTPException 503/429"""
+        retry_after = self.backpressure.retry_after()
+        if retry_after is not None:
+            _reject(
+                status.HTTP_503_SERVICE_UNAVAILABLE,
+                "Order queue is overloaded, retry later",
+                retry_after,
+                "backpressure",
+            )
+
+        if CONFIG.order_rate_limit > 0:
+            # Пакет больше ёмкости бакета списывает его целиком
+            retry_ms = await async_backend_redis.take_tokens(
+                _client_id(request),
+                CONFIG.order_rate_limit,
+                CONFIG.order_rate_burst,
+                min(cost, CONFIG.order_rate_burst),
+            )
+            if retry_ms:
+                _reject(
+                    status.HTTP_429_TOO_MANY_REQUESTS,
+                    "Too many orders, retry later",
+                    math.ceil(retry_ms / 1000),
+                    "rate_limit",
+                )
+
+    async def close(self) -> None:
+        await self.backpressure.close()
+
+
+order_admission = OrderAdmission()
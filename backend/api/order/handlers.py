@@ -1,19 +1,223 @@
-from fastapi import APIRouter
+import json
+import uuid
+
+from celery import group
+from fastapi import APIRouter, Header, Request, Response
+from pydantic import ValidationError
 from starlette import status
+from starlette.concurrency import run_in_threadpool
 
-from backend.models.order.requests import RequestOrder
-from backend.models.order.responses import ResponseOrder
-from backend.tasks.worker_tasks import process_order
+from backend.api.order.admission import order_admission
+from backend.config import CONFIG
+from backend.models.order.requests import (
+    RequestCartOrder,
+    RequestOrder,
+    RequestOrderBatch,
+)
+from backend.models.order.responses import (
+    ResponseOrder,
+    ResponseOrderBatch,
+    ResponseOrderBatchError,
+    ResponseOrderBatchErrorDetail,
+    ResponseOrderBatchItem,
+)
+from backend.registry import async_backend_redis
+from backend.utils import throw_bad_request, throw_unprocessable_entity
+from celery_service.client import process_order
 
 router = APIRouter(prefix="/order", tags=["Order"])
 
 
-@router.post("/", status_code=status.HTTP_201_CREATED, response_model=ResponseOrder)
-async def order(data: RequestOrder) -> ResponseOrder:
-    task = process_order.delay(
-        order_id=data.order_id,
-        product=data.product,
-        quantity=data.quantity,
-        email=data.email,
+async def _track_pending(
+    orders: list[RequestOrder | RequestCartOrder], task_ids: dict[int, str]
+) -> None:
+    # Индекс пишется до постановки в очередь: если задача потеряется,
+    # check_pending_orders поставит её повторно с тем же payload и task_id,
+    # который уже получил клиент
+    await async_backend_redis.add_pending_orders(
+        {
+            order.order_id: json.dumps(
+                {"task_id": task_ids[order.order_id], "kwargs": order.model_dump()}
+            )
+            for order in orders
+        }
+    )
+
+
+async def _enqueue(
+    orders: list[RequestOrder | RequestCartOrder], task_ids: dict[int, str]
+) -> None:
+    """Постановка принятых заказов в конвейер ORDER_PIPELINE"""
+    if CONFIG.order_pipeline == "stream":
+        # Запись потока, не подтверждённая читателем, остаётся в нём и
+        # забирается повторно (XAUTOCLAIM): индекс ожидающих не нужен
+        await async_backend_redis.add_order_entries(
+            {
+                order.order_id: {
+                    "task_id": task_ids[order.order_id],
+                    "order": order.model_dump_json(),
+                }
+                for order in orders
+            }
+        )
+        return
+
+    await _track_pending(orders, task_ids)
+    try:
+        if len(orders) == 1:
+            process_order.apply_async(
+                kwargs=orders[0].model_dump(), task_id=task_ids[orders[0].order_id]
+            )
+            return
+        # Вся группа уходит в брокер через одно соединение/producer
+        await run_in_threadpool(
+            group(
+                process_order.clone(kwargs=order.model_dump()).set(
+                    task_id=task_ids[order.order_id]
+                )
+                for order in orders
+            ).apply_async
+        )
+    except Exception:
+        # Заказы не приняты и их захват снимается: без удаления записей
+        # индекса check_pending_orders поставил бы их сам, а повтор клиента
+        # под новым task_id завершился бы DUPLICATE
+        await async_backend_redis.remove_pending_orders(
+            [order.order_id for order in orders]
+        )
+        raise
+
+
+async def _admit(
+    data: RequestOrder | RequestCartOrder,
+    response: Response,
+    idempotency_key: str | None,
+) -> ResponseOrder:
+    # Повтор заказа стоит одного вызова Redis: task_id выдаётся заранее и
+    # закрепляется за order_id (и Idempotency-Key) до постановки в очередь
+    task_id = str(uuid.uuid4())
+    claimed = await async_backend_redis.claim_order(
+        data.order_id, task_id, idempotency_key
     )
-    return ResponseOrder(task_id=task.id)
+    if claimed is not None:
+        claimed_order_id, claimed_task_id = claimed
+        if claimed_order_id != data.order_id:
+            throw_unprocessable_entity(
+                "Idempotency-Key has already been used for another order"
+            )
+        response.status_code = status.HTTP_200_OK
+        response.headers["Idempotent-Replayed"] = "true"
+        return ResponseOrder(task_id=claimed_task_id)
+
+    try:
+        await _enqueue([data], {data.order_id: task_id})
+    except Exception:
+        # Заказ не принят: повтор клиента должен поставить его заново
+        await async_backend_redis.release_order_claim(data.order_id, idempotency_key)
+        raise
+    return ResponseOrder(task_id=task_id)
+
+
+@router.post("/", status_code=status.HTTP_201_CREATED, response_model=ResponseOrder)
+async def order(
+    data: RequestOrder,
+    request: Request,
+    response: Response,
+    idempotency_key: str | None = Header(None, max_length=255),
+) -> ResponseOrder:
+    await order_admission.admit(request)
+    return await _admit(data, response, idempotency_key)
+
+
+@router.post("/cart", status_code=status.HTTP_201_CREATED, response_model=ResponseOrder)
+async def order_cart(
+    data: RequestCartOrder,
+    request: Request,
+    response: Response,
+    idempotency_key: str | None = Header(None, max_length=255),
+) -> ResponseOrder:
+    """Корзина: все строки резервируются одной задачей, атомарно"""
+    if len(data.items) > CONFIG.order_cart_max_items:
+        throw_bad_request(
+            f"Cart is too large, max size is {CONFIG.order_cart_max_items}"
+        )
+    await order_admission.admit(request)
+    return await _admit(data, response, idempotency_key)
+
+
+@router.post(
+    "/batch", status_code=status.HTTP_201_CREATED, response_model=ResponseOrderBatch
+)
+async def order_batch(data: RequestOrderBatch, request: Request) -> ResponseOrderBatch:
+    if len(data.orders) > CONFIG.order_batch_max_size:
+        throw_bad_request(
+            f"Batch is too large, max size is {CONFIG.order_batch_max_size}"
+        )
+    await order_admission.admit(request, cost=len(data.orders))
+
+    valid: list[tuple[int, RequestOrder]] = []
+    rejected: list[ResponseOrderBatchError] = []
+    seen: set[int] = set()
+
+    for index, raw in enumerate(data.orders):
+        try:
+            item = RequestOrder.model_validate(raw)
+        except ValidationError as error:
+            rejected.append(
+                ResponseOrderBatchError(
+                    index=index,
+                    errors=[
+                        ResponseOrderBatchErrorDetail(
+                            loc=list(detail["loc"]),
+                            msg=detail["msg"],
+                            type=detail["type"],
+                        )
+                        for detail in error.errors()
+                    ],
+                )
+            )
+            continue
+
+        if item.order_id in seen:
+            rejected.append(
+                ResponseOrderBatchError(
+                    index=index,
+                    errors=[
+                        ResponseOrderBatchErrorDetail(
+                            loc=["order_id"],
+                            msg="Duplicate order_id in batch",
+                            type="duplicate",
+                        )
+                    ],
+                )
+            )
+            continue
+
+        seen.add(item.order_id)
+        valid.append((index, item))
+
+    accepted: list[ResponseOrderBatchItem] = []
+    if valid:
+        task_ids = {item.order_id: str(uuid.uuid4()) for _, item in valid}
+        replayed = await async_backend_redis.claim_orders(task_ids)
+        task_ids.update(replayed)
+        new = [item for _, item in valid if item.order_id not in replayed]
+
+        if new:
+            try:
+                await _enqueue(new, task_ids)
+            except Exception:
+                for item in new:
+                    await async_backend_redis.release_order_claim(item.order_id)
+                raise
+        accepted = [
+            ResponseOrderBatchItem(
+                index=index,
+                order_id=item.order_id,
+                task_id=task_ids[item.order_id],
+                replayed=item.order_id in replayed,
+            )
+            for index, item in valid
+        ]
+
+    return ResponseOrderBatch(accepted=accepted, rejected=rejected)
@@ -1,22 +1,173 @@
+import asyncio
 import json
+import re
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
 from starlette import status
+from starlette.responses import StreamingResponse
 
+from backend.api.status.hub import RESYNC, status_hub
+from backend.config import CONFIG
+from backend.models.status.enums import TERMINAL_STATES
+from backend.models.status.requests import RequestStatusBatch
 from backend.registry import async_backend_redis
-from backend.utils import throw_not_found
-from backend.models.status.responses import ResponseStatus
+from backend.storage.cache import LRUCache
+from backend.utils import throw_bad_request, throw_not_found
+from backend.models.status.responses import (
+    ResponseStatus,
+    ResponseStatusBatch,
+    ResponseStatusCache,
+)
 
 router = APIRouter(prefix="/status", tags=["Status"])
 
+# Celery пишет "status" первым ключом метаданных результата, поэтому статус
+# читается без разбора всего (возможно большого) result
+_STATUS_RE = re.compile(r'^\{\s*"status"\s*:\s*"([A-Z_]+)"')
+
+# Задачи в терминальном состоянии больше не меняются и не читаются из Redis
+_terminal_cache = LRUCache(
+    maxsize=CONFIG.status_cache_size, ttl=CONFIG.status_cache_ttl
+)
+
+
+def _meta_key(task_id: str) -> str:
+    return f"celery-task-meta-{task_id}"
+
+
+def _extract_status(task_meta: str) -> str:
+    match = _STATUS_RE.match(task_meta)
+    if match:
+        return match.group(1)
+    return json.loads(task_meta)["status"]
+
+
+def _remember(task_id: str, task_status: str) -> None:
+    if task_status in TERMINAL_STATES:
+        _terminal_cache.set(task_id, task_status)
+
+
+async def _lookup_statuses(task_ids: list[str]) -> dict[str, str]:
+    """Статусы найденных задач: сначала кэш, остальное одним MGET"""
+    statuses: dict[str, str] = {}
+    missing: list[str] = []
+    for task_id in task_ids:
+        cached = _terminal_cache.get(task_id)
+        if cached is None:
+            missing.append(task_id)
+        else:
+            statuses[task_id] = cached
+
+    if missing:
+        values = await async_backend_redis.mget(*map(_meta_key, missing))
+        for task_id, task_meta in zip(missing, values):
+            if task_meta is not None:
+                statuses[task_id] = _extract_status(task_meta)
+                _remember(task_id, statuses[task_id])
+    return statuses
+
+
+def _sse(task_id: str, task_status: str) -> str:
+    data = json.dumps({"task_id": task_id, "status": task_status})
+    return f"event: status\ndata: {data}\n\n"
+
+
+@router.get(
+    "/cache", status_code=status.HTTP_200_OK, response_model=ResponseStatusCache
+)
+async def get_status_cache_stats() -> ResponseStatusCache:
+    return ResponseStatusCache(
+        hits=_terminal_cache.hits,
+        misses=_terminal_cache.misses,
+        size=len(_terminal_cache),
+    )
+
+
+@router.post(
+    "/batch", status_code=status.HTTP_200_OK, response_model=ResponseStatusBatch
+)
+async def get_status_batch(data: RequestStatusBatch) -> ResponseStatusBatch:
+    if len(data.task_ids) > CONFIG.status_batch_max_size:
+        throw_bad_request(
+            f"Batch is too large, max size is {CONFIG.status_batch_max_size}"
+        )
+
+    task_ids = list(dict.fromkeys(data.task_ids))
+    statuses = await _lookup_statuses(task_ids)
+    not_found = [task_id for task_id in task_ids if task_id not in statuses]
+
+    return ResponseStatusBatch(statuses=statuses, not_found=not_found)
+
+
+@router.get("/stream", status_code=status.HTTP_200_OK)
+async def stream_statuses(
+    task_ids: str = Query(..., description="Comma-separated task IDs")
+) -> StreamingResponse:
+    """
+    Server-Sent Events: текущий статус каждой задачи и далее каждый переход
+    по одному разу. Поток закрывается, когда все задачи завершены.
+    """
+    ids = list(dict.fromkeys(filter(None, map(str.strip, task_ids.split(",")))))
+    if not ids:
+        throw_bad_request("No task ids")
+    if len(ids) > CONFIG.status_batch_max_size:
+        throw_bad_request(f"Too many task ids, max is {CONFIG.status_batch_max_size}")
+
+    queue = await status_hub.subscribe(ids)
+
+    async def events():
+        try:
+            sent: dict[str, str] = {}
+            for task_id, task_status in (await _lookup_statuses(ids)).items():
+                sent[task_id] = task_status
+                yield _sse(task_id, task_status)
+
+            pending = {
+                task_id for task_id in ids if sent.get(task_id) not in TERMINAL_STATES
+            }
+            while pending:
+                try:
+                    event = await asyncio.wait_for(
+                        queue.get(), CONFIG.status_stream_keepalive
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                # После обрыва подписки переходы могли потеряться
+                if event is RESYNC:
+                    updates = (await _lookup_statuses(list(pending))).items()
+                else:
+                    updates = [event]
+                for task_id, task_status in updates:
+                    if sent.get(task_id) == task_status:
+                        continue
+                    sent[task_id] = task_status
+                    _remember(task_id, task_status)
+                    if task_status in TERMINAL_STATES:
+                        pending.discard(task_id)
+                    yield _sse(task_id, task_status)
+        finally:
+            status_hub.unsubscribe(ids, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 
 @router.get("/{task_id}", status_code=status.HTTP_200_OK, response_model=ResponseStatus)
 async def get_status_by_task_id(task_id: str):
-    task_status = await async_backend_redis.get(f"celery-task-meta-{task_id}")
+    cached = _terminal_cache.get(task_id)
+    if cached is not None:
+        return ResponseStatus(status=cached)
+
+    task_status = await async_backend_redis.get(_meta_key(task_id))
 
     if task_status is None:
         throw_not_found("Task not found!")
 
-    data_dict = json.loads(task_status)
+    data_status = _extract_status(task_status)
+    _remember(task_id, data_status)
 
-    return ResponseStatus(status=data_dict["status"])
+    return ResponseStatus(status=data_status)
@@ -0,0 +1,106 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+
+from backend.registry import async_backend_redis
+from backend.storage.db.keys import TASK_STATUS_CHANNEL
+
+logger = logging.getLogger(__name__)
+
+# Элемент очереди подписчика вместо события: перечитать состояния задач
+RESYNC = object()
+
+
+class TaskStatusHub:
+    """
+    Одна pub/sub подписка на процесс API: события смены состояний задач
+    раздаются по очередям подписчиков, заинтересованных в task_id.
+    Если подписка обрывалась, после переподключения каждая очередь получает
+    RESYNC: события из разрыва потеряны, состояния нужно перечитать.
+    """
+
+    def __init__(self, reconnect_delay: float = 1.0):
+        self._listeners: dict[str, set[asyncio.Queue]] = defaultdict(set)
+        self._reader: asyncio.Task | None = None
+        # Завершается, когда Redis подтвердил первую подписку читателя
+        self._confirmed: asyncio.Future | None = None
+        self._reconnect_delay = reconnect_delay
+
+    async def subscribe(self, task_ids: list[str]) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        for task_id in task_ids:
+            self._listeners[task_id].add(queue)
+        if self._reader is None or self._reader.done():
+            self._confirmed = asyncio.get_running_loop().create_future()
+            self._reader = asyncio.create_task(self._read(self._confirmed))
+        try:
+            # Подписка должна быть активна до того, как клиент прочитает
+            # текущие статусы, иначе переход между ними потеряется. shield:
+            # отменённый запрос не отменяет ожидание остальных
+            await asyncio.shield(self._confirmed)
+        except BaseException:
+            self.unsubscribe(task_ids, queue)
+            raise
+        return queue
+
+    def unsubscribe(self, task_ids: list[str], queue: asyncio.Queue) -> None:
+        for task_id in task_ids:
+            listeners = self._listeners.get(task_id)
+            if listeners is None:
+                continue
+            listeners.discard(queue)
+            if not listeners:
+                del self._listeners[task_id]
+
+    def _dispatch(self, data: str) -> None:
+        event = json.loads(data)
+        for queue in self._listeners.get(event["task_id"], ()):
+            queue.put_nowait((event["task_id"], event["status"]))
+
+    def _resync(self) -> None:
+        queues = set().union(*self._listeners.values())
+        for queue in queues:
+            queue.put_nowait(RESYNC)
+
+    async def _read(self, confirmed: asyncio.Future) -> None:
+        while True:
+            pubsub = None
+            try:
+                pubsub = await async_backend_redis.pubsub()
+                await pubsub.subscribe(TASK_STATUS_CHANNEL)
+                # PONG приходит после подтверждения SUBSCRIBE
+                await pubsub.ping()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._dispatch(message["data"])
+                    elif message["type"] == "pong":
+                        if confirmed.done():
+                            self._resync()
+                        else:
+                            confirmed.set_result(None)
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                if not confirmed.done():
+                    # Подписка ещё ни разу не удалась: ошибку получают
+                    # ожидающие subscribe(), следующий вызов начнёт заново
+                    confirmed.set_exception(error)
+                    return
+                logger.warning(f"Task status subscription lost: {error}")
+            finally:
+                if pubsub is not None:
+                    await pubsub.aclose()
+            await asyncio.sleep(self._reconnect_delay)
+
+    async def close(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+            self._reader = None
+
+
+status_hub = TaskStatusHub()
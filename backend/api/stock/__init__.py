@@ -0,0 +1 @@
+from .handlers import router as stock_router
@@ -0,0 +1,151 @@
+import asyncio
+import logging
+
+from backend.config import CONFIG
+from backend.registry import async_backend_redis
+from backend.storage.cache import LRUCache
+from backend.storage.db.keys import STOCK_INVALIDATION_CHANNEL, stock_key
+from backend.storage.db.router import KeyClass, RedisNode, get_router
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+# Запись со всеми остатками сбрасывается при любой инвалидации
+_ALL = object()
+
+
+class StockCache:
+    """
+    Read-through кэш остатков процесса API. Когерентность держится подпиской
+    на канал инвалидаций, в который пишет резервирование остатка (на каждом
+    узле остатков - своя подписка):
+    - кэш используется, только пока подтверждены подписки на всех узлах;
+    - при потере любой подписки кэш очищается (сообщения могли потеряться);
+      подписка не переподключается молча (RedisClient.pubsub), обрыв
+      приходит сюда исключением из listen();
+    - запись живёт не дольше ttl секунд, даже если инвалидация не дошла;
+    - значение, прочитанное из Redis, не кладётся в кэш, если за время
+      чтения пришла хотя бы одна инвалидация.
+    """
+
+    def __init__(
+        self, maxsize: int, ttl: float | None = None, reconnect_delay: float = 1.0
+    ):
+        self._cache = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._generation = 0
+        # Узлы остатков с подтверждённой подпиской
+        self._confirmed: set[RedisNode] = set()
+        self._readers: dict[RedisNode, asyncio.Task] = {}
+        self._reconnect_delay = reconnect_delay
+
+    @property
+    def _listening(self) -> bool:
+        return len(self._confirmed) == len(get_router().nodes(KeyClass.STOCK))
+
+    @property
+    def hits(self) -> int:
+        return self._cache.hits
+
+    @property
+    def misses(self) -> int:
+        return self._cache.misses
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    async def get(self, product: str) -> int | None:
+        self._ensure_reader()
+        if self._listening:
+            cached = self._cache.get(product, _MISSING)
+            if cached is not _MISSING:
+                return cached
+
+        generation = self._generation
+        value = await async_backend_redis.get(stock_key(product))
+        quantity = None if value is None else int(value)
+        self._store(generation, product, quantity)
+        return quantity
+
+    async def get_all(self) -> dict[str, int]:
+        self._ensure_reader()
+        if self._listening:
+            cached = self._cache.get(_ALL, _MISSING)
+            if cached is not _MISSING:
+                return dict(cached)
+
+        generation = self._generation
+        prefix = len(stock_key(""))
+        stock: dict[str, int] = {}
+        async for batch in async_backend_redis.scan_mget(
+            stock_key("*"), count=CONFIG.redis_scan_count
+        ):
+            for key, value in batch:
+                if value is not None:
+                    stock[key[prefix:]] = int(value)
+
+        self._store(generation, _ALL, dict(stock))
+        for product, quantity in stock.items():
+            self._store(generation, product, quantity)
+        return stock
+
+    def _store(self, generation: int, key, value) -> None:
+        if self._listening and generation == self._generation:
+            self._cache.set(key, value)
+
+    def _invalidate(self, product: str) -> None:
+        self._generation += 1
+        self._cache.delete(product)
+        self._cache.delete(_ALL)
+
+    def _reset(self, node: RedisNode) -> None:
+        self._confirmed.discard(node)
+        self._generation += 1
+        self._cache.clear()
+
+    def _ensure_reader(self) -> None:
+        for node in get_router().nodes(KeyClass.STOCK):
+            reader = self._readers.get(node)
+            if reader is None or reader.done():
+                self._readers[node] = asyncio.create_task(self._read(node))
+
+    async def _read(self, node: RedisNode) -> None:
+        while True:
+            pubsub = None
+            try:
+                pubsub = await async_backend_redis.pubsub(node)
+                await pubsub.subscribe(STOCK_INVALIDATION_CHANNEL)
+                # PONG приходит после подтверждения SUBSCRIBE: с этого момента
+                # ни одна инвалидация не теряется
+                await pubsub.ping()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._invalidate(message["data"])
+                    elif message["type"] == "pong" and node not in self._confirmed:
+                        # Чтения, начатые до подписки, в кэш не попадут
+                        self._generation += 1
+                        self._cache.clear()
+                        self._confirmed.add(node)
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                logger.warning(
+                    f"Stock invalidation subscription lost on {node}: {error}"
+                )
+            finally:
+                self._reset(node)
+                if pubsub is not None:
+                    await pubsub.aclose()
+            await asyncio.sleep(self._reconnect_delay)
+
+    async def close(self) -> None:
+        readers, self._readers = self._readers, {}
+        for reader in readers.values():
+            reader.cancel()
+        for reader in readers.values():
+            try:
+                await reader
+            except asyncio.CancelledError:
+                pass
+
+
+stock_cache = StockCache(maxsize=CONFIG.stock_cache_size, ttl=CONFIG.stock_cache_ttl)
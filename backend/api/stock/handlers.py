@@ -0,0 +1,32 @@
+from fastapi import APIRouter
+from starlette import status
+
+from backend.api.stock.cache import stock_cache
+from backend.models.stock.responses import (
+    ResponseStock,
+    ResponseStockCache,
+    ResponseStockList,
+)
+from backend.utils import throw_not_found
+
+router = APIRouter(prefix="/stock", tags=["Stock"])
+
+
+@router.get("/", status_code=status.HTTP_200_OK, response_model=ResponseStockList)
+async def get_stock() -> ResponseStockList:
+    return ResponseStockList(stock=await stock_cache.get_all())
+
+
+@router.get("/cache", status_code=status.HTTP_200_OK, response_model=ResponseStockCache)
+async def get_stock_cache_stats() -> ResponseStockCache:
+    return ResponseStockCache(
+        hits=stock_cache.hits, misses=stock_cache.misses, size=len(stock_cache)
+    )
+
+
+@router.get("/{product}", status_code=status.HTTP_200_OK, response_model=ResponseStock)
+async def get_product_stock(product: str) -> ResponseStock:
+    quantity = await stock_cache.get(product)
+    if quantity is None:
+        throw_not_found("Product not found!")
+    return ResponseStock(product=product, quantity=quantity)
@@ -15,6 +15,105 @@ class Settings(BaseSettings):
     redis_max_connections: int
     redis_socket_timeout: int
     redis_decode_responses: bool
+    redis_socket_connect_timeout: float = 2.0
+    redis_health_check_interval: int = 30
+    redis_retries: int = 1
+    redis_breaker_threshold: int = 5
+    redis_breaker_reset_timeout: float = 1.0
+    redis_connections_per_task: int = 2
+    redis_coalesce_reads: bool = True
+    redis_coalesce_max_batch: int = 512
+    # Узлы классов данных "host:port/db,host:port/db"; пусто - основной узел
+    redis_stock_nodes: str = ""
+    redis_order_nodes: str = ""
+    redis_invoice_nodes: str = ""
+    redis_ring_replicas: int = 160
+    order_batch_max_size: int = 1000
+    order_idempotency_ttl: int = 86400
+    # Инвойс корзины верстается на одну страницу
+    order_cart_max_items: int = 20
+    # Срок хранения, с (0 - бессрочно): hash обработанного заказа order:{id}
+    # и инвойс с метаданными; отсчитывается от записи
+    order_retention_ttl: int = 30 * 86400
+    invoice_retention_ttl: int = 30 * 86400
+    # Допуск заказов (api/order/admission.py): токен-бакет клиента, токенов в
+    # секунду (0 - без ограничения) и ёмкость; клиент - IP или заголовок
+    order_rate_limit: float = 50.0
+    order_rate_burst: int = 100
+    order_client_header: str = ""
+    # Отказ в приёме, когда оценка ожидания в очереди default выше SLO, с
+    # (0 - выключено); оценка обновляется раз в interval секунд и не
+    # применяется, пока в очереди меньше min_depth сообщений
+    order_wait_slo: float = 30.0
+    order_backpressure_interval: float = 1.0
+    order_backpressure_min_depth: int = 100
+    # Конвейер заказов: "celery" - задача process_order на заказ, "stream" -
+    # поток Redis orders:stream и читатель backend/tasks/order_stream.py
+    order_pipeline: str = "celery"
+    order_stream_group: str = "orders"
+    order_stream_batch: int = 100
+    order_stream_block: int = 1000
+    # Записи, не подтверждённые дольше claim_idle секунд, забирает другой
+    # читатель (XAUTOCLAIM); проверка раз в claim_interval секунд
+    order_stream_claim_idle: int = 60
+    order_stream_claim_interval: float = 5.0
+    redis_scan_count: int = 500
+    # Каталог CSV-отчётов daily_stock_report
+    stock_report_dir: str = "logs/reports"
+    pending_order_timeout: int = 300
+    pending_order_recovery_batch: int = 500
+    invoice_compression: bool = False
+    invoice_chunk_size: int = 64 * 1024
+    invoice_lazy_generation: bool = False
+    invoice_wait_timeout: float = 10.0
+    invoice_lock_ttl: int = 30
+    invoice_poll_interval: float = 0.1
+    notification_transport: str = "log"
+    notification_concurrency: int = 100
+    notification_max_pending: int = 1000
+    notification_timeout: float = 10.0
+    # Повторы send_notification после ошибки транспорта и пауза между ними
+    notification_retries: int = 3
+    notification_retry_delay: float = 10.0
+    notification_log_delay: float = 0.0
+    notification_webhook_url: str | None = None
+    notification_digest_window: int = 0
+    notification_digest_batch: int = 500
+    # Через сколько секунд дайджест, не подтверждённый после захвата, берётся снова
+    notification_digest_lease: int = 60
+    status_batch_max_size: int = 1000
+    status_cache_size: int = 10000
+    status_cache_ttl: int = 3600
+    stock_cache_size: int = 10000
+    # Предел жизни записи кэша остатков, если инвалидация всё же потерялась
+    stock_cache_ttl: int = 60
+    # Воркеры очередей Celery (celery_service/queues.py): пул, конкурентность
+    # (0 - по числу CPU), prefetch multiplier, acks_late, autoscale "max,min"
+    worker_default_pool: str = "threads"
+    worker_default_concurrency: int = 32
+    worker_default_prefetch: int = 4
+    worker_default_acks_late: bool = True
+    worker_default_autoscale: str = ""
+    worker_priority_pool: str = "threads"
+    worker_priority_concurrency: int = 64
+    worker_priority_prefetch: int = 8
+    worker_priority_acks_late: bool = False
+    worker_priority_autoscale: str = ""
+    worker_invoices_pool: str = "prefork"
+    worker_invoices_concurrency: int = 0
+    worker_invoices_prefetch: int = 1
+    worker_invoices_acks_late: bool = True
+    worker_invoices_autoscale: str = ""
+    metrics_enabled: bool = True
+    metrics_worker_port: int = 9100
+    status_stream_keepalive: float = 15.0
+    smtp_host: str = "localhost"
+    smtp_port: int = 25
+    smtp_sender: str = "shop@example.com"
+    smtp_username: str | None = None
+    smtp_password: str | None = None
+    smtp_use_tls: bool = False
+    smtp_pool_size: int = 10
 
     class Config:
         env_file = ENV_PATH
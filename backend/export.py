@@ -0,0 +1,133 @@
+"""
+Streaming export of stock and order state, page by page over SCAN cursors
+"""
+
+import base64
+import csv
+import io
+import json
+from typing import Iterator
+
+from backend.config import CONFIG
+from backend.models.export.enums import ExportFormat, ExportKind
+from backend.registry import backend_redis
+from backend.storage.db.keys import order_key, stock_key
+from backend.storage.db.redis_client import order_items
+
+COLUMNS = {
+    ExportKind.STOCK: ("product", "quantity"),
+    ExportKind.ORDERS: ("order_id", "status", "items"),
+}
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+Position = tuple[int, int]
+
+
+def encode_cursor(position: Position) -> str:
+    """Токен продолжения: номер узла и курсор SCAN на нём"""
+    raw = f"{position[0]}:{position[1]}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Position:
+    """ValueError, если токен испорчен"""
+    raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+    index, cursor = map(int, raw.split(":"))
+    if index < 0 or cursor < 0:
+        raise ValueError(f"Invalid export cursor: {token}")
+    return index, cursor
+
+
+def _stock_pages(start: Position) -> Iterator[tuple[Position | None, list[tuple]]]:
+    prefix = len(stock_key(""))
+    for position, keys, values in backend_redis.scan_pages(
+        stock_key("*"), CONFIG.redis_scan_count, start
+    ):
+        # Ключ мог исчезнуть между SCAN и MGET
+        yield position, [
+            (key[prefix:], int(value))
+            for key, value in zip(keys, values)
+            if value is not None
+        ]
+
+
+_ORDER_FIELDS = ["status", "product", "quantity", "items"]
+
+
+def _order_pages(start: Position) -> Iterator[tuple[Position | None, list[tuple]]]:
+    prefix = len(order_key(""))
+    for position, keys, values in backend_redis.scan_pages(
+        order_key("*"), CONFIG.redis_scan_count, start, _ORDER_FIELDS
+    ):
+        rows = []
+        for key, row in zip(keys, values):
+            order = {
+                field: value
+                for field, value in zip(_ORDER_FIELDS, row)
+                if value is not None
+            }
+            if "status" in order:
+                rows.append((int(key[prefix:]), order["status"], order_items(order)))
+        yield position, rows
+
+
+_PAGES = {ExportKind.STOCK: _stock_pages, ExportKind.ORDERS: _order_pages}
+
+
+def _ndjson(columns: tuple[str, ...], rows: list[tuple]) -> str:
+    return "".join(
+        json.dumps(dict(zip(columns, row)), separators=(",", ":")) + "\n"
+        for row in rows
+    )
+
+
+def _csv(rows: list[tuple]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    for row in rows:
+        # Строки заказа - JSON в одной ячейке
+        writer.writerow(
+            json.dumps(value) if isinstance(value, list) else value for value in row
+        )
+    return buffer.getvalue()
+
+
+def _cursor_line(fmt: ExportFormat, position: Position | None) -> str:
+    token = None if position is None else encode_cursor(position)
+    if fmt == ExportFormat.NDJSON:
+        return json.dumps({"cursor": token}) + "\n"
+    return f"# cursor={token or ''}\n"
+
+
+def iter_export(
+    kind: ExportKind,
+    fmt: ExportFormat,
+    start: Position = (0, 0),
+    cursors: bool = True,
+) -> Iterator[str]:
+    """
+    Выгрузка с позиции start: кусок на страницу SCAN, в памяти - одна
+    страница. При cursors=True после каждой страницы идёт токен продолжения
+    ({"cursor": ...} в NDJSON, "# cursor=..." в CSV), в конце - пустой
+    """
+    columns = COLUMNS[kind]
+    if fmt == ExportFormat.CSV:
+        yield _csv([columns])
+
+    position: Position | None = start
+    for position, rows in _PAGES[kind](start):
+        if fmt == ExportFormat.NDJSON:
+            chunk = _ndjson(columns, rows)
+        else:
+            chunk = _csv(rows)
+        if cursors:
+            chunk += _cursor_line(fmt, position)
+        yield chunk
+
+    # Последние страницы могли оказаться пустыми
+    if cursors and position is not None:
+        yield _cursor_line(fmt, None)
@@ -0,0 +1,204 @@
+"""
+PDF invoice layout and a precompiled template renderer
+"""
+
+import re
+import zlib
+from datetime import datetime
+from functools import lru_cache
+from typing import Iterable, Sequence
+
+from fpdf import FPDF
+
+# Метки полей в заготовке. Символы меток не экранируются FPDF
+_FIELD_MARK = "@@"
+_DATE_FORMAT = "%Y-%m-%d %H:%M"
+_CREATION_DATE_FORMAT = "D:%Y%m%d%H%M%S"
+
+# Страница инвойса одна: объект 3 - страница, объект 4 - её content stream
+_CONTENT_OBJ = "4 0 obj\n"
+_OBJ_RE = re.compile(r"^(\d+) 0 obj$", re.MULTILINE)
+_CREATION_DATE_RE = re.compile(r"/CreationDate \((D:\d{14})\)")
+
+_ROW_HEIGHT = 8
+_PRODUCT_WIDTH = 140
+
+
+def draw_invoice(
+    pdf: FPDF,
+    order_id: int | str,
+    date: str,
+    items: Sequence[dict],
+    total: int | str | None = None,
+) -> None:
+    """Вёрстка страницы инвойса: items - строки заказа {product, quantity}"""
+    if total is None:
+        total = sum(int(item["quantity"]) for item in items)
+
+    pdf.add_page()
+
+    # Заголовок
+    pdf.set_font("Arial", "B", 24)
+    pdf.cell(0, 10, "INVOICE", ln=True, align="C")
+    pdf.ln(10)
+
+    # Детали
+    pdf.set_font("Arial", "", 12)
+    pdf.cell(0, 10, f"Order ID: #{order_id}", ln=True)
+    pdf.cell(0, 10, f"Date: {date}", ln=True)
+    pdf.ln(5)
+
+    # Линия
+    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
+    pdf.ln(5)
+
+    # Товары. Текст в ячейках выровнен влево: заготовка подставляет значения
+    # вместо меток другой длины
+    pdf.set_font("Arial", "B", 14)
+    pdf.cell(0, 10, "Order Details:", ln=True)
+    pdf.set_font("Arial", "B", 12)
+    pdf.cell(_PRODUCT_WIDTH, _ROW_HEIGHT, "Product", border=1)
+    pdf.cell(0, _ROW_HEIGHT, "Quantity", border=1, ln=True)
+    pdf.set_font("Arial", "", 12)
+    for item in items:
+        pdf.cell(_PRODUCT_WIDTH, _ROW_HEIGHT, f"{item['product']}", border=1)
+        pdf.cell(0, _ROW_HEIGHT, f"{item['quantity']}", border=1, ln=True)
+    pdf.set_font("Arial", "B", 12)
+    pdf.cell(_PRODUCT_WIDTH, _ROW_HEIGHT, "Total items", border=1)
+    pdf.cell(0, _ROW_HEIGHT, f"{total}", border=1, ln=True)
+    pdf.ln(5)
+
+
+def _escape(text: str) -> str:
+    # То же экранирование строк, что делает FPDF
+    return (
+        text.replace("\\", "\\\\")
+        .replace(")", "\\)")
+        .replace("(", "\\(")
+        .replace("\r", "\\r")
+    )
+
+
+class InvoiceTemplate:
+    """
+    Инвойс на заданное число строк, свёрстанный через FPDF один раз. На каждый
+    заказ в готовый content stream подставляются только поля заказа, а
+    документ собирается из заранее сериализованных объектов с пересчётом xref.
+    """
+
+    def __init__(self, lines: int):
+        fields = ["order_id", "date", "total"]
+        for index in range(lines):
+            fields += [f"product_{index}", f"quantity_{index}"]
+
+        def mark(field: str) -> str:
+            return f"{_FIELD_MARK}{field}{_FIELD_MARK}"
+
+        pdf = FPDF()
+        pdf.set_compression(False)
+        draw_invoice(
+            pdf,
+            mark("order_id"),
+            mark("date"),
+            [
+                {"product": mark(f"product_{i}"), "quantity": mark(f"quantity_{i}")}
+                for i in range(lines)
+            ],
+            mark("total"),
+        )
+        if pdf.page != 1:
+            raise ValueError(f"Invoice with {lines} lines does not fit one page")
+        content = pdf.pages[1]
+        document = pdf.output(dest="S")
+
+        # Чётные элементы - статичный текст, нечётные - имена полей
+        self._content_parts = re.split(
+            f"{_FIELD_MARK}({'|'.join(fields)}){_FIELD_MARK}", content
+        )
+
+        content_start = document.index(f"\n{_CONTENT_OBJ}") + 1
+        content_end = document.index("endobj\n", content_start) + len("endobj\n")
+        xref_start = document.index("xref\n")
+
+        self._head = document[:content_start].encode("latin1")
+        self._tail = document[content_end:xref_start]
+        self._head_offsets = {
+            int(m.group(1)): m.start()
+            for m in _OBJ_RE.finditer(document[:content_start])
+        }
+        self._tail_offsets = {
+            int(m.group(1)): m.start() for m in _OBJ_RE.finditer(self._tail)
+        }
+        self._creation_date = _CREATION_DATE_RE.search(self._tail).group(1)
+        self._size = len(self._head_offsets) + len(self._tail_offsets) + 2
+        self._trailer = document[
+            document.index("trailer\n") : document.index("startxref")
+        ]
+
+    def render(
+        self,
+        order_id: int,
+        items: Sequence[dict],
+        created_at: datetime | None = None,
+    ) -> bytes:
+        created_at = created_at or datetime.now()
+        values = {
+            "order_id": _escape(str(order_id)),
+            "date": created_at.strftime(_DATE_FORMAT),
+            "total": str(sum(int(item["quantity"]) for item in items)),
+        }
+        for index, item in enumerate(items):
+            values[f"product_{index}"] = _escape(str(item["product"]))
+            values[f"quantity_{index}"] = _escape(str(item["quantity"]))
+        parts = self._content_parts
+        content = "".join(
+            values[part] if index % 2 else part for index, part in enumerate(parts)
+        )
+        stream = zlib.compress(content.encode("latin1"))
+        content_obj = (
+            b"%s<</Filter /FlateDecode /Length %d>>\nstream\n%s\nendstream\nendobj\n"
+            % (_CONTENT_OBJ.encode("latin1"), len(stream), stream)
+        )
+
+        tail_start = len(self._head) + len(content_obj)
+        offsets = dict(self._head_offsets)
+        offsets[4] = len(self._head)
+        offsets.update(
+            {
+                number: tail_start + offset
+                for number, offset in self._tail_offsets.items()
+            }
+        )
+        # Длина даты фиксирована, смещения объектов после неё не меняются
+        tail = self._tail.replace(
+            self._creation_date, created_at.strftime(_CREATION_DATE_FORMAT), 1
+        )
+        xref = "".join(
+            f"{offsets[number]:010d} 00000 n \n" for number in range(1, self._size)
+        )
+        footer = (
+            f"{tail}xref\n0 {self._size}\n0000000000 65535 f \n{xref}"
+            f"{self._trailer}startxref\n{tail_start + len(tail)}\n%%EOF\n"
+        )
+        return self._head + content_obj + footer.encode("latin1")
+
+
+@lru_cache(maxsize=32)
+def get_invoice_template(lines: int) -> InvoiceTemplate:
+    # Заготовка на число строк строится один раз на процесс, после fork воркера
+    return InvoiceTemplate(lines)
+
+
+def render_invoice(
+    order_id: int, items: Sequence[dict], created_at: datetime | None = None
+) -> bytes:
+    return get_invoice_template(len(items)).render(order_id, items, created_at)
+
+
+def render_invoices(orders: Iterable[dict]) -> dict[int, bytes]:
+    """Пакетный рендер: [{order_id, items}] -> {order_id: PDF}"""
+    created_at = datetime.now()
+    return {
+        order["order_id"]: render_invoice(order["order_id"], order["items"], created_at)
+        for order in orders
+    }
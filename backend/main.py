@@ -7,13 +7,22 @@ import multiprocessing
 from contextlib import asynccontextmanager
 
 from dotenv import load_dotenv
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.openapi.utils import get_openapi
+from starlette import status
 from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse
 
 from backend import api
+from backend.api.metrics import metrics_router
+from backend.api.order.admission import order_admission
+from backend.api.status.hub import status_hub
+from backend.api.stock.cache import stock_cache
+from backend.config import CONFIG
+from backend.metrics import MetricsMiddleware
 from backend.registry import ENV, async_backend_redis
 from backend.redis_init.initialization import redis_ini
+from backend.storage.db.health import RedisUnavailableError
 
 load_dotenv()
 
@@ -37,6 +46,9 @@ async def lifespan(app: FastAPI):
 
     yield
 
+    await status_hub.close()
+    await stock_cache.close()
+    await order_admission.close()
     await async_backend_redis.close()
 
     logger.info("Server shutting down")
@@ -44,7 +56,22 @@ async def lifespan(app: FastAPI):
 
 app = FastAPI(lifespan=lifespan)
 app.include_router(api.router)
+app.include_router(metrics_router)
+
+
+@app.exception_handler(RedisUnavailableError)
+async def redis_unavailable_handler(
+    request: Request, exc: RedisUnavailableError
+) -> JSONResponse:
+    # Брейкер открыт: отвечаем сразу, не дожидаясь таймаутов Redis
+    return JSONResponse(
+        {"detail": "Storage is temporarily unavailable"},
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": str(max(1, round(CONFIG.redis_breaker_reset_timeout)))},
+    )
+
 
+app.add_middleware(MetricsMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["<domain-address>"],
@@ -0,0 +1,198 @@
+"""
+Prometheus metrics of the API and the Celery workers
+"""
+
+import logging
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    start_http_server,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+from prometheus_client.registry import Collector
+
+from backend.config import CONFIG
+from celery_service.queues import QUEUES as CELERY_QUEUES, broker_keys
+
+logger = logging.getLogger(__name__)
+
+_FAST_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "API request latency",
+    ["method", "route", "status"],
+)
+TASK_RUNTIME = Histogram(
+    "celery_task_runtime_seconds",
+    "Task execution time in the worker",
+    ["task"],
+)
+TASK_WAIT = Histogram(
+    "celery_task_wait_seconds",
+    "Time between publishing a task and its start",
+    ["task"],
+)
+TASKS = Counter("celery_tasks_total", "Finished tasks", ["task", "state"])
+REDIS_COMMAND_DURATION = Histogram(
+    "redis_command_duration_seconds",
+    "Redis command latency as seen by the client",
+    ["client", "command"],
+    buckets=_FAST_BUCKETS,
+)
+REDIS_POOL_CONNECTIONS = Gauge(
+    "redis_pool_connections",
+    "Connections of Redis client pools",
+    ["client", "state"],
+    multiprocess_mode="livesum",
+)
+REDIS_POOL_MAX_CONNECTIONS = Gauge(
+    "redis_pool_max_connections",
+    "Redis client pool size limit",
+    ["client"],
+    multiprocess_mode="livesum",
+)
+STOCK_RESERVATIONS = Counter(
+    "stock_reservations_total", "Stock reservation attempts", ["result"]
+)
+ORDER_REJECTIONS = Counter(
+    "order_rejections_total", "Orders refused by admission control", ["reason"]
+)
+
+
+def observe_redis_command(client: str, command, started: float) -> None:
+    if CONFIG.metrics_enabled:
+        REDIS_COMMAND_DURATION.labels(client, str(command).upper()).observe(
+            time.perf_counter() - started
+        )
+
+
+def observe_pools(stats) -> None:
+    """stats - пары (клиент, пул redis-py), см. redis_client.iter_pools"""
+    for client, pool in stats:
+        REDIS_POOL_CONNECTIONS.labels(client, "in_use").set(
+            len(pool._in_use_connections)
+        )
+        REDIS_POOL_CONNECTIONS.labels(client, "idle").set(
+            len(pool._available_connections)
+        )
+        REDIS_POOL_MAX_CONNECTIONS.labels(client).set(pool.max_connections)
+
+
+class QueueDepthCollector(Collector):
+    """Длина очередей Celery в брокере, читается в момент scrape"""
+
+    def __init__(self):
+        self._client = None
+
+    def _broker(self):
+        if self._client is None:
+            import redis
+
+            self._client = redis.Redis.from_url(
+                CONFIG.celery_broker_dsn,
+                socket_timeout=CONFIG.redis_socket_timeout,
+                socket_connect_timeout=CONFIG.redis_socket_connect_timeout,
+            )
+        return self._client
+
+    def collect(self):
+        depth = GaugeMetricFamily(
+            "celery_queue_depth", "Messages waiting in a Celery queue", labels=["queue"]
+        )
+        try:
+            with self._broker().pipeline(transaction=False) as pipe:
+                for queue in CELERY_QUEUES:
+                    for key in broker_keys(queue):
+                        pipe.llen(key)
+                lengths = iter(pipe.execute())
+        except Exception as error:
+            logger.warning(f"Failed to read Celery queue depth: {error}")
+            return
+        for queue in CELERY_QUEUES:
+            depth.add_metric([queue], sum(next(lengths) for _ in broker_keys(queue)))
+        yield depth
+
+
+def _collecting_registry() -> CollectorRegistry:
+    # Prefork-воркер: дети пишут метрики в файлы PROMETHEUS_MULTIPROC_DIR
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    registry.register(QueueDepthCollector())
+    return registry
+
+
+_registry: CollectorRegistry | None = None
+
+
+def get_registry() -> CollectorRegistry:
+    global _registry
+    if _registry is None:
+        _registry = _collecting_registry()
+    return _registry
+
+
+def render_metrics() -> tuple[bytes, str]:
+    return generate_latest(get_registry()), CONTENT_TYPE_LATEST
+
+
+def start_worker_exporter(port: int) -> None:
+    start_http_server(port, registry=get_registry())
+    logger.info(f"Worker metrics exporter listening on :{port}")
+
+
+class MetricsMiddleware:
+    """ASGI-middleware: латентность запросов по шаблону маршрута"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not CONFIG.metrics_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Шаблон маршрута, а не путь: id заказов не раздувают число серий
+            route = scope.get("route")
+            HTTP_REQUEST_DURATION.labels(
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                status_code,
+            ).observe(time.perf_counter() - started)
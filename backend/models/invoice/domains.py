@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field
+
+from backend.models.invoice.enums import InvoiceEncoding
+
+
+class InvoiceMeta(BaseModel):
+    length: int = Field(..., title="Stored payload length in bytes")
+    size: int | None = Field(None, title="PDF size before encoding")
+    etag: str | None = Field(None, title="SHA-256 of the PDF")
+    encoding: InvoiceEncoding = Field(
+        InvoiceEncoding.IDENTITY, title="Stored payload encoding"
+    )
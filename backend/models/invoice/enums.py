@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class InvoiceEncoding(str, Enum):
+    IDENTITY = "identity"
+    GZIP = "gzip"
@@ -0,0 +1,9 @@
+from pydantic import BaseModel
+
+
+class ResponseNotificationStats(BaseModel):
+    buffered: int
+    digests: int
+    digested: int
+    immediate: int
+    reduction_ratio: float
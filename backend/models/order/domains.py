@@ -0,0 +1,14 @@
+from pydantic import BaseModel, Field
+
+from backend.models.order.enums import ReservationStatus
+
+
+class StockReservation(BaseModel):
+    status: ReservationStatus = Field(..., title="Reservation result")
+    stock: int | None = Field(
+        None, title="Stock left after the attempt (first line or the failed one)"
+    )
+    product: str | None = Field(None, title="Product of the failed line")
+    stocks: dict[str, int] = Field(
+        default_factory=dict, title="Stock left per product after reservation"
+    )
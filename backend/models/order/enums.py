@@ -0,0 +1,12 @@
+from enum import Enum
+
+
+class OrderStatus(str, Enum):
+    PENDING = "pending"
+    PROCESSED = "processed"
+
+
+class ReservationStatus(str, Enum):
+    RESERVED = "reserved"
+    DUPLICATE = "duplicate"
+    INSUFFICIENT_STOCK = "insufficient_stock"
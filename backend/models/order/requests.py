@@ -1,3 +1,5 @@
+from typing import Any
+
 from pydantic import BaseModel, EmailStr, Field
 
 
@@ -6,3 +8,20 @@ class RequestOrder(BaseModel):
     product: str = Field(..., title="Product name")
     quantity: int = Field(..., ge=1, title="Quantity")
     email: EmailStr = Field(..., title="Customer email")
+
+
+class RequestOrderItem(BaseModel):
+    product: str = Field(..., title="Product name")
+    quantity: int = Field(..., ge=1, title="Quantity")
+
+
+class RequestCartOrder(BaseModel):
+    order_id: int = Field(..., title="Order ID")
+    items: list[RequestOrderItem] = Field(..., min_length=1, title="Cart lines")
+    email: EmailStr = Field(..., title="Customer email")
+
+
+class RequestOrderBatch(BaseModel):
+    # Элементы валидируются по одному в хендлере, чтобы ошибка в одном заказе
+    # (включая элемент не-объект) не отклоняла весь пакет
+    orders: list[Any] = Field(..., min_length=1, title="Orders")
@@ -5,3 +5,27 @@ from pydantic import BaseModel
 
 class ResponseOrder(BaseModel):
     task_id: uuid.UUID
+
+
+class ResponseOrderBatchItem(BaseModel):
+    index: int
+    order_id: int
+    task_id: uuid.UUID
+    # Заказ был принят раньше, task_id - исходный
+    replayed: bool = False
+
+
+class ResponseOrderBatchErrorDetail(BaseModel):
+    loc: list[str | int]
+    msg: str
+    type: str
+
+
+class ResponseOrderBatchError(BaseModel):
+    index: int
+    errors: list[ResponseOrderBatchErrorDetail]
+
+
+class ResponseOrderBatch(BaseModel):
+    accepted: list[ResponseOrderBatchItem]
+    rejected: list[ResponseOrderBatchError]
@@ -0,0 +1,16 @@
+from enum import Enum
+
+
+class TaskState(str, Enum):
+    PENDING = "PENDING"
+    STARTED = "STARTED"
+    RETRY = "RETRY"
+    SUCCESS = "SUCCESS"
+    FAILURE = "FAILURE"
+    REVOKED = "REVOKED"
+
+
+# Состояния, после которых статус задачи больше не меняется
+TERMINAL_STATES = frozenset(
+    {TaskState.SUCCESS.value, TaskState.FAILURE.value, TaskState.REVOKED.value}
+)
@@ -0,0 +1,5 @@
+from pydantic import BaseModel, Field
+
+
+class RequestStatusBatch(BaseModel):
+    task_ids: list[str] = Field(..., min_length=1, title="Task IDs")
@@ -3,3 +3,14 @@ from pydantic import BaseModel
 
 class ResponseStatus(BaseModel):
     status: str
+
+
+class ResponseStatusBatch(BaseModel):
+    statuses: dict[str, str]
+    not_found: list[str]
+
+
+class ResponseStatusCache(BaseModel):
+    hits: int
+    misses: int
+    size: int
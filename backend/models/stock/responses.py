@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+
+
+class ResponseStock(BaseModel):
+    product: str
+    quantity: int
+
+
+class ResponseStockList(BaseModel):
+    stock: dict[str, int]
+
+
+class ResponseStockCache(BaseModel):
+    hits: int
+    misses: int
+    size: int
@@ -0,0 +1,3 @@
+from .dispatcher import NotificationDispatcher, get_dispatcher
+from .transports import TRANSPORTS, BaseTransport, create_transport
+from .digest import format_digest
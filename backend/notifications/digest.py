@@ -0,0 +1,6 @@
+def format_digest(messages: list[str]) -> str:
+    """Одно сообщение отправляется как есть, несколько - одним письмом"""
+    if len(messages) == 1:
+        return messages[0]
+    lines = "\n".join(f"- {message}" for message in messages)
+    return f"You have {len(messages)} updates:\n{lines}"
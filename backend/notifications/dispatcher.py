@@ -0,0 +1,113 @@
+"""
+Asyncio notification dispatcher running in a background thread of a worker
+process. Celery tasks only submit messages; sends run concurrently.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import Future
+from typing import Callable
+
+from backend.config import CONFIG
+from backend.notifications.transports import BaseTransport, create_transport
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationDispatcher:
+    def __init__(
+        self,
+        transport_factory: Callable[[], BaseTransport],
+        concurrency: int,
+        max_pending: int,
+    ):
+        self._transport_factory = transport_factory
+        self._concurrency = concurrency
+        self._max_pending = max_pending
+        self._pending: threading.BoundedSemaphore | None = None
+        self._lock = threading.Lock()
+        self._pid: int | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._transport: BaseTransport | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self.sent = 0
+        self.failed = 0
+
+    def _ensure_started(self) -> None:
+        # Поток и event loop не переживают fork, поэтому создаются в каждом
+        # дочернем процессе заново
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Ограничивает очередь отправок: при переполнении submit() блокирует
+            # задачу Celery, и воркер перестаёт забирать сообщения из брокера
+            self._pending = threading.BoundedSemaphore(self._max_pending)
+            self._loop = asyncio.new_event_loop()
+            self._transport = self._transport_factory()
+            self._thread = threading.Thread(
+                target=self._loop.run_forever,
+                name="notification-dispatcher",
+                daemon=True,
+            )
+            self._thread.start()
+            self._semaphore = None
+            self._pid = os.getpid()
+
+    async def _send(self, email: str, message: str) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._concurrency)
+        try:
+            async with self._semaphore:
+                await self._transport.send(email, message)
+            self.sent += 1
+        except Exception as error:
+            self.failed += 1
+            logger.error(f"Failed to send notification to {email}: {error}")
+            raise
+        finally:
+            self._pending.release()
+
+    def submit(self, email: str, message: str) -> Future:
+        self._ensure_started()
+        self._pending.acquire()
+        return asyncio.run_coroutine_threadsafe(self._send(email, message), self._loop)
+
+    async def _drain(self) -> None:
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._transport.close()
+
+    def close(self, timeout: float | None = None) -> None:
+        """Дожидается отправки принятых уведомлений и останавливает loop"""
+        if self._pid != os.getpid():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._drain(), self._loop).result(timeout)
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout)
+            self._pid = None
+
+
+_dispatcher: NotificationDispatcher | None = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher() -> NotificationDispatcher:
+    """Один dispatcher на процесс; задачи пула threads вызывают его параллельно"""
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = NotificationDispatcher(
+                    lambda: create_transport(CONFIG.notification_transport),
+                    concurrency=CONFIG.notification_concurrency,
+                    max_pending=CONFIG.notification_max_pending,
+                )
+    return _dispatcher
@@ -0,0 +1,177 @@
+"""
+Notification transports. A transport lives inside the dispatcher event loop
+and reuses its connections between sends.
+"""
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from email.message import EmailMessage
+
+from backend.config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class BaseTransport(ABC):
+    @abstractmethod
+    async def send(self, email: str, message: str) -> None:
+        """Отправка одного уведомления; ошибка доставки - исключение"""
+
+    async def close(self) -> None:
+        pass
+
+
+class LogTransport(BaseTransport):
+    """Пишет уведомление в лог, задержка имитирует внешний сервис"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    async def send(self, email: str, message: str) -> None:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        logger.info(f"Sent notification to {email}: {message}")
+
+
+class SmtpTransport(BaseTransport):
+    """Отправка писем через пул SMTP-соединений (aiosmtplib)"""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        sender: str,
+        username: str | None = None,
+        password: str | None = None,
+        use_tls: bool = False,
+        pool_size: int = 10,
+        timeout: float = 10.0,
+    ):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._idle: asyncio.Queue | None = None
+        self._slots: asyncio.Semaphore | None = None
+
+    async def _connect(self):
+        import aiosmtplib
+
+        client = aiosmtplib.SMTP(
+            hostname=self.host,
+            port=self.port,
+            use_tls=self.use_tls,
+            timeout=self.timeout,
+        )
+        await client.connect()
+        if self.username:
+            await client.login(self.username, self.password or "")
+        return client
+
+    async def send(self, email: str, message: str) -> None:
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.pool_size)
+
+        mail = EmailMessage()
+        mail["From"] = self.sender
+        mail["To"] = email
+        mail["Subject"] = "Shop notification"
+        mail.set_content(message)
+
+        async with self._slots:
+            client = self._idle.get_nowait() if not self._idle.empty() else None
+            if client is None or not client.is_connected:
+                client = await self._connect()
+            try:
+                await client.send_message(mail)
+            except Exception:
+                client.close()
+                raise
+            self._idle.put_nowait(client)
+
+    async def close(self) -> None:
+        while self._idle is not None and not self._idle.empty():
+            client = self._idle.get_nowait()
+            try:
+                await client.quit()
+            except Exception:
+                client.close()
+
+
+class WebhookTransport(BaseTransport):
+    """POST уведомления на webhook через общий httpx-клиент"""
+
+    def __init__(self, url: str, pool_size: int = 100, timeout: float = 10.0):
+        self.url = url
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._client = None
+
+    async def send(self, email: str, message: str) -> None:
+        if self._client is None:
+            import httpx
+
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size,
+                ),
+            )
+        response = await self._client.post(
+            self.url, json={"email": email, "message": message}
+        )
+        response.raise_for_status()
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+
+
+def _log_transport() -> BaseTransport:
+    return LogTransport(delay=CONFIG.notification_log_delay)
+
+
+def _smtp_transport() -> BaseTransport:
+    return SmtpTransport(
+        host=CONFIG.smtp_host,
+        port=CONFIG.smtp_port,
+        sender=CONFIG.smtp_sender,
+        username=CONFIG.smtp_username,
+        password=CONFIG.smtp_password,
+        use_tls=CONFIG.smtp_use_tls,
+        pool_size=CONFIG.smtp_pool_size,
+        timeout=CONFIG.notification_timeout,
+    )
+
+
+def _webhook_transport() -> BaseTransport:
+    if not CONFIG.notification_webhook_url:
+        raise RuntimeError("NOTIFICATION_WEBHOOK_URL is not configured")
+    return WebhookTransport(
+        url=CONFIG.notification_webhook_url,
+        pool_size=CONFIG.notification_concurrency,
+        timeout=CONFIG.notification_timeout,
+    )
+
+
+# Фабрики транспортов по значению NOTIFICATION_TRANSPORT
+TRANSPORTS = {
+    "log": _log_transport,
+    "smtp": _smtp_transport,
+    "webhook": _webhook_transport,
+}
+
+
+def create_transport(name: str) -> BaseTransport:
+    try:
+        factory = TRANSPORTS[name]
+    except KeyError:
+        raise RuntimeError(f"Unknown notification transport: {name}")
+    return factory()
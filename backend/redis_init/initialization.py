@@ -2,5 +2,5 @@ from backend.registry import async_backend_redis
 
 
 async def redis_ini():
-    await async_backend_redis.set("stock:iphone", 50)
-    await async_backend_redis.set("stock:macbook", 7)
+    await async_backend_redis.set_stock("iphone", 50)
+    await async_backend_redis.set_stock("macbook", 7)
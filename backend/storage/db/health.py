@@ -0,0 +1,276 @@
+"""
+Redis connection health: circuit breaker and connection classes that use it
+"""
+
+import logging
+import os
+import threading
+import time
+
+import redis as redis_sync
+from redis.asyncio.connection import Connection as AsyncConnection
+from redis.exceptions import ConnectionError, RedisError, TimeoutError
+
+from backend.config import CONFIG
+
+logger = logging.getLogger(__name__)
+
+_CONNECTION_ERRORS = (ConnectionError, TimeoutError, OSError)
+
+# Команды, на которые сервер отвечает, когда появятся данные: таймаут чтения
+# после них - ожидание, а не сбой Redis
+_SUBSCRIBE_COMMANDS = frozenset({"SUBSCRIBE", "PSUBSCRIBE", "SSUBSCRIBE"})
+_BLOCKING_COMMANDS = frozenset(
+    {
+        "BLPOP",
+        "BRPOP",
+        "BLMOVE",
+        "BLMPOP",
+        "BRPOPLPUSH",
+        "BZPOPMIN",
+        "BZPOPMAX",
+        "BZMPOP",
+        "WAIT",
+    }
+)
+
+
+def _command_name(arg) -> str:
+    return (arg.decode() if isinstance(arg, bytes) else str(arg)).upper()
+
+
+def _is_blocking(args: tuple) -> bool:
+    name = _command_name(args[0])
+    if name in _BLOCKING_COMMANDS:
+        return True
+    if name in ("XREAD", "XREADGROUP"):
+        return any(_command_name(arg) == "BLOCK" for arg in args[1:])
+    return False
+
+
+class RedisUnavailableError(RedisError):
+    """
+    Redis помечен недоступным, команда не отправлялась.
+    Не наследует ConnectionError, поэтому Retry redis-py её не повторяет.
+    """
+
+
+class CircuitBreaker:
+    """
+    CLOSED - команды идут в Redis. После failure_threshold ошибок подряд
+    переходит в OPEN: команды сразу получают RedisUnavailableError, а фоновый
+    поток раз в reset_timeout секунд проверяет Redis PING-ом и при успехе
+    возвращает CLOSED. Запросы во время сбоя не ждут socket_timeout.
+    """
+
+    def __init__(
+        self, host: str, port: int, failure_threshold: int, reset_timeout: float
+    ):
+        self.host = host
+        self.port = port
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.is_open = False
+        self.opened_at: float | None = None
+        self._failures = 0
+        self._lock = threading.Lock()
+        self._probe: threading.Thread | None = None
+
+    def check(self) -> None:
+        if self.is_open:
+            raise RedisUnavailableError(
+                f"Redis {self.host}:{self.port} is unavailable, circuit is open"
+            )
+
+    def record_success(self) -> None:
+        if self._failures:
+            with self._lock:
+                self._failures = 0
+
+    def record_failure(self, error: BaseException) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.is_open or self._failures < self.failure_threshold:
+                return
+            self.is_open = True
+            self.opened_at = time.monotonic()
+            self._probe = threading.Thread(
+                target=self._run_probe,
+                name=f"redis-probe-{self.host}:{self.port}",
+                daemon=True,
+            )
+        logger.error(f"Redis {self.host}:{self.port} circuit opened: {error}")
+        self._probe.start()
+
+    def _run_probe(self) -> None:
+        # Отдельное соединение мимо пулов и брейкера
+        client = redis_sync.Redis(
+            host=self.host,
+            port=self.port,
+            socket_timeout=CONFIG.redis_socket_timeout,
+            socket_connect_timeout=CONFIG.redis_socket_connect_timeout,
+        )
+        try:
+            while True:
+                time.sleep(self.reset_timeout)
+                try:
+                    client.ping()
+                    break
+                except _CONNECTION_ERRORS:
+                    client.connection_pool.disconnect()
+        finally:
+            client.close()
+
+        with self._lock:
+            self.is_open = False
+            self.opened_at = None
+            self._failures = 0
+            self._probe = None
+        logger.info(f"Redis {self.host}:{self.port} circuit closed")
+
+
+_breakers: dict[tuple[str, int], CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(host: str, port: int) -> CircuitBreaker:
+    """Один брейкер на сервер Redis в процессе, общий для всех db и клиентов"""
+    breaker = _breakers.get((host, port))
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(
+                (host, port),
+                CircuitBreaker(
+                    host,
+                    port,
+                    failure_threshold=CONFIG.redis_breaker_threshold,
+                    reset_timeout=CONFIG.redis_breaker_reset_timeout,
+                ),
+            )
+    return breaker
+
+
+def _reset_after_fork() -> None:
+    # Поток-проба в дочерний процесс не переходит, состояние начинается заново
+    global _breakers_lock
+    _breakers.clear()
+    _breakers_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class GuardedConnection(redis_sync.Connection):
+    """
+    Синхронное соединение, которое сообщает брейкеру о результатах команд.
+    Таймаут чтения считается сбоем только для обычной пары запрос/ответ:
+    соединение подписки и блокирующая команда (BLPOP, XREADGROUP BLOCK)
+    законно молчат, пока нет данных.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.breaker = get_breaker(self.host, self.port)
+        self._subscribed = False
+        self._blocking = False
+
+    @property
+    def _waits_for_data(self) -> bool:
+        return self._subscribed or self._blocking
+
+    def connect(self):
+        self.breaker.check()
+        try:
+            super().connect()
+        except _CONNECTION_ERRORS as error:
+            self.breaker.record_failure(error)
+            raise
+
+    def disconnect(self, *args, **kwargs):
+        # Новое соединение не подписано: подписку повторит сам PubSub
+        self._subscribed = False
+        super().disconnect(*args, **kwargs)
+
+    def send_command(self, *args, **kwargs):
+        self._subscribed |= _command_name(args[0]) in _SUBSCRIBE_COMMANDS
+        self._blocking = _is_blocking(args)
+        super().send_command(*args, **kwargs)
+
+    def send_packed_command(self, command, check_health=True):
+        self.breaker.check()
+        try:
+            super().send_packed_command(command, check_health)
+        except _CONNECTION_ERRORS as error:
+            self.breaker.record_failure(error)
+            raise
+
+    def read_response(self, *args, **kwargs):
+        try:
+            response = super().read_response(*args, **kwargs)
+        except TimeoutError as error:
+            if not self._waits_for_data:
+                self.breaker.record_failure(error)
+            raise
+        except _CONNECTION_ERRORS as error:
+            self.breaker.record_failure(error)
+            raise
+        finally:
+            # Ответ на блокирующую команду получен: следующие чтения
+            # (например, ответы pipeline) - снова запрос/ответ
+            self._blocking = False
+        self.breaker.record_success()
+        return response
+
+
+class AsyncGuardedConnection(AsyncConnection):
+    """Async-вариант GuardedConnection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.breaker = get_breaker(self.host, self.port)
+        self._subscribed = False
+        self._blocking = False
+
+    @property
+    def _waits_for_data(self) -> bool:
+        return self._subscribed or self._blocking
+
+    async def connect(self):
+        self.breaker.check()
+        try:
+            await super().connect()
+        except _CONNECTION_ERRORS as error:
+            self.breaker.record_failure(error)
+            raise
+
+    async def disconnect(self, *args, **kwargs):
+        self._subscribed = False
+        await super().disconnect(*args, **kwargs)
+
+    async def send_command(self, *args, **kwargs):
+        self._subscribed |= _command_name(args[0]) in _SUBSCRIBE_COMMANDS
+        self._blocking = _is_blocking(args)
+        await super().send_command(*args, **kwargs)
+
+    async def send_packed_command(self, command, check_health=True):
+        self.breaker.check()
+        try:
+            await super().send_packed_command(command, check_health)
+        except _CONNECTION_ERRORS as error:
+            self.breaker.record_failure(error)
+            raise
+
+    async def read_response(self, *args, **kwargs):
+        try:
+            response = await super().read_response(*args, **kwargs)
+        except TimeoutError as error:
+            if not self._waits_for_data:
+                self.breaker.record_failure(error)
+            raise
+        except _CONNECTION_ERRORS as error:
+            self.breaker.record_failure(error)
+            raise
+        finally:
+            self._blocking = False
+        self.breaker.record_success()
+        return response
@@ -0,0 +1,78 @@
+"""
+Redis clients that time every command and pipeline for the metrics
+"""
+
+import time
+
+import redis as redis_sync
+from redis.asyncio import Redis as AsyncRedis
+from redis.asyncio.client import Pipeline as AsyncPipeline
+from redis.client import Pipeline
+
+from backend.metrics import observe_redis_command
+
+
+def _pipeline_command(pipeline) -> str:
+    return "MULTI" if pipeline.transaction else "PIPELINE"
+
+
+class InstrumentedPipeline(Pipeline):
+    metrics_label = "sync"
+
+    def execute(self, raise_on_error: bool = True):
+        started = time.perf_counter()
+        try:
+            return super().execute(raise_on_error)
+        finally:
+            observe_redis_command(self.metrics_label, _pipeline_command(self), started)
+
+
+class InstrumentedRedis(redis_sync.Redis):
+    """metrics_label - метка client в redis_command_duration_seconds"""
+
+    metrics_label = "sync"
+
+    def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            observe_redis_command(self.metrics_label, args[0], started)
+
+    def pipeline(self, transaction=True, shard_hint=None) -> InstrumentedPipeline:
+        pipeline = InstrumentedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+        pipeline.metrics_label = self.metrics_label
+        return pipeline
+
+
+class AsyncInstrumentedPipeline(AsyncPipeline):
+    metrics_label = "async"
+
+    async def execute(self, raise_on_error: bool = True):
+        started = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            observe_redis_command(self.metrics_label, _pipeline_command(self), started)
+
+
+class AsyncInstrumentedRedis(AsyncRedis):
+    metrics_label = "async"
+
+    async def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            observe_redis_command(self.metrics_label, args[0], started)
+
+    def pipeline(
+        self, transaction: bool = True, shard_hint: str | None = None
+    ) -> AsyncInstrumentedPipeline:
+        pipeline = AsyncInstrumentedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+        pipeline.metrics_label = self.metrics_label
+        return pipeline
@@ -0,0 +1,62 @@
+# Индекс ожидающих обработки заказов: score - время постановки в очередь
+PENDING_ORDERS_KEY = "orders:pending"
+# Исходный payload process_order для повторной постановки
+PENDING_ORDERS_PAYLOAD_KEY = "orders:pending:payload"
+# Расписание отправки дайджестов: score - время отправки, member - email
+NOTIFICATION_DIGESTS_DUE_KEY = "notifications:digest:due"
+# Префикс списков сообщений, накопленных для получателя
+NOTIFICATION_DIGEST_PREFIX = "notifications:digest:"
+# Счётчики уведомлений: buffered, digests, digested, immediate
+NOTIFICATION_STATS_KEY = "notifications:stats"
+# Pub/sub канал смен состояний задач Celery: {"task_id": ..., "status": ...}
+TASK_STATUS_CHANNEL = "tasks:status"
+# Поток заказов ORDER_PIPELINE=stream (свой на каждом узле заказов): записи
+# {task_id, order}; подтверждённые записи удаляются
+ORDER_STREAM_KEY = "orders:stream"
+# Счётчик заказов, обработанных воркерами: по нему API оценивает пропускную
+# способность для отказа в приёме при длинной очереди
+ORDERS_PROCESSED_KEY = "orders:processed"
+# Pub/sub канал инвалидации кэша остатков: сообщение - название товара
+STOCK_INVALIDATION_CHANNEL = "stock:invalidate"
+
+
+def stock_key(product: str) -> str:
+    return f"stock:{product}"
+
+
+def order_key(order_id: int) -> str:
+    # Hash обработанного заказа: status, строки, email, task_id, время
+    return f"order:{order_id}"
+
+
+def stock_reservation_key(order_id: int) -> str:
+    # Отметка RESERVE_LINES на узле остатков, не попадает под SCAN stock:*
+    return f"reservation:{order_id}"
+
+
+def order_claim_key(order_id: int) -> str:
+    return f"order:{order_id}:claim"
+
+
+def idempotency_key(key: str) -> str:
+    return f"idempotency:{key}"
+
+
+def invoice_key(order_id: int) -> str:
+    return f"invoice:{order_id}"
+
+
+def invoice_meta_key(order_id: int) -> str:
+    return f"invoice:{order_id}:meta"
+
+
+def invoice_lock_key(order_id: int) -> str:
+    return f"invoice:{order_id}:lock"
+
+
+def rate_limit_key(client: str) -> str:
+    return f"ratelimit:{client}"
+
+
+def notification_digest_key(email: str) -> str:
+    return f"{NOTIFICATION_DIGEST_PREFIX}{email}"
@@ -0,0 +1,121 @@
+"""
+Migration of order state from the loose string keys order:{id}:status and
+order:{id}:details to one hash per order (order:{id}), plus retention TTLs
+for orders and invoices written without one. Idempotent: run it once after
+the deploy, before starting the new workers, and again if it was interrupted.
+
+Run: python -m backend.storage.db.migrate_orders
+"""
+
+import json
+import logging
+import logging.config
+
+import redis
+
+from backend.config import CONFIG
+from backend.storage.db.keys import invoice_key, invoice_meta_key, order_key
+from backend.storage.db.router import KeyClass, RedisNode, get_router
+
+logger = logging.getLogger(__name__)
+
+# Ключи прежней схемы
+_LEGACY_STATUS_PATTERN = "order:*:status"
+
+
+def _legacy_details_key(order_id: str) -> str:
+    return f"order:{order_id}:details"
+
+
+def _client(node: RedisNode) -> redis.Redis:
+    return redis.Redis(
+        host=node.host,
+        port=node.port,
+        db=node.db,
+        decode_responses=True,
+        socket_timeout=CONFIG.redis_socket_timeout,
+    )
+
+
+def _order_fields(status: str, details: str | None) -> dict[str, str]:
+    # Как _order_fields в redis_client; email и task_id прежняя схема не хранила
+    fields = {"status": status}
+    if details is not None:
+        items = json.loads(details)["items"]
+        if len(items) == 1:
+            fields["product"] = items[0]["product"]
+            fields["quantity"] = str(items[0]["quantity"])
+        else:
+            fields["items"] = json.dumps(items, separators=(",", ":"))
+    return fields
+
+
+def migrate_orders(client: redis.Redis, count: int) -> int:
+    """Перенос заказов узла в hash; возвращает число перенесённых"""
+    migrated = 0
+    keys: list[str] = []
+    for key in client.scan_iter(match=_LEGACY_STATUS_PATTERN, count=count):
+        keys.append(key)
+        if len(keys) >= count:
+            migrated += _migrate_page(client, keys)
+            keys = []
+    if keys:
+        migrated += _migrate_page(client, keys)
+    return migrated
+
+
+def _migrate_page(client: redis.Redis, keys: list[str]) -> int:
+    order_ids = [key.split(":")[1] for key in keys]
+    with client.pipeline(transaction=False) as pipe:
+        for order_id, key in zip(order_ids, keys):
+            pipe.get(key)
+            pipe.get(_legacy_details_key(order_id))
+            pipe.exists(order_key(order_id))
+        replies = pipe.execute()
+
+    migrated = 0
+    with client.pipeline(transaction=True) as pipe:
+        for index, (order_id, key) in enumerate(zip(order_ids, keys)):
+            status, details, exists = replies[3 * index : 3 * index + 3]
+            # Hash уже записан новым воркером - он главнее
+            if status is not None and not exists:
+                pipe.hset(order_key(order_id), mapping=_order_fields(status, details))
+                if CONFIG.order_retention_ttl:
+                    pipe.expire(order_key(order_id), CONFIG.order_retention_ttl)
+                migrated += 1
+            pipe.delete(key, _legacy_details_key(order_id))
+        pipe.execute()
+    return migrated
+
+
+def expire_invoices(client: redis.Redis, count: int) -> int:
+    """TTL инвойсам узла, записанным без срока; возвращает их число"""
+    expired = 0
+    for key in client.scan_iter(match=invoice_key("*"), count=count):
+        order_id, _, suffix = key.partition(":")[2].partition(":")
+        if suffix or client.ttl(key) != -1:
+            continue
+        with client.pipeline(transaction=False) as pipe:
+            pipe.expire(key, CONFIG.invoice_retention_ttl)
+            pipe.expire(invoice_meta_key(order_id), CONFIG.invoice_retention_ttl)
+            pipe.execute()
+        expired += 1
+    return expired
+
+
+def run() -> None:
+    count = CONFIG.redis_scan_count
+    for node in get_router().nodes(KeyClass.ORDER):
+        with _client(node) as client:
+            migrated = migrate_orders(client, count)
+        logger.info(f"Migrated {migrated} orders on {node}")
+    if CONFIG.invoice_retention_ttl:
+        for node in get_router().nodes(KeyClass.INVOICE):
+            with _client(node) as client:
+                expired = expire_invoices(client, count)
+            logger.info(f"Set retention TTL on {expired} invoices on {node}")
+
+
+if __name__ == "__main__":
+    logging.config.fileConfig("backend/logging.conf", disable_existing_loggers=False)
+    run()
@@ -1,14 +1,278 @@
+import asyncio
+import gzip
+import hashlib
+import json
 import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Iterator
 
 from redis.asyncio import Redis, ConnectionPool
+from redis.asyncio.client import Pipeline, PubSub
+from redis.asyncio.retry import Retry as AsyncRetry
+from redis.backoff import NoBackoff
+from redis.retry import Retry
 import redis as redis_sync
 
 from backend.config import CONFIG
+from backend.models.invoice.domains import InvoiceMeta
+from backend.models.invoice.enums import InvoiceEncoding
+from backend.models.order.domains import StockReservation
+from backend.models.order.enums import OrderStatus, ReservationStatus
+from backend.storage.db import scripts
+from backend.storage.db.health import AsyncGuardedConnection, GuardedConnection
+from backend.storage.db.instrumented import AsyncInstrumentedRedis, InstrumentedRedis
+from backend.storage.db.keys import (
+    NOTIFICATION_DIGESTS_DUE_KEY,
+    NOTIFICATION_STATS_KEY,
+    ORDER_STREAM_KEY,
+    ORDERS_PROCESSED_KEY,
+    PENDING_ORDERS_KEY,
+    PENDING_ORDERS_PAYLOAD_KEY,
+    STOCK_INVALIDATION_CHANNEL,
+    TASK_STATUS_CHANNEL,
+    invoice_key,
+    idempotency_key,
+    invoice_meta_key,
+    notification_digest_key,
+    order_claim_key,
+    order_key,
+    rate_limit_key,
+    stock_key,
+    stock_reservation_key,
+)
+from backend.storage.db.router import KeyClass, RedisNode, get_router
 from backend.utils import throw_server_error
 
 logger = logging.getLogger(__name__)
 
 
+def _to_str(value: str | bytes) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def _pack_invoice(pdf: bytes, compress: bool) -> tuple[bytes, dict[str, str | int]]:
+    encoding = InvoiceEncoding.GZIP if compress else InvoiceEncoding.IDENTITY
+    payload = gzip.compress(pdf, mtime=0) if compress else pdf
+    meta = {
+        "size": len(pdf),
+        "etag": hashlib.sha256(pdf).hexdigest(),
+        "encoding": encoding.value,
+    }
+    return payload, meta
+
+
+def _pool_options(max_connections: int) -> dict:
+    return {
+        "max_connections": max_connections,
+        "socket_timeout": CONFIG.redis_socket_timeout,
+        "socket_connect_timeout": CONFIG.redis_socket_connect_timeout,
+        "socket_keepalive": True,
+        "health_check_interval": CONFIG.redis_health_check_interval,
+    }
+
+
+def _async_pool(node: RedisNode, decode_responses: bool) -> ConnectionPool:
+    return ConnectionPool(
+        host=node.host,
+        port=node.port,
+        db=node.db,
+        password=None,
+        decode_responses=decode_responses,
+        **_pool_options(CONFIG.redis_max_connections),
+        connection_class=AsyncGuardedConnection,
+        retry=AsyncRetry(NoBackoff(), CONFIG.redis_retries),
+    )
+
+
+def _subscriber_pool(node: RedisNode) -> ConnectionPool:
+    # Подписка ждёт сообщений сколько угодно: без socket_timeout и без Retry,
+    # иначе redis-py молча переподключается и переподписывается, а сообщения,
+    # опубликованные в разрыве, теряются. Обрыв доходит до подписчика
+    # исключением (мёртвое соединение находит TCP keepalive)
+    return ConnectionPool(
+        host=node.host,
+        port=node.port,
+        db=node.db,
+        password=None,
+        decode_responses=CONFIG.redis_decode_responses,
+        **{**_pool_options(CONFIG.redis_max_connections), "socket_timeout": None},
+        connection_class=AsyncGuardedConnection,
+        retry=AsyncRetry(NoBackoff(), 0),
+    )
+
+
+def _sync_pool(node: RedisNode, max_connections: int) -> redis_sync.ConnectionPool:
+    return redis_sync.ConnectionPool(
+        host=node.host,
+        port=node.port,
+        db=node.db,
+        password=None,
+        decode_responses=CONFIG.redis_decode_responses,
+        **_pool_options(max_connections),
+        connection_class=GuardedConnection,
+        retry=Retry(NoBackoff(), CONFIG.redis_retries),
+    )
+
+
+def _scatter(groups: dict[RedisNode, list[int]], chunks: list, size: int) -> list:
+    """Ответы узлов обратно в порядке исходных ключей"""
+    values = [None] * size
+    for indexes, chunk in zip(groups.values(), chunks):
+        for index, value in zip(indexes, chunk):
+            values[index] = value
+    return values
+
+
+def _merge_lines(items: list[dict]) -> dict[str, int]:
+    # Строки с одним товаром списываются одной суммой
+    totals: dict[str, int] = {}
+    for item in items:
+        totals[item["product"]] = totals.get(item["product"], 0) + int(item["quantity"])
+    return totals
+
+
+def _order_keys(order_id: int) -> list[str]:
+    return [order_key(order_id), PENDING_ORDERS_KEY, PENDING_ORDERS_PAYLOAD_KEY]
+
+
+def _order_fields(items: list[dict], record: dict | None) -> list:
+    """
+    Пары поле/значение hash заказа. Заказ из одной строки - product и
+    quantity, корзина - items в JSON: короткие поля держат hash в listpack
+    """
+    if len(items) == 1:
+        fields = {"product": items[0]["product"], "quantity": items[0]["quantity"]}
+    else:
+        fields = {"items": json.dumps(items, separators=(",", ":"))}
+    for name, value in (record or {}).items():
+        if value is not None:
+            fields[name] = value
+    return [part for pair in fields.items() for part in pair]
+
+
+def order_items(order: dict[str, str]) -> list[dict]:
+    """Строки заказа {product, quantity} из его hash"""
+    if "items" in order:
+        return json.loads(order["items"])
+    return [{"product": order["product"], "quantity": int(order["quantity"])}]
+
+
+def _completion_args(order_id: int, items: list[dict] | None = None, record=None):
+    # Без строк COMPLETE_ORDER только снимает заказ с индекса ожидающих
+    args = [OrderStatus.PROCESSED.value, order_id, CONFIG.order_retention_ttl]
+    if items is not None:
+        args += _order_fields(items, record)
+    return args
+
+
+def _reservation_params(
+    order_id: int, items: list[dict], record: dict | None = None
+) -> tuple[list[str], list[str | int]]:
+    totals = _merge_lines(items)
+    keys = [*_order_keys(order_id), *map(stock_key, totals)]
+    args = [
+        OrderStatus.PROCESSED.value,
+        order_id,
+        CONFIG.order_retention_ttl,
+        STOCK_INVALIDATION_CHANNEL,
+        *totals.values(),
+        *totals,
+        *_order_fields(items, record),
+    ]
+    return keys, args
+
+
+def _stock_groups(totals: dict[str, int]) -> dict[RedisNode, dict[str, int]]:
+    groups: dict[RedisNode, dict[str, int]] = {}
+    for product, quantity in totals.items():
+        groups.setdefault(get_router().stock_node(product), {})[product] = quantity
+    return groups
+
+
+def _colocated(order_id: int, totals: dict[str, int]) -> bool:
+    """Все ключи резервирования на одном узле - хватает одного RESERVE_STOCK"""
+    node = get_router().order_node(order_id)
+    return all(get_router().stock_node(product) == node for product in totals)
+
+
+def _lines_params(
+    order_id: int, lines: dict[str, int]
+) -> tuple[list[str], list[str | int]]:
+    keys = [stock_reservation_key(order_id), *map(stock_key, lines)]
+    args = [
+        CONFIG.order_idempotency_ttl,
+        STOCK_INVALIDATION_CHANNEL,
+        *lines.values(),
+        *lines,
+    ]
+    return keys, args
+
+
+def _release_params(
+    order_id: int, lines: dict[str, int]
+) -> tuple[list[str], list[str | int]]:
+    keys = [stock_reservation_key(order_id), *map(stock_key, lines)]
+    return keys, [STOCK_INVALIDATION_CHANNEL, *lines.values(), *lines]
+
+
+def _parse_reservation(raw: list, products: list[str]) -> StockReservation:
+    status, line, *stocks = raw
+    status = _to_str(status)
+    line = int(line)
+    stocks = [int(stock) for stock in stocks]
+    if status == ReservationStatus.RESERVED:
+        return StockReservation(
+            status=status, stock=stocks[0], stocks=dict(zip(products, stocks))
+        )
+    return StockReservation(
+        status=status,
+        stock=stocks[0] if stocks[0] >= 0 else None,
+        product=products[line - 1] if line else None,
+    )
+
+
+def _reserved(stocks: dict[str, int], products: list[str]) -> StockReservation:
+    return StockReservation(
+        status=ReservationStatus.RESERVED,
+        stock=stocks[products[0]],
+        stocks={product: stocks[product] for product in products},
+    )
+
+
+def _to_strs(values: list) -> list[str | None]:
+    return [None if value is None else _to_str(value) for value in values]
+
+
+def _next_position(index: int, cursor: int, nodes: int) -> tuple[int, int] | None:
+    """Позиция SCAN после страницы с курсором cursor на узле index"""
+    if cursor != 0:
+        return index, int(cursor)
+    if index + 1 < nodes:
+        return index + 1, 0
+    return None
+
+
+def _parse_entries(raw: list) -> list[tuple[str, dict[str, str]]]:
+    # XAUTOCLAIM отдаёт None вместо удалённых записей
+    return [
+        (_to_str(entry_id), {_to_str(k): _to_str(v) for k, v in fields.items()})
+        for entry_id, fields in raw
+        if fields is not None
+    ]
+
+
+def _parse_claim(raw: list, order_id: int) -> tuple[int, str] | None:
+    if not raw:
+        return None
+    source, value = map(_to_str, raw)
+    if source == "key":
+        claimed_order_id, claimed_task_id = value.split(":", 1)
+        return int(claimed_order_id), claimed_task_id
+    return order_id, value
+
+
 class RedisClient:
     _instance: "RedisClient" = None
 
@@ -20,22 +284,49 @@ class RedisClient:
     def __init__(self):
         self._client: Redis | None = None
         self._pool: ConnectionPool | None = None
+        # Отдельный пул без decode_responses для бинарных данных (PDF)
+        self._binary_client: Redis | None = None
+        self._binary_pool: ConnectionPool | None = None
+        # Клиенты остальных узлов (router.py): (узел, бинарный) -> клиент
+        self._node_clients: dict[tuple[RedisNode, bool], Redis] = {}
+        # Клиенты подписок (_subscriber_pool): узел -> клиент
+        self._subscribers: dict[RedisNode, Redis] = {}
+        self._reserve_stock = None
+        self._reserve_lines = None
+        self._release_lines = None
+        self._complete_order = None
+        self._claim_order = None
+        self._take_tokens = None
+        # get(), вызванные за один проход event loop: ключ -> ожидающие future
+        self._pending_reads: dict[str, list[asyncio.Future]] = {}
+        self._flush_task: asyncio.Task | None = None
 
     async def connect(self) -> None:
         if self._pool is None:
             try:
-                self._pool = ConnectionPool(
-                    host=CONFIG.redis_host,
-                    port=CONFIG.redis_port,
-                    db=0,
-                    password=None,
-                    max_connections=CONFIG.redis_max_connections,
-                    socket_timeout=CONFIG.redis_socket_timeout,
-                    decode_responses=CONFIG.redis_decode_responses,
-                    socket_keepalive=True,
-                    health_check_interval=30,
+                main = get_router().main
+                self._pool = _async_pool(main, CONFIG.redis_decode_responses)
+                self._client = AsyncInstrumentedRedis(connection_pool=self._pool)
+                self._binary_pool = _async_pool(main, decode_responses=False)
+                self._binary_client = AsyncInstrumentedRedis(
+                    connection_pool=self._binary_pool
+                )
+                self._binary_client.metrics_label = "async_binary"
+                # Скрипты вызываются на любом узле через client=
+                self._reserve_stock = self._client.register_script(
+                    scripts.RESERVE_STOCK
+                )
+                self._reserve_lines = self._client.register_script(
+                    scripts.RESERVE_LINES
+                )
+                self._release_lines = self._client.register_script(
+                    scripts.RELEASE_LINES
+                )
+                self._complete_order = self._client.register_script(
+                    scripts.COMPLETE_ORDER
                 )
-                self._client = Redis(connection_pool=self._pool)
+                self._claim_order = self._client.register_script(scripts.CLAIM_ORDER)
+                self._take_tokens = self._client.register_script(scripts.TAKE_TOKENS)
                 await self._client.ping()
                 logger.info("Redis connection opened")
             except Exception as error:
@@ -44,66 +335,173 @@ class RedisClient:
 
     @property
     def client(self) -> Redis:
+        """Клиент основного узла"""
         if self._client is None:
             raise RuntimeError(
                 "Redis client is not connected. Call await connect() first."
             )
         return self._client
 
+    def _node(self, node: RedisNode, binary: bool = False) -> Redis:
+        if node == get_router().main:
+            return self._binary_client if binary else self.client
+        client = self._node_clients.get((node, binary))
+        if client is None:
+            pool = _async_pool(node, False if binary else CONFIG.redis_decode_responses)
+            client = AsyncInstrumentedRedis(connection_pool=pool)
+            client.metrics_label = f"{'async_binary' if binary else 'async'}@{node}"
+            self._node_clients[(node, binary)] = client
+        return client
+
+    def _node_for(self, key: str) -> Redis:
+        return self._node(get_router().node_for_key(key))
+
     async def ensure_connected(self) -> None:
+        # Живость соединений проверяет сам пул (health_check_interval),
+        # недоступность Redis - брейкер в AsyncGuardedConnection
         if self._client is None:
             await self.connect()
-        try:
-            await self._client.ping()
-        except Exception:
-            logger.warning("Redis connection lost, reconnecting...")
-            await self.connect()
 
     async def get(self, key: str) -> str | bytes | None:
-        await self.ensure_connected()
-        value = await self.client.get(key)
+        if CONFIG.redis_coalesce_reads:
+            value = await self._coalesced_get(key)
+        else:
+            await self.ensure_connected()
+            value = await self._node_for(key).get(key)
         if value is None:
             return None
         if isinstance(value, bytes):
             return value.decode("utf-8")
         return value
 
-    async def set(self, key: str, value: str, ex: int | None = None) -> bool:
+    def _coalesced_get(self, key: str) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending_reads.setdefault(key, []).append(future)
+        if self._flush_task is None:
+            # Задача стартует после всех уже готовых колбэков loop, поэтому
+            # все get() текущего прохода уходят одним MGET на узел
+            self._flush_task = loop.create_task(self._flush_reads())
+        return future
+
+    async def _flush_reads(self) -> None:
+        pending, self._pending_reads = self._pending_reads, {}
+        self._flush_task = None
+        keys = list(pending)
+        try:
+            await self.ensure_connected()
+            groups = get_router().group(keys)
+            chunks = await asyncio.gather(
+                *(
+                    self._read_node(self._node(node), [keys[i] for i in indexes])
+                    for node, indexes in groups.items()
+                )
+            )
+            values = _scatter(groups, chunks, len(keys))
+        except Exception as error:
+            for futures in pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(error)
+            return
+        for key, value in zip(keys, values):
+            for future in pending[key]:
+                if not future.done():
+                    future.set_result(value)
+
+    @staticmethod
+    async def _read_node(client: Redis, keys: list[str]) -> list:
+        batch = CONFIG.redis_coalesce_max_batch
+        if len(keys) == 1:
+            return [await client.get(keys[0])]
+        if len(keys) <= batch:
+            return await client.mget(keys)
+        async with client.pipeline(transaction=False) as pipe:
+            for start in range(0, len(keys), batch):
+                pipe.mget(keys[start : start + batch])
+            return [value for chunk in await pipe.execute() for value in chunk]
+
+    @asynccontextmanager
+    async def pipeline(self, transaction: bool = False) -> AsyncIterator[Pipeline]:
+        """
+        Явный pipeline основного узла (или MULTI/EXEC при transaction=True):
+        команды копятся и уходят одним round trip в await pipe.execute()
+        """
         await self.ensure_connected()
-        return await self.client.set(key, value, ex=ex)
+        async with self.client.pipeline(transaction=transaction) as pipe:
+            yield pipe
+
+    async def set(
+        self, key: str, value: str, ex: int | None = None, nx: bool = False
+    ) -> bool:
+        await self.ensure_connected()
+        return await self._node_for(key).set(key, value, ex=ex, nx=nx)
 
     async def delete(self, *keys: str) -> int:
         await self.ensure_connected()
-        return await self.client.delete(*keys)
+        groups = get_router().group(keys)
+        counts = await asyncio.gather(
+            *(
+                self._node(node).delete(*(keys[i] for i in indexes))
+                for node, indexes in groups.items()
+            )
+        )
+        return sum(counts)
 
     async def exists(self, *keys: str) -> int:
         await self.ensure_connected()
-        return await self.client.exists(*keys)
+        groups = get_router().group(keys)
+        counts = await asyncio.gather(
+            *(
+                self._node(node).exists(*(keys[i] for i in indexes))
+                for node, indexes in groups.items()
+            )
+        )
+        return sum(counts)
 
     async def hget(self, name: str, key: str) -> str | None:
         await self.ensure_connected()
-        value = await self.client.hget(name, key)
+        value = await self._node_for(name).hget(name, key)
         if isinstance(value, bytes):
             return value.decode("utf-8")
         return value
 
     async def hset(self, name: str, key: str, value: str) -> int:
         await self.ensure_connected()
-        return await self.client.hset(name, key, value)
+        return await self._node_for(name).hset(name, key, value)
 
     async def hgetall(self, name: str) -> dict[str, any]:
         await self.ensure_connected()
-        return await self.client.hgetall(name)
+        return await self._node_for(name).hgetall(name)
+
+    async def pubsub(self, node: RedisNode | None = None) -> PubSub:
+        """
+        Подписка на узле node, по умолчанию - на основном. Разрыв соединения
+        не скрывается переподключением: listen() бросает исключение, и
+        подписчик сам решает, что делать с сообщениями, пропущенными в разрыве.
+        """
+        await self.ensure_connected()
+        if node is None:
+            node = get_router().main
+        client = self._subscribers.get(node)
+        if client is None:
+            client = AsyncInstrumentedRedis(connection_pool=_subscriber_pool(node))
+            client.metrics_label = f"subscriber@{node}"
+            self._subscribers[node] = client
+        return client.pubsub(ignore_subscribe_messages=True)
 
     async def keys(self, pattern: str) -> list[str]:
         await self.ensure_connected()
-        keys = await self.client.keys(pattern)
+        keys = []
+        for node in get_router().nodes_for_pattern(pattern):
+            keys += await self._node(node).keys(pattern)
         return [k if isinstance(k, str) else k.decode() for k in keys]
 
     async def scan_iter(self, pattern: str, count: int = 100):
         await self.ensure_connected()
-        async for key in self.client.scan_iter(match=pattern, count=count):
-            yield key if isinstance(key, str) else key.decode()
+        for node in get_router().nodes_for_pattern(pattern):
+            async for key in self._node(node).scan_iter(match=pattern, count=count):
+                yield key if isinstance(key, str) else key.decode()
 
     async def scan_keys(self, pattern: str, count: int = 100) -> list[str]:
         results: list[str] = []
@@ -111,15 +509,342 @@ class RedisClient:
             results.append(key)
         return results
 
+    async def mget(self, *keys: str) -> list[str | bytes | None]:
+        await self.ensure_connected()
+        groups = get_router().group(keys)
+        if len(groups) == 1:
+            return await self._node(next(iter(groups))).mget(keys)
+        chunks = await asyncio.gather(
+            *(
+                self._node(node).mget([keys[i] for i in indexes])
+                for node, indexes in groups.items()
+            )
+        )
+        return _scatter(groups, chunks, len(keys))
+
+    async def order_statuses(self, order_ids: list[int]) -> list[str | None]:
+        """Статусы заказов из их hash: pipeline HGET на узел заказов"""
+        await self.ensure_connected()
+        keys = [order_key(order_id) for order_id in order_ids]
+        groups = get_router().group(keys)
+
+        async def read_node(node: RedisNode, indexes: list[int]) -> list:
+            async with self._node(node).pipeline(transaction=False) as pipe:
+                for index in indexes:
+                    pipe.hget(keys[index], "status")
+                return await pipe.execute()
+
+        chunks = await asyncio.gather(
+            *(read_node(node, indexes) for node, indexes in groups.items())
+        )
+        return _scatter(groups, chunks, len(keys))
+
+    async def mset(self, mapping: dict[str, str | bytes]) -> bool:
+        await self.ensure_connected()
+        keys = list(mapping)
+        results = await asyncio.gather(
+            *(
+                self._node(node).mset({keys[i]: mapping[keys[i]] for i in indexes})
+                for node, indexes in get_router().group(keys).items()
+            )
+        )
+        return all(results)
+
+    async def scan_mget(self, pattern: str, count: int = 100):
+        """Потоково отдаёт пары (ключ, значение) пачками: SCAN -> MGET по узлам"""
+        await self.ensure_connected()
+        for node in get_router().nodes_for_pattern(pattern):
+            client = self._node(node)
+            cursor = 0
+            while True:
+                cursor, keys = await client.scan(cursor, match=pattern, count=count)
+                if keys:
+                    values = await client.mget(keys)
+                    yield [
+                        (_to_str(key), None if value is None else _to_str(value))
+                        for key, value in zip(keys, values)
+                    ]
+                if cursor == 0:
+                    break
+
+    async def claim_order(
+        self, order_id: int, task_id: str, key: str | None = None
+    ) -> tuple[int, str] | None:
+        """
+        Атомарная заявка на приём заказа. None - заявка создана, иначе
+        (order_id, task_id) ранее принятого заказа
+        """
+        await self.ensure_connected()
+        router = get_router()
+        order_client = self._node(router.order_node(order_id))
+        args = [task_id, CONFIG.order_idempotency_ttl, order_id]
+        keys = [order_claim_key(order_id)]
+        if key is None or router.node_for_key(idempotency_key(key)) == (
+            router.order_node(order_id)
+        ):
+            if key is not None:
+                keys.append(idempotency_key(key))
+            raw = await self._claim_order(keys=keys, args=args, client=order_client)
+            return _parse_claim(raw, order_id)
+
+        # Ключ идемпотентности на другом узле: сначала заявка на ключ (его
+        # повтор не доходит до узла заказа), затем на заказ
+        key_client = self._node_for(idempotency_key(key))
+        claim = f"{order_id}:{task_id}"
+        raw = await self._claim_order(
+            keys=[idempotency_key(key)],
+            args=[claim, CONFIG.order_idempotency_ttl, order_id],
+            client=key_client,
+        )
+        if raw:
+            return _parse_claim(["key", raw[1]], order_id)
+        raw = await self._claim_order(keys=keys, args=args, client=order_client)
+        claimed = _parse_claim(raw, order_id)
+        if claimed is not None:
+            # Заказ принят раньше без этого ключа: ключ ведёт на исходную задачу
+            await key_client.set(
+                idempotency_key(key),
+                f"{order_id}:{claimed[1]}",
+                ex=CONFIG.order_idempotency_ttl,
+            )
+        return claimed
+
+    async def claim_orders(self, task_ids: dict[int, str]) -> dict[int, str]:
+        """
+        Заявки на пакет заказов одним pipeline на узел: order_id -> task_id
+        для заказов, которые уже были приняты раньше
+        """
+        await self.ensure_connected()
+        groups: dict[RedisNode, list[int]] = {}
+        for order_id in task_ids:
+            groups.setdefault(get_router().order_node(order_id), []).append(order_id)
+
+        async def claim_node(node: RedisNode, order_ids: list[int]) -> list:
+            async with self._node(node).pipeline(transaction=False) as pipe:
+                for order_id in order_ids:
+                    await self._claim_order(
+                        keys=[order_claim_key(order_id)],
+                        args=[
+                            task_ids[order_id],
+                            CONFIG.order_idempotency_ttl,
+                            order_id,
+                        ],
+                        client=pipe,
+                    )
+                return list(zip(order_ids, await pipe.execute()))
+
+        results = await asyncio.gather(
+            *(claim_node(*group) for group in groups.items())
+        )
+        return {
+            order_id: _to_str(raw[1])
+            for node_results in results
+            for order_id, raw in node_results
+            if raw
+        }
+
+    async def release_order_claim(self, order_id: int, key: str | None = None) -> None:
+        keys = [order_claim_key(order_id)]
+        if key is not None:
+            keys.append(idempotency_key(key))
+        await self.delete(*keys)
+
+    async def add_pending_orders(self, payloads: dict[int, str]) -> None:
+        """Запись заказов в индекс ожидающих (на узле каждого заказа) вместе с payload"""
+        await self.ensure_connected()
+        enqueued_at = time.time()
+        groups: dict[RedisNode, dict[int, str]] = {}
+        for order_id, payload in payloads.items():
+            node = get_router().order_node(order_id)
+            groups.setdefault(node, {})[order_id] = payload
+
+        async def add_node(node: RedisNode, node_payloads: dict[int, str]) -> None:
+            async with self._node(node).pipeline(transaction=False) as pipe:
+                pipe.zadd(
+                    PENDING_ORDERS_KEY,
+                    {order_id: enqueued_at for order_id in node_payloads},
+                )
+                pipe.hset(PENDING_ORDERS_PAYLOAD_KEY, mapping=node_payloads)
+                await pipe.execute()
+
+        await asyncio.gather(*(add_node(*group) for group in groups.items()))
+
+    async def remove_pending_orders(self, order_ids: list[int]) -> None:
+        """Удаление заказов из индекса ожидающих, одним pipeline на узел заказов"""
+        await self.ensure_connected()
+        groups: dict[RedisNode, list[int]] = {}
+        for order_id in order_ids:
+            groups.setdefault(get_router().order_node(order_id), []).append(order_id)
+
+        async def remove_node(node: RedisNode, node_ids: list[int]) -> None:
+            async with self._node(node).pipeline(transaction=False) as pipe:
+                pipe.zrem(PENDING_ORDERS_KEY, *node_ids)
+                pipe.hdel(PENDING_ORDERS_PAYLOAD_KEY, *node_ids)
+                await pipe.execute()
+
+        await asyncio.gather(*(remove_node(*group) for group in groups.items()))
+
+    async def add_order_entries(self, entries: dict[int, dict[str, str]]) -> None:
+        """XADD заказов в поток узла каждого заказа, одним pipeline на узел"""
+        await self.ensure_connected()
+        groups: dict[RedisNode, list[int]] = {}
+        for order_id in entries:
+            groups.setdefault(get_router().order_node(order_id), []).append(order_id)
+
+        async def add_node(node: RedisNode, order_ids: list[int]) -> None:
+            async with self._node(node).pipeline(transaction=False) as pipe:
+                for order_id in order_ids:
+                    pipe.xadd(ORDER_STREAM_KEY, entries[order_id])
+                await pipe.execute()
+
+        await asyncio.gather(*(add_node(*group) for group in groups.items()))
+
+    async def order_stream_length(self) -> int:
+        """Необработанные записи потоков заказов всех узлов"""
+        await self.ensure_connected()
+        lengths = await asyncio.gather(
+            *(
+                self._node(node).xlen(ORDER_STREAM_KEY)
+                for node in get_router().nodes(KeyClass.ORDER)
+            )
+        )
+        return sum(lengths)
+
+    async def take_tokens(
+        self, client: str, rate: float, burst: int, cost: int = 1
+    ) -> int:
+        """
+        Списание cost токенов из бакета клиента (TAKE_TOKENS): 0, если
+        допущен, иначе через сколько миллисекунд повторить
+        """
+        await self.ensure_connected()
+        key = rate_limit_key(client)
+        return int(
+            await self._take_tokens(
+                keys=[key], args=[rate, burst, cost], client=self._node_for(key)
+            )
+        )
+
+    async def get_invoice_meta(self, order_id: int) -> InvoiceMeta | None:
+        """Метаданные инвойса и длина хранимых байтов за один round trip"""
+        await self.ensure_connected()
+        client = self._node(get_router().invoice_node(order_id))
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.hgetall(invoice_meta_key(order_id))
+            pipe.strlen(invoice_key(order_id))
+            meta, length = await pipe.execute()
+        if not length:
+            return None
+        # Инвойсы, сохранённые до появления метаданных, отдаются как есть
+        return InvoiceMeta(length=length, **meta)
+
+    async def iter_invoice(
+        self, order_id: int, start: int, end: int, chunk_size: int
+    ) -> AsyncIterator[bytes]:
+        """Байты инвойса [start, end] кусками через GETRANGE"""
+        await self.ensure_connected()
+        client = self._node(get_router().invoice_node(order_id), binary=True)
+        key = invoice_key(order_id)
+        while start <= end:
+            chunk_end = min(start + chunk_size, end + 1) - 1
+            chunk = await client.getrange(key, start, chunk_end)
+            if not chunk:
+                break
+            yield chunk
+            start += len(chunk)
+
+    async def reserve_stock(
+        self, order_id: int, items: list[dict], record: dict | None = None
+    ) -> StockReservation:
+        """
+        Проверка дубля, списание остатков всех строк {product, quantity}
+        (все или ни одной) и запись hash заказа одним вызовом; record -
+        остальные поля hash (email, task_id)
+        """
+        await self.ensure_connected()
+        totals = _merge_lines(items)
+        if not _colocated(order_id, totals):
+            return await self._reserve_across_nodes(order_id, items, record)
+        keys, args = _reservation_params(order_id, items, record)
+        client = self._node(get_router().order_node(order_id))
+        raw = await self._reserve_stock(keys=keys, args=args, client=client)
+        return _parse_reservation(raw, list(totals))
+
+    async def _reserve_across_nodes(
+        self, order_id: int, items: list[dict], record: dict | None = None
+    ) -> StockReservation:
+        """См. SyncRedisClient._reserve_across_nodes"""
+        order_client = self._node(get_router().order_node(order_id))
+        order_keys = _order_keys(order_id)
+        drop_args = _completion_args(order_id)
+        if await order_client.exists(order_key(order_id)):
+            await self._complete_order(
+                keys=order_keys, args=drop_args, client=order_client
+            )
+            return StockReservation(status=ReservationStatus.DUPLICATE)
+
+        totals = _merge_lines(items)
+        reserved: list[tuple[RedisNode, dict[str, int]]] = []
+        stocks: dict[str, int] = {}
+        for node, lines in _stock_groups(totals).items():
+            keys, args = _lines_params(order_id, lines)
+            raw = await self._reserve_lines(
+                keys=keys, args=args, client=self._node(node)
+            )
+            reservation = _parse_reservation(raw, list(lines))
+            if reservation.status != ReservationStatus.RESERVED:
+                for reserved_node, reserved_lines in reserved:
+                    keys, args = _release_params(order_id, reserved_lines)
+                    await self._release_lines(
+                        keys=keys, args=args, client=self._node(reserved_node)
+                    )
+                await self._complete_order(
+                    keys=order_keys, args=drop_args, client=order_client
+                )
+                return reservation
+            reserved.append((node, lines))
+            stocks.update(reservation.stocks)
+
+        if not await self._complete_order(
+            keys=order_keys,
+            args=_completion_args(order_id, items, record),
+            client=order_client,
+        ):
+            return StockReservation(status=ReservationStatus.DUPLICATE)
+        return _reserved(stocks, list(totals))
+
+    async def set_stock(self, product: str, quantity: int) -> None:
+        """Запись остатка вместе с инвалидацией кэшей остатков в процессах API"""
+        await self.ensure_connected()
+        client = self._node(get_router().stock_node(product))
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.set(stock_key(product), quantity)
+            pipe.publish(STOCK_INVALIDATION_CHANNEL, product)
+            await pipe.execute()
+
     async def close(self) -> None:
-        if self._client:
-            try:
-                await self._client.close()
-            except Exception:
-                pass
+        clients = [
+            self._client,
+            self._binary_client,
+            *self._node_clients.values(),
+            *self._subscribers.values(),
+        ]
+        for client in clients:
+            if client:
+                try:
+                    await client.close()
+                except Exception:
+                    pass
         if self._pool:
             try:
                 await self._pool.disconnect(inuse_connections=True)
+                if self._binary_pool:
+                    await self._binary_pool.disconnect(inuse_connections=True)
+                for client in [
+                    *self._node_clients.values(),
+                    *self._subscribers.values(),
+                ]:
+                    await client.connection_pool.disconnect(inuse_connections=True)
                 logger.info("Redis connection closed")
             except Exception as e:
                 logger.exception(f"Error closing Redis connection: {e}")
@@ -128,6 +853,8 @@ class RedisClient:
 
 class SyncRedisClient:
     _instances: dict[int, "SyncRedisClient"] = {}
+    # Задач, одновременно выполняемых одним процессом (см. configure_pool)
+    tasks_per_process: int | None = None
 
     def __new__(cls, db: int):
         if db not in cls._instances:
@@ -139,86 +866,568 @@ class SyncRedisClient:
         self.db = db
         self._client: redis_sync.Redis | None = None
         self._pool: redis_sync.ConnectionPool | None = None
+        # Клиенты остальных узлов (router.py), создаются при первом обращении
+        self._node_clients: dict[RedisNode, redis_sync.Redis] = {}
+        self._reserve_stock = None
+        self._reserve_lines = None
+        self._release_lines = None
+        self._complete_order = None
+        self._claim_pending_orders = None
+        self._buffer_notification = None
+        self._claim_digests = None
+        self._ack_digests = None
+
+    @classmethod
+    def configure_pool(cls, tasks_per_process: int) -> None:
+        """
+        Размер пулов по конкурентности воркера: prefork-процесс выполняет одну
+        задачу за раз, threads/gevent - concurrency задач в одном процессе
+        """
+        cls.tasks_per_process = tasks_per_process
+
+    @classmethod
+    def pool_size(cls) -> int:
+        if cls.tasks_per_process is None:
+            return CONFIG.redis_max_connections
+        return cls.tasks_per_process * CONFIG.redis_connections_per_task
+
+    @property
+    def main_node(self) -> RedisNode:
+        return RedisNode(CONFIG.redis_host, CONFIG.redis_port, self.db)
+
+    def _reset(self) -> None:
+        # Пулы родителя после fork не закрываем: их сокеты принадлежат родителю
+        self._client = None
+        self._pool = None
+        self._node_clients = {}
 
     def connect(self) -> None:
         if self._pool is None:
-            self._pool = redis_sync.ConnectionPool(
-                host=CONFIG.redis_host,
-                port=CONFIG.redis_port,
-                db=self.db,
-                password=None,
-                max_connections=CONFIG.redis_max_connections,
-                socket_timeout=CONFIG.redis_socket_timeout,
-                decode_responses=CONFIG.redis_decode_responses,
-                socket_keepalive=True,
-                health_check_interval=30,
-            )
-            self._client = redis_sync.Redis(connection_pool=self._pool)
+            self._pool = _sync_pool(self.main_node, self.pool_size())
+            self._client = InstrumentedRedis(connection_pool=self._pool)
+            self._client.metrics_label = f"sync_db{self.db}"
+            # Скрипты вызываются на любом узле через client=
+            self._reserve_stock = self._client.register_script(scripts.RESERVE_STOCK)
+            self._reserve_lines = self._client.register_script(scripts.RESERVE_LINES)
+            self._release_lines = self._client.register_script(scripts.RELEASE_LINES)
+            self._complete_order = self._client.register_script(scripts.COMPLETE_ORDER)
+            self._claim_pending_orders = self._client.register_script(
+                scripts.CLAIM_PENDING_ORDERS
+            )
+            self._buffer_notification = self._client.register_script(
+                scripts.BUFFER_NOTIFICATION
+            )
+            self._claim_digests = self._client.register_script(scripts.CLAIM_DIGESTS)
+            self._ack_digests = self._client.register_script(scripts.ACK_DIGESTS)
             self._client.ping()
             logger.info(f"Sync Redis connection opened for db={self.db}")
 
     @property
     def client(self) -> redis_sync.Redis:
+        """Клиент основного узла"""
         if self._client is None:
             raise RuntimeError("Redis client is not connected. Call connect() first.")
         return self._client
 
+    def _node(self, node: RedisNode) -> redis_sync.Redis:
+        if node == self.main_node:
+            return self.client
+        client = self._node_clients.get(node)
+        if client is None:
+            client = InstrumentedRedis(
+                connection_pool=_sync_pool(node, self.pool_size())
+            )
+            client.metrics_label = f"sync@{node}"
+            self._node_clients[node] = client
+        return client
+
+    def _node_for(self, key: str) -> redis_sync.Redis:
+        return self._node(get_router().node_for_key(key))
+
     def ensure_connected(self) -> None:
         if self._client is None:
             self.connect()
-        else:
-            try:
-                self._client.ping()
-            except Exception:
-                logger.warning(
-                    f"Sync Redis connection lost for db={self.db}, reconnecting..."
-                )
-                self.connect()
 
     # Методы совместимы по именам с async-версией, но синхронные
     def get(self, key: str):
         self.ensure_connected()
-        return self.client.get(key)
+        return self._node_for(key).get(key)
 
-    def set(self, key: str, value: str, ex: int | None = None) -> bool:
+    def set(
+        self, key: str, value: str, ex: int | None = None, nx: bool = False
+    ) -> bool:
         self.ensure_connected()
-        return self.client.set(key, value, ex=ex)
+        return self._node_for(key).set(key, value, ex=ex, nx=nx)
 
     def delete(self, *keys: str) -> int:
         self.ensure_connected()
-        return self.client.delete(*keys)
+        return sum(
+            self._node(node).delete(*(keys[i] for i in indexes))
+            for node, indexes in get_router().group(keys).items()
+        )
 
     def exists(self, *keys: str) -> int:
         self.ensure_connected()
-        return self.client.exists(*keys)
+        return sum(
+            self._node(node).exists(*(keys[i] for i in indexes))
+            for node, indexes in get_router().group(keys).items()
+        )
 
     def hget(self, name: str, key: str):
         self.ensure_connected()
-        return self.client.hget(name, key)
+        return self._node_for(name).hget(name, key)
 
     def hset(self, name: str, key: str, value: str) -> int:
         self.ensure_connected()
-        return self.client.hset(name, key, value)
+        return self._node_for(name).hset(name, key, value)
 
     def hgetall(self, name: str) -> dict[str, str]:
         self.ensure_connected()
-        return self.client.hgetall(name)
+        return self._node_for(name).hgetall(name)
+
+    def publish(self, channel: str, message: str, counter: str | None = None) -> int:
+        """counter - счётчик основного узла, увеличивается тем же round trip"""
+        self.ensure_connected()
+        if counter is None:
+            return self.client.publish(channel, message)
+        with self.client.pipeline(transaction=False) as pipe:
+            pipe.publish(channel, message)
+            pipe.incr(counter)
+            return pipe.execute()[0]
 
     def keys(self, pattern: str) -> list[str]:
         self.ensure_connected()
-        keys = self.client.keys(pattern)
+        keys = []
+        for node in get_router().nodes_for_pattern(pattern):
+            keys += self._node(node).keys(pattern)
         return [k if isinstance(k, str) else k.decode() for k in keys]
 
+    def scan_iter(self, pattern: str, count: int = 100):
+        self.ensure_connected()
+        for node in get_router().nodes_for_pattern(pattern):
+            for key in self._node(node).scan_iter(match=pattern, count=count):
+                yield key if isinstance(key, str) else key.decode()
+
+    def mget(self, *keys: str) -> list:
+        self.ensure_connected()
+        groups = get_router().group(keys)
+        if len(groups) == 1:
+            return self._node(next(iter(groups))).mget(keys)
+        chunks = [
+            self._node(node).mget([keys[i] for i in indexes])
+            for node, indexes in groups.items()
+        ]
+        return _scatter(groups, chunks, len(keys))
+
+    def _order_field(self, order_ids: list[int], field: str) -> list[str | None]:
+        """Поле hash заказов: pipeline HGET на узел заказов"""
+        self.ensure_connected()
+        keys = [order_key(order_id) for order_id in order_ids]
+        groups = get_router().group(keys)
+        chunks = []
+        for node, indexes in groups.items():
+            with self._node(node).pipeline(transaction=False) as pipe:
+                for index in indexes:
+                    pipe.hget(keys[index], field)
+                chunks.append(_to_strs(pipe.execute()))
+        return _scatter(groups, chunks, len(keys))
+
+    def order_statuses(self, order_ids: list[int]) -> list[str | None]:
+        """Статусы заказов из их hash"""
+        return self._order_field(order_ids, "status")
+
+    def order_task_ids(self, order_ids: list[int]) -> list[str | None]:
+        """task_id, под которым заказ был зарезервирован"""
+        return self._order_field(order_ids, "task_id")
+
+    def mset(self, mapping: dict[str, str | bytes]) -> bool:
+        self.ensure_connected()
+        keys = list(mapping)
+        return all(
+            self._node(node).mset({keys[i]: mapping[keys[i]] for i in indexes})
+            for node, indexes in get_router().group(keys).items()
+        )
+
+    def scan_mget(self, pattern: str, count: int = 100):
+        """Потоково отдаёт пары (ключ, значение) пачками: SCAN -> MGET по узлам"""
+        self.ensure_connected()
+        for node in get_router().nodes_for_pattern(pattern):
+            client = self._node(node)
+            cursor = 0
+            while True:
+                cursor, keys = client.scan(cursor, match=pattern, count=count)
+                if keys:
+                    values = client.mget(keys)
+                    yield [
+                        (_to_str(key), None if value is None else _to_str(value))
+                        for key, value in zip(keys, values)
+                    ]
+                if cursor == 0:
+                    break
+
+    def scan_pages(
+        self,
+        pattern: str,
+        count: int = 100,
+        start: tuple[int, int] = (0, 0),
+        fields: list[str] | None = None,
+    ) -> Iterator[tuple[tuple[int, int] | None, list[str], list]]:
+        """
+        Страницы SCAN по узлам шаблона с позиции start (номер узла, курсор):
+        (позиция продолжения или None в конце, ключи, значения ключей).
+        Значения - MGET страницы или, если заданы fields, HMGET полей каждого
+        hash (SCAN ... TYPE hash); читаются в одном pipeline со SCAN следующей
+        страницы
+        """
+        self.ensure_connected()
+        scan_type = None if fields is None else "hash"
+        nodes = get_router().nodes_for_pattern(pattern)
+        index, cursor = start
+        while index < len(nodes):
+            client = self._node(nodes[index])
+            cursor, keys = client.scan(
+                cursor, match=pattern, count=count, _type=scan_type
+            )
+            while True:
+                with client.pipeline(transaction=False) as pipe:
+                    if keys and fields is None:
+                        pipe.mget(keys)
+                    elif keys:
+                        for key in keys:
+                            pipe.hmget(key, fields)
+                    if cursor != 0:
+                        pipe.scan(cursor, match=pattern, count=count, _type=scan_type)
+                    replies = pipe.execute() if len(pipe) else []
+                if keys:
+                    if fields is None:
+                        values = _to_strs(replies.pop(0))
+                    else:
+                        values = [_to_strs(replies.pop(0)) for _ in keys]
+                    yield (
+                        _next_position(index, cursor, len(nodes)),
+                        [_to_str(key) for key in keys],
+                        values,
+                    )
+                if cursor == 0:
+                    break
+                cursor, keys = replies[0]
+            index, cursor = index + 1, 0
+
+    def save_invoices(self, invoices: dict[int, bytes]) -> None:
+        """Запись PDF и их метаданных одной транзакцией на узел инвойсов"""
+        self.ensure_connected()
+        groups: dict[RedisNode, list[int]] = {}
+        for order_id in invoices:
+            groups.setdefault(get_router().invoice_node(order_id), []).append(order_id)
+        for node, order_ids in groups.items():
+            with self._node(node).pipeline(transaction=True) as pipe:
+                for order_id in order_ids:
+                    payload, meta = _pack_invoice(
+                        invoices[order_id], CONFIG.invoice_compression
+                    )
+                    pipe.set(invoice_key(order_id), payload)
+                    pipe.hset(invoice_meta_key(order_id), mapping=meta)
+                    if CONFIG.invoice_retention_ttl:
+                        pipe.expire(invoice_key(order_id), CONFIG.invoice_retention_ttl)
+                        pipe.expire(
+                            invoice_meta_key(order_id), CONFIG.invoice_retention_ttl
+                        )
+                pipe.execute()
+
+    def reserve_stock(
+        self, order_id: int, items: list[dict], record: dict | None = None
+    ) -> StockReservation:
+        """
+        Проверка дубля, списание остатков всех строк {product, quantity}
+        (все или ни одной) и запись hash заказа одним вызовом; record -
+        остальные поля hash (email, task_id)
+        """
+        self.ensure_connected()
+        totals = _merge_lines(items)
+        if not _colocated(order_id, totals):
+            return self._reserve_across_nodes(order_id, items, record)
+        keys, args = _reservation_params(order_id, items, record)
+        client = self._node(get_router().order_node(order_id))
+        raw = self._reserve_stock(keys=keys, args=args, client=client)
+        return _parse_reservation(raw, list(totals))
+
+    def reserve_stocks(
+        self, orders: list[tuple[int, list[dict], dict | None]]
+    ) -> list[StockReservation]:
+        """
+        reserve_stock для пачки заказов (order_id, строки, record): RESERVE_STOCK
+        заказов с ключами на одном узле уходят одним pipeline на узел
+        """
+        self.ensure_connected()
+        reservations: list[StockReservation | None] = [None] * len(orders)
+        groups: dict[RedisNode, list[int]] = {}
+        for index, (order_id, items, record) in enumerate(orders):
+            if _colocated(order_id, _merge_lines(items)):
+                node = get_router().order_node(order_id)
+                groups.setdefault(node, []).append(index)
+            else:
+                reservations[index] = self._reserve_across_nodes(
+                    order_id, items, record
+                )
+
+        for node, indexes in groups.items():
+            with self._node(node).pipeline(transaction=False) as pipe:
+                for index in indexes:
+                    keys, args = _reservation_params(*orders[index])
+                    self._reserve_stock(keys=keys, args=args, client=pipe)
+                raws = pipe.execute()
+            for index, raw in zip(indexes, raws):
+                products = list(_merge_lines(orders[index][1]))
+                reservations[index] = _parse_reservation(raw, products)
+        return reservations
+
+    def _reserve_across_nodes(
+        self, order_id: int, items: list[dict], record: dict | None = None
+    ) -> StockReservation:
+        """
+        Остатки и состояние заказа на разных узлах: резерв на каждом узле
+        остатков с отметкой заказа, при отказе любого узла - возврат уже
+        сделанных резервов, затем статус на узле заказа. Задача, упавшая
+        посередине, повторяется из индекса ожидающих заказов: отметки не дают
+        списать остатки дважды
+        """
+        order_client = self._node(get_router().order_node(order_id))
+        order_keys = _order_keys(order_id)
+        drop_args = _completion_args(order_id)
+        if order_client.exists(order_key(order_id)):
+            self._complete_order(keys=order_keys, args=drop_args, client=order_client)
+            return StockReservation(status=ReservationStatus.DUPLICATE)
+
+        totals = _merge_lines(items)
+        reserved: list[tuple[RedisNode, dict[str, int]]] = []
+        stocks: dict[str, int] = {}
+        for node, lines in _stock_groups(totals).items():
+            keys, args = _lines_params(order_id, lines)
+            raw = self._reserve_lines(keys=keys, args=args, client=self._node(node))
+            reservation = _parse_reservation(raw, list(lines))
+            if reservation.status != ReservationStatus.RESERVED:
+                for reserved_node, reserved_lines in reserved:
+                    keys, args = _release_params(order_id, reserved_lines)
+                    self._release_lines(
+                        keys=keys, args=args, client=self._node(reserved_node)
+                    )
+                self._complete_order(
+                    keys=order_keys, args=drop_args, client=order_client
+                )
+                return reservation
+            reserved.append((node, lines))
+            stocks.update(reservation.stocks)
+
+        if not self._complete_order(
+            keys=order_keys,
+            args=_completion_args(order_id, items, record),
+            client=order_client,
+        ):
+            return StockReservation(status=ReservationStatus.DUPLICATE)
+        return _reserved(stocks, list(totals))
+
+    def claim_pending_orders(
+        self, older_than: float, limit: int
+    ) -> list[tuple[str, str]]:
+        """
+        Заказы, поставленные в очередь раньше older_than, в виде (id, payload):
+        не больше limit со всех узлов заказов
+        """
+        self.ensure_connected()
+        claimed: list[tuple[str, str]] = []
+        for node in get_router().nodes(KeyClass.ORDER):
+            if len(claimed) >= limit:
+                break
+            raw = self._claim_pending_orders(
+                keys=[PENDING_ORDERS_KEY, PENDING_ORDERS_PAYLOAD_KEY],
+                args=[older_than, limit - len(claimed), max(time.time(), older_than)],
+                client=self._node(node),
+            )
+            claimed += [
+                (_to_str(order_id), _to_str(payload))
+                for order_id, payload in zip(raw[::2], raw[1::2])
+            ]
+        return claimed
+
+    def remove_pending_orders(self, order_ids: list[int]) -> None:
+        """Удаление заказов из индекса ожидающих, одним pipeline на узел заказов"""
+        self.ensure_connected()
+        groups: dict[RedisNode, list[int]] = {}
+        for order_id in order_ids:
+            groups.setdefault(get_router().order_node(order_id), []).append(order_id)
+        for node, node_ids in groups.items():
+            with self._node(node).pipeline(transaction=False) as pipe:
+                pipe.zrem(PENDING_ORDERS_KEY, *node_ids)
+                pipe.hdel(PENDING_ORDERS_PAYLOAD_KEY, *node_ids)
+                pipe.execute()
+
+    def create_order_stream_group(self, node: RedisNode) -> None:
+        """Группа читателей потока заказов узла (создаётся вместе с потоком)"""
+        self.ensure_connected()
+        try:
+            self._node(node).xgroup_create(
+                ORDER_STREAM_KEY, CONFIG.order_stream_group, id="0", mkstream=True
+            )
+        except redis_sync.ResponseError as error:
+            if "BUSYGROUP" not in str(error):
+                raise
+
+    def read_order_stream(
+        self, node: RedisNode, consumer: str, count: int, block: int
+    ) -> list[tuple[str, dict[str, str]]]:
+        """Новые записи потока заказов узла: (id, поля), ждёт до block мс"""
+        self.ensure_connected()
+        raw = self._node(node).xreadgroup(
+            CONFIG.order_stream_group,
+            consumer,
+            {ORDER_STREAM_KEY: ">"},
+            count=count,
+            block=block,
+        )
+        return _parse_entries(raw[0][1]) if raw else []
+
+    def claim_stalled_orders(
+        self, node: RedisNode, consumer: str, min_idle: int, start: str, count: int
+    ) -> tuple[str, list[tuple[str, dict[str, str]]]]:
+        """
+        XAUTOCLAIM записей, не подтверждённых дольше min_idle мс: курсор
+        следующего вызова ("0-0" - проход окончен) и записи
+        """
+        self.ensure_connected()
+        cursor, entries, *_ = self._node(node).xautoclaim(
+            ORDER_STREAM_KEY,
+            CONFIG.order_stream_group,
+            consumer,
+            min_idle,
+            start,
+            count=count,
+        )
+        return _to_str(cursor), _parse_entries(entries)
+
+    def ack_order_entries(self, node: RedisNode, entry_ids: list[str]) -> None:
+        """Подтверждение и удаление записей: в потоке остаются только необработанные"""
+        self.ensure_connected()
+        with self._node(node).pipeline(transaction=False) as pipe:
+            pipe.xack(ORDER_STREAM_KEY, CONFIG.order_stream_group, *entry_ids)
+            pipe.xdel(ORDER_STREAM_KEY, *entry_ids)
+            pipe.execute()
+
+    def save_order_results(self, results: dict[str, tuple[str, str]], ttl: int) -> None:
+        """
+        Результаты заказов конвейера stream в формате метаданных Celery
+        (task_id -> (состояние, JSON)): запись по узлам результатов, затем
+        публикация состояний и счётчик обработанных заказов одним pipeline
+        """
+        self.ensure_connected()
+        task_ids = list(results)
+        keys = [f"celery-task-meta-{task_id}" for task_id in task_ids]
+        for node, indexes in get_router().group(keys).items():
+            with self._node(node).pipeline(transaction=False) as pipe:
+                for index in indexes:
+                    pipe.set(keys[index], results[task_ids[index]][1], ex=ttl)
+                pipe.execute()
+        with self.client.pipeline(transaction=False) as pipe:
+            for task_id, (state, _) in results.items():
+                pipe.publish(
+                    TASK_STATUS_CHANNEL,
+                    json.dumps({"task_id": task_id, "status": state}),
+                )
+            pipe.incrby(ORDERS_PROCESSED_KEY, len(results))
+            pipe.execute()
+
+    def buffer_notification(self, email: str, message: str, window: int) -> None:
+        """Добавление сообщения в дайджест получателя"""
+        self.ensure_connected()
+        self._buffer_notification(
+            keys=[
+                notification_digest_key(email),
+                NOTIFICATION_DIGESTS_DUE_KEY,
+                NOTIFICATION_STATS_KEY,
+            ],
+            args=[email, message, time.time() + window],
+        )
+
+    def claim_digests(self, limit: int, lease: int) -> list[tuple[str, list[str]]]:
+        """
+        Дайджесты, время отправки которых наступило, в виде (email, сообщения).
+        Сообщения остаются в Redis до ack_digests; не подтверждённые за lease
+        секунд дайджесты захватываются снова.
+        """
+        self.ensure_connected()
+        now = time.time()
+        emails = [
+            _to_str(email)
+            for email in self._claim_digests(
+                keys=[NOTIFICATION_DIGESTS_DUE_KEY], args=[now, limit, now + lease]
+            )
+        ]
+        with self.client.pipeline(transaction=False) as pipe:
+            for email in emails:
+                pipe.lrange(notification_digest_key(email), 0, -1)
+            lists = pipe.execute()
+        return [
+            (email, [_to_str(message) for message in messages])
+            for email, messages in zip(emails, lists)
+        ]
+
+    def ack_digests(self, digests: list[tuple[str, int]]) -> None:
+        """Удаление отправленных сообщений дайджестов: (email, сколько ушло)"""
+        if not digests:
+            return
+        self.ensure_connected()
+        self._ack_digests(
+            keys=[
+                NOTIFICATION_DIGESTS_DUE_KEY,
+                NOTIFICATION_STATS_KEY,
+                *(notification_digest_key(email) for email, _ in digests),
+            ],
+            args=[value for digest in digests for value in digest],
+        )
+
+    def incr_notification_stat(self, field: str, amount: int = 1) -> int:
+        self.ensure_connected()
+        return self.client.hincrby(NOTIFICATION_STATS_KEY, field, amount)
+
     def close(self) -> None:
         if self._pool:
             try:
                 self._pool.disconnect(inuse_connections=True)
+                for client in self._node_clients.values():
+                    client.connection_pool.disconnect(inuse_connections=True)
                 logger.info(f"Sync Redis connection closed for db={self.db}")
             except Exception as e:
                 logger.exception(f"Error closing Sync Redis connection: {e}")
                 raise throw_server_error(f"Error closing Sync Redis connection: {e}")
 
 
+def _reset_sync_clients_after_fork() -> None:
+    # Дочерний процесс (prefork Celery) создаёт свои пулы при первом вызове
+    for instance in SyncRedisClient._instances.values():
+        instance._reset()
+
+
+os.register_at_fork(after_in_child=_reset_sync_clients_after_fork)
+
+
+def iter_pools():
+    """Пары (метка клиента, пул) открытых пулов процесса - для метрик"""
+    client = RedisClient._instance
+    if client is not None:
+        if client._pool is not None:
+            yield "async", client._pool
+        if client._binary_pool is not None:
+            yield "async_binary", client._binary_pool
+        for node_client in client._node_clients.values():
+            yield node_client.metrics_label, node_client.connection_pool
+        for subscriber in client._subscribers.values():
+            yield subscriber.metrics_label, subscriber.connection_pool
+    for db, instance in SyncRedisClient._instances.items():
+        if instance._pool is not None:
+            yield f"sync_db{db}", instance._pool
+        for node_client in instance._node_clients.values():
+            yield node_client.metrics_label, node_client.connection_pool
+
+
 def get_async_redis_backend() -> RedisClient:
     return RedisClient()
 
@@ -0,0 +1,163 @@
+"""
+Placement of keys on Redis nodes by data class
+"""
+
+import bisect
+import hashlib
+from enum import Enum
+from typing import Iterable, NamedTuple
+from urllib.parse import urlparse
+
+from backend.config import CONFIG
+
+_CELERY_META_PREFIX = "celery-task-meta-"
+
+
+class RedisNode(NamedTuple):
+    host: str
+    port: int
+    db: int = 0
+
+    @classmethod
+    def parse(cls, spec: str) -> "RedisNode":
+        """host[:port][/db] или redis://host[:port][/db]"""
+        spec = spec.strip()
+        if "://" not in spec:
+            spec = f"redis://{spec}"
+        url = urlparse(spec)
+        db = url.path.strip("/")
+        return cls(url.hostname or "localhost", url.port or 6379, int(db or 0))
+
+    def __str__(self) -> str:
+        return f"{self.host}:{self.port}/{self.db}"
+
+
+class KeyClass(str, Enum):
+    STOCK = "stock"
+    ORDER = "order"
+    INVOICE = "invoice"
+    RESULTS = "results"
+    MAIN = "main"
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    Консистентное хеширование с виртуальными узлами: при добавлении узла
+    переезжает около 1/N ключей, а не почти все, как при hash % N
+    """
+
+    def __init__(self, nodes: Iterable[RedisNode], replicas: int):
+        self.nodes = tuple(dict.fromkeys(nodes))
+        points = sorted(
+            (_hash(f"{node}#{replica}"), node)
+            for node in self.nodes
+            for replica in range(replicas)
+        )
+        self._points = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def node_for(self, shard_key: str) -> RedisNode:
+        if len(self.nodes) == 1:
+            return self.nodes[0]
+        index = bisect.bisect(self._points, _hash(shard_key)) % len(self._points)
+        return self._owners[index]
+
+
+def shard_of(key: str) -> tuple[KeyClass, str]:
+    """
+    Класс данных ключа и его ключ шардирования (аналог hash tag Redis Cluster):
+    все ключи одного заказа или инвойса шардируются по id и лежат на одном узле
+    """
+    if key.startswith(_CELERY_META_PREFIX):
+        return KeyClass.RESULTS, key
+    prefix, _, rest = key.partition(":")
+    if prefix == "stock":
+        return KeyClass.STOCK, rest
+    if prefix == "order":
+        return KeyClass.ORDER, rest.split(":", 1)[0]
+    if prefix == "idempotency":
+        return KeyClass.ORDER, key
+    if prefix == "invoice":
+        return KeyClass.INVOICE, rest.split(":", 1)[0]
+    return KeyClass.MAIN, key
+
+
+class KeyRouter:
+    """
+    Узлы по классам данных: остатки, состояние заказов и инвойсы - кольца
+    консистентного хеширования, результаты Celery - узел CELERY_BACKEND_DSN,
+    остальное (дайджесты, pub/sub статусов задач) - основной узел
+    """
+
+    def __init__(
+        self,
+        main: RedisNode,
+        results: RedisNode,
+        stock: list[RedisNode],
+        order: list[RedisNode],
+        invoice: list[RedisNode],
+        replicas: int,
+    ):
+        self.main = main
+        self._rings = {
+            KeyClass.STOCK: HashRing(stock or [main], replicas),
+            KeyClass.ORDER: HashRing(order or [main], replicas),
+            KeyClass.INVOICE: HashRing(invoice or [main], replicas),
+            KeyClass.RESULTS: HashRing([results], replicas),
+            KeyClass.MAIN: HashRing([main], replicas),
+        }
+
+    def nodes(self, key_class: KeyClass) -> tuple[RedisNode, ...]:
+        return self._rings[key_class].nodes
+
+    def node_for(self, key_class: KeyClass, shard_key) -> RedisNode:
+        return self._rings[key_class].node_for(str(shard_key))
+
+    def node_for_key(self, key: str) -> RedisNode:
+        return self.node_for(*shard_of(key))
+
+    def stock_node(self, product: str) -> RedisNode:
+        return self.node_for(KeyClass.STOCK, product)
+
+    def order_node(self, order_id: int) -> RedisNode:
+        return self.node_for(KeyClass.ORDER, order_id)
+
+    def invoice_node(self, order_id: int) -> RedisNode:
+        return self.node_for(KeyClass.INVOICE, order_id)
+
+    def nodes_for_pattern(self, pattern: str) -> tuple[RedisNode, ...]:
+        """Узлы, на которых могут лежать ключи шаблона SCAN/KEYS"""
+        key_class, _ = shard_of(pattern)
+        return self.nodes(key_class)
+
+    def group(self, keys: Iterable[str]) -> dict[RedisNode, list[int]]:
+        """Индексы ключей по узлам - для MGET/DEL/EXISTS по нескольким узлам"""
+        groups: dict[RedisNode, list[int]] = {}
+        for index, key in enumerate(keys):
+            groups.setdefault(self.node_for_key(key), []).append(index)
+        return groups
+
+
+def _parse_nodes(spec: str) -> list[RedisNode]:
+    return [RedisNode.parse(node) for node in spec.split(",") if node.strip()]
+
+
+_router: KeyRouter | None = None
+
+
+def get_router() -> KeyRouter:
+    global _router
+    if _router is None:
+        _router = KeyRouter(
+            main=RedisNode(CONFIG.redis_host, CONFIG.redis_port, 0),
+            results=RedisNode.parse(CONFIG.celery_backend_dsn),
+            stock=_parse_nodes(CONFIG.redis_stock_nodes),
+            order=_parse_nodes(CONFIG.redis_order_nodes),
+            invoice=_parse_nodes(CONFIG.redis_invoice_nodes),
+            replicas=CONFIG.redis_ring_replicas,
+        )
+    return _router
@@ -0,0 +1,250 @@
+"""
+Lua scripts executed on the Redis side.
+"""
+
+# Атомарное резервирование остатков всех строк заказа за один round trip:
+# списываются все строки или ни одна.
+# KEYS[1] - hash заказа, KEYS[2] - индекс ожидающих заказов,
+# KEYS[3] - их payload, KEYS[4..] - остатки товаров
+# ARGV[1] - статус, который записывается при успехе, ARGV[2] - id заказа,
+# ARGV[3] - TTL hash заказа (0 - без срока), ARGV[4] - канал инвалидации кэша
+# остатков, ARGV[5..] - количества по строкам, затем товары по строкам,
+# затем пары поле/значение hash заказа
+# Возвращает {результат, номер строки, остатки...}:
+# {"reserved", 0, остаток_1, ..., остаток_n} при успехе,
+# {"insufficient_stock", i, остаток_i или -1} для первой строки без остатка,
+# {"duplicate", 0, -1}, если заказ уже обработан.
+# При любом исходе заказ снимается с индекса ожидающих. Списания публикуются
+# в канал инвалидации в том же атомарном вызове. В hash пишутся статус, время
+# постановки в очередь (score индекса) и время обработки (TIME Redis).
+RESERVE_STOCK = """
+local lines = #KEYS - 3
+local queued = redis.call("ZSCORE", KEYS[2], ARGV[2])
+redis.call("ZREM", KEYS[2], ARGV[2])
+redis.call("HDEL", KEYS[3], ARGV[2])
+if redis.call("EXISTS", KEYS[1]) == 1 then
+    return {"duplicate", 0, -1}
+end
+local stocks = redis.call("MGET", unpack(KEYS, 4))
+for i = 1, lines do
+    local stock = tonumber(stocks[i])
+    if stock == nil or stock < tonumber(ARGV[4 + i]) then
+        return {"insufficient_stock", i, stock or -1}
+    end
+end
+local result = {"reserved", 0}
+for i = 1, lines do
+    result[2 + i] = redis.call("DECRBY", KEYS[3 + i], ARGV[4 + i])
+    redis.call("PUBLISH", ARGV[4], ARGV[4 + lines + i])
+end
+local time = redis.call("TIME")
+redis.call(
+    "HSET", KEYS[1], "status", ARGV[1],
+    "processed_at", time[1] .. "." .. string.format("%06d", tonumber(time[2])),
+    unpack(ARGV, 5 + 2 * lines)
+)
+if queued then
+    redis.call("HSET", KEYS[1], "queued_at", queued)
+end
+if tonumber(ARGV[3]) > 0 then
+    redis.call("EXPIRE", KEYS[1], ARGV[3])
+end
+return result
+"""
+
+# Резервирование строк, остатки которых лежат на одном узле, когда остатки
+# и состояние заказа разнесены по разным узлам (см. router.py).
+# KEYS[1] - отметка резервирования заказа на этом узле, KEYS[2..] - остатки
+# ARGV[1] - TTL отметки, ARGV[2] - канал инвалидации кэша остатков,
+# ARGV[3..] - количества по строкам, затем товары по строкам
+# Возвращает то же, что RESERVE_STOCK, кроме "duplicate". Повторный вызов для
+# того же заказа (повтор задачи) по отметке ничего не списывает.
+RESERVE_LINES = """
+local lines = #KEYS - 1
+local stocks = redis.call("MGET", unpack(KEYS, 2))
+local result = {"reserved", 0}
+if redis.call("EXISTS", KEYS[1]) == 1 then
+    for i = 1, lines do
+        result[2 + i] = tonumber(stocks[i]) or -1
+    end
+    return result
+end
+for i = 1, lines do
+    local stock = tonumber(stocks[i])
+    if stock == nil or stock < tonumber(ARGV[2 + i]) then
+        return {"insufficient_stock", i, stock or -1}
+    end
+end
+for i = 1, lines do
+    result[2 + i] = redis.call("DECRBY", KEYS[1 + i], ARGV[2 + i])
+    redis.call("PUBLISH", ARGV[2], ARGV[2 + lines + i])
+end
+redis.call("SET", KEYS[1], "1", "EX", ARGV[1])
+return result
+"""
+
+# Возврат резерва RESERVE_LINES, если другой узел остатков отказал.
+# KEYS[1] - отметка резервирования, KEYS[2..] - остатки
+# ARGV[1] - канал инвалидации, ARGV[2..] - количества, затем товары
+# Возвращает 1, если резерв возвращён, 0 - если отметки нет.
+RELEASE_LINES = """
+if redis.call("DEL", KEYS[1]) == 0 then
+    return 0
+end
+local lines = #KEYS - 1
+for i = 1, lines do
+    redis.call("INCRBY", KEYS[1 + i], ARGV[1 + i])
+    redis.call("PUBLISH", ARGV[1], ARGV[1 + lines + i])
+end
+return 1
+"""
+
+# Завершение заказа на узле его состояния после RESERVE_LINES.
+# KEYS[1] - hash заказа, KEYS[2] - индекс ожидающих заказов, KEYS[3] - их payload
+# ARGV[1] - статус, ARGV[2] - id заказа, ARGV[3] - TTL hash заказа,
+# ARGV[4..] - пары поле/значение hash заказа (как в RESERVE_STOCK);
+# без них заказ только снимается с индекса ожидающих.
+# Возвращает 1, если заказ записан, иначе 0 (заказ уже обработан).
+COMPLETE_ORDER = """
+local queued = redis.call("ZSCORE", KEYS[2], ARGV[2])
+redis.call("ZREM", KEYS[2], ARGV[2])
+redis.call("HDEL", KEYS[3], ARGV[2])
+if #ARGV < 4 or redis.call("EXISTS", KEYS[1]) == 1 then
+    return 0
+end
+local time = redis.call("TIME")
+redis.call(
+    "HSET", KEYS[1], "status", ARGV[1],
+    "processed_at", time[1] .. "." .. string.format("%06d", tonumber(time[2])),
+    unpack(ARGV, 4)
+)
+if queued then
+    redis.call("HSET", KEYS[1], "queued_at", queued)
+end
+if tonumber(ARGV[3]) > 0 then
+    redis.call("EXPIRE", KEYS[1], ARGV[3])
+end
+return 1
+"""
+
+# Заявка на приём заказа в API (идемпотентность).
+# KEYS[1] - заявка на order_id, KEYS[2] - ключ Idempotency-Key (необязателен)
+# ARGV[1] - task_id, ARGV[2] - TTL в секундах, ARGV[3] - order_id
+# Возвращает пустой список, если заявка создана, иначе существующую заявку:
+# {"key", "order_id:task_id"} по ключу идемпотентности или {"order", task_id}.
+CLAIM_ORDER = """
+if #KEYS == 2 then
+    local claimed = redis.call("GET", KEYS[2])
+    if claimed then
+        return {"key", claimed}
+    end
+end
+local task_id = redis.call("GET", KEYS[1])
+if task_id then
+    return {"order", task_id}
+end
+redis.call("SET", KEYS[1], ARGV[1], "EX", ARGV[2])
+if #KEYS == 2 then
+    redis.call("SET", KEYS[2], ARGV[3] .. ":" .. ARGV[1], "EX", ARGV[2])
+end
+return {}
+"""
+
+# Токен-бакет клиента API: допуск заказа одним вызовом Redis.
+# KEYS[1] - бакет клиента (hash tokens/ts)
+# ARGV[1] - пополнение в токенах в секунду, ARGV[2] - ёмкость, ARGV[3] - цена
+# Возвращает 0, если токены списаны, иначе через сколько миллисекунд их хватит.
+# Время берётся у Redis: бакет общий для всех процессов API, часы которых
+# могут расходиться. Полный бакет истекает и не занимает память.
+TAKE_TOKENS = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local time = redis.call("TIME")
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+if tokens < cost then
+    return math.ceil((cost - tokens) / rate * 1000)
+end
+redis.call(
+    "HSET", KEYS[1], "tokens", tostring(tokens - cost), "ts", string.format("%.6f", now)
+)
+redis.call("EXPIRE", KEYS[1], math.ceil(burst / rate) + 1)
+return 0
+"""
+
+# Выборка зависших заказов для повторной постановки в очередь.
+# KEYS[1] - индекс ожидающих заказов, KEYS[2] - их payload
+# ARGV[1] - граница score (время постановки, не включительно), ARGV[2] - лимит,
+# ARGV[3] - новый score для выбранных заказов, не меньше ARGV[1]
+# Возвращает плоский список {id, payload, id, payload, ...}. Выбранные заказы
+# получают новый score, поэтому следующий вызов их не вернёт до нового таймаута.
+CLAIM_PENDING_ORDERS = """
+local ids = redis.call(
+    "ZRANGEBYSCORE", KEYS[1], "-inf", "(" .. ARGV[1], "LIMIT", 0, ARGV[2]
+)
+local result = {}
+for _, id in ipairs(ids) do
+    local payload = redis.call("HGET", KEYS[2], id)
+    if payload then
+        redis.call("ZADD", KEYS[1], "XX", ARGV[3], id)
+        table.insert(result, id)
+        table.insert(result, payload)
+    else
+        redis.call("ZREM", KEYS[1], id)
+    end
+end
+return result
+"""
+
+# Буферизация уведомления в дайджест получателя.
+# KEYS[1] - список сообщений получателя, KEYS[2] - расписание отправки
+# дайджестов, KEYS[3] - счётчики уведомлений
+# ARGV[1] - email, ARGV[2] - сообщение, ARGV[3] - время отправки дайджеста
+# Время отправки ставится первым сообщением окна и дальше не сдвигается.
+BUFFER_NOTIFICATION = """
+redis.call("RPUSH", KEYS[1], ARGV[2])
+redis.call("ZADD", KEYS[2], "NX", ARGV[3], ARGV[1])
+redis.call("HINCRBY", KEYS[3], "buffered", 1)
+return 1
+"""
+
+# Захват дайджестов, время отправки которых наступило.
+# KEYS[1] - расписание отправки дайджестов
+# ARGV[1] - текущее время, ARGV[2] - лимит, ARGV[3] - время окончания захвата
+# Возвращает email получателей. Их время отправки сдвигается на конец захвата:
+# другой проход их не возьмёт, а если сообщения не удалят (ACK_DIGESTS) -
+# например, воркер упал до постановки send_notification, - дайджест будет
+# захвачен снова.
+CLAIM_DIGESTS = """
+local emails = redis.call("ZRANGEBYSCORE", KEYS[1], "-inf", ARGV[1], "LIMIT", 0, ARGV[2])
+for _, email in ipairs(emails) do
+    redis.call("ZADD", KEYS[1], "XX", ARGV[3], email)
+end
+return emails
+"""
+
+# Удаление отправленных дайджестов.
+# KEYS[1] - расписание отправки дайджестов, KEYS[2] - счётчики уведомлений,
+# KEYS[2 + i] - список сообщений i-го получателя
+# ARGV[2 * i - 1] - email i-го получателя, ARGV[2 * i] - сколько его сообщений
+# ушло (первые в списке). Сообщения, добавленные после захвата, остаются и
+# уходят следующим проходом.
+ACK_DIGESTS = """
+for i = 3, #KEYS do
+    local email = ARGV[2 * (i - 2) - 1]
+    local sent = tonumber(ARGV[2 * (i - 2)])
+    if sent > 0 then
+        redis.call("LTRIM", KEYS[i], sent, -1)
+        redis.call("HINCRBY", KEYS[2], "digests", 1)
+        redis.call("HINCRBY", KEYS[2], "digested", sent)
+    end
+    if redis.call("LLEN", KEYS[i]) == 0 then
+        redis.call("ZREM", KEYS[1], email)
+    end
+end
+return 1
+"""
@@ -1,29 +1,137 @@
+import json
 import logging
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from celery import group
 
 from celery_service.celery_app import CELERY
-from backend.registry import broker_redis
+from celery_service.client import PROCESS_ORDER_TASK
+from celery_service.queues import DEFAULT_QUEUE, broker_keys
+from backend.config import CONFIG
+from backend.export import iter_export
+from backend.models.export.enums import ExportFormat, ExportKind
+from backend.registry import backend_redis
+from backend.notifications import format_digest
+from backend.tasks.worker_tasks import process_order, send_notification
 
 celery_logger = logging.getLogger(__name__)
 
 
 @CELERY.task(name="backend.tasks.beat_tasks.daily_stock_report")
 def daily_stock_report():
-    # Агрегируем остатки и логируем
-    keys = broker_redis.keys("stock:*")
-    report = {}
-    for key in keys:
-        report[key] = broker_redis.get(key)
-    celery_logger.info(f"Daily stock report: {report}")
+    # Та же выгрузка, что GET /api/export/stock: страницы SCAN -> MGET пишутся
+    # в CSV по мере чтения, файл появляется целиком после записи
+    directory = Path(CONFIG.stock_report_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"stock-{datetime.now(timezone.utc):%Y-%m-%d}.csv"
+    partial = path.with_name(f"{path.name}.partial")
+    with partial.open("w", newline="") as file:
+        for chunk in iter_export(ExportKind.STOCK, ExportFormat.CSV, cursors=False):
+            file.write(chunk)
+    partial.replace(path)
+    celery_logger.info(f"Daily stock report written to {path}")
+
+
+def _meta_key(task_id: str) -> str:
+    return f"celery-task-meta-{task_id}"
+
+
+def _published_at(message: dict) -> float | None:
+    """Время публикации сообщения process_order из заголовков kombu"""
+    headers = message.get("headers") or {}
+    if headers.get("task") != PROCESS_ORDER_TASK:
+        return None
+    return headers.get("published_at")
+
+
+def _oldest_undelivered_order() -> float | None:
+    """
+    published_at самого старого заказа, который ещё в брокере: в списках
+    очереди default (сообщения добавляются LPUSH, самое старое - последнее)
+    или выдан воркеру и не подтверждён (acks_late, хеш unacked kombu)
+    """
+    with CELERY.connection_for_read() as connection:
+        channel = connection.default_channel
+        with channel.client.pipeline(transaction=False) as pipe:
+            for key in broker_keys(DEFAULT_QUEUE):
+                pipe.lindex(key, -1)
+            pipe.hvals(channel.unacked_key)
+            *oldest, unacked = pipe.execute()
+    messages = [json.loads(message) for message in oldest if message is not None]
+    # Запись unacked - [сообщение, exchange, routing_key]
+    messages += [json.loads(entry)[0] for entry in unacked]
+    published = [stamp for stamp in map(_published_at, messages) if stamp]
+    return min(published, default=None)
+
+
+def _pending_task(payload: str) -> tuple[str | None, dict]:
+    """task_id и аргументы process_order из payload индекса ожидающих"""
+    data = json.loads(payload)
+    if "task_id" not in data:
+        # Запись старого формата: только аргументы заказа
+        return None, data
+    return data["task_id"], data["kwargs"]
 
 
 @CELERY.task(name="backend.tasks.beat_tasks.check_pending_orders")
 def check_pending_orders():
-    # Проверка просроченных заказов и повторная постановка в очередь
-    keys = broker_redis.keys("order:*:status")
-    for key in keys:
-        status = broker_redis.get(key)
-        if status == b"pending":
-            order_id = key.decode().split(":")[1]
-            # Повторно поставить задачу в очередь process_order
-            broker_redis.delay(order_id)
+    # Повторная постановка в очередь заказов, зависших дольше таймаута.
+    # Читается только хвост индекса ожидающих заказов, а не вся история.
+    # Заказ, поставленный не раньше самого старого сообщения брокера, может
+    # ещё ждать в очереди: при длинном backlog граница сдвигается назад
+    older_than = time.time() - CONFIG.pending_order_timeout
+    undelivered = _oldest_undelivered_order()
+    if undelivered is not None:
+        older_than = min(older_than, undelivered)
+    while True:
+        claimed = backend_redis.claim_pending_orders(
+            older_than, CONFIG.pending_order_recovery_batch
+        )
+        tasks = [(order_id, *_pending_task(payload)) for order_id, payload in claimed]
+        known = [task_id for _, task_id, _ in tasks if task_id is not None]
+        results = dict(
+            zip(known, backend_redis.mget(*map(_meta_key, known)) if known else [])
+        )
+        # Задача с результатом уже выполнилась: повтор дал бы DUPLICATE FAILURE
+        # под тем же task_id, запись индекса просто удаляется
+        finished = [
+            int(order_id)
+            for order_id, task_id, _ in tasks
+            if results.get(task_id) is not None
+        ]
+        if finished:
+            backend_redis.remove_pending_orders(finished)
+        for order_id, task_id, kwargs in tasks:
+            if results.get(task_id) is not None:
+                continue
+            # Тот же task_id: его опрашивает клиент и его же возвращает
+            # повтор запроса с Idempotency-Key
+            process_order.apply_async(kwargs=kwargs, task_id=task_id)
             celery_logger.info(f"Requeued order {order_id}")
+        if len(claimed) < CONFIG.pending_order_recovery_batch:
+            break
+
+
+@CELERY.task(name="backend.tasks.beat_tasks.flush_notification_digests")
+def flush_notification_digests():
+    # Отправка накопленных дайджестов, окно которых закончилось
+    while True:
+        digests = backend_redis.claim_digests(
+            CONFIG.notification_digest_batch, CONFIG.notification_digest_lease
+        )
+        queued = [(email, messages) for email, messages in digests if messages]
+        if queued:
+            group(
+                send_notification.s(email=email, message=format_digest(messages))
+                for email, messages in queued
+            ).apply_async()
+            celery_logger.info(f"Queued {len(queued)} notification digests")
+        # Сообщения удаляются только после постановки задач: при сбое раньше
+        # дайджест захватится снова по истечении NOTIFICATION_DIGEST_LEASE
+        backend_redis.ack_digests(
+            [(email, len(messages)) for email, messages in digests]
+        )
+        if len(digests) < CONFIG.notification_digest_batch:
+            break
@@ -0,0 +1,234 @@
+"""
+Order pipeline over Redis Streams (ORDER_PIPELINE=stream): the API appends
+orders to orders:stream on the order's node, this consumer reads them in
+batches through a consumer group, reserves stock, sends the follow-up tasks,
+records the task results and acks the whole batch.
+
+Run: python -m backend.tasks.order_stream
+"""
+
+import json
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+
+from backend.config import CONFIG
+from backend.metrics import STOCK_RESERVATIONS
+from backend.models.order.enums import ReservationStatus
+from backend.models.order.requests import RequestCartOrder, RequestOrder
+from backend.models.status.enums import TaskState
+from backend.registry import backend_redis
+from backend.storage.db.keys import stock_key
+from backend.storage.db.router import KeyClass, RedisNode, get_router
+from backend.tasks.worker_tasks import (
+    ORDER_PROCESSED_MESSAGE,
+    generate_invoices,
+    notify_many,
+    order_lines,
+)
+from celery_service.celery_app import CELERY
+
+logger = logging.getLogger(__name__)
+
+
+def _result(task_id: str, state: TaskState, error: str | None = None) -> str:
+    # Метаданные в формате Celery: API читает статус по первому ключу
+    result = None
+    if error is not None:
+        result = {"exc_type": "HTTPException", "exc_message": [error]}
+    return json.dumps({"status": state.value, "result": result, "task_id": task_id})
+
+
+def _parse_order(fields: dict[str, str]) -> RequestOrder | RequestCartOrder:
+    # Те же модели, что проверяют заказ в API: запись могли дописать мимо него
+    order = json.loads(fields["order"])
+    if isinstance(order, dict) and "items" in order:
+        return RequestCartOrder.model_validate(order)
+    return RequestOrder.model_validate(order)
+
+
+def _queued_at(entry_id: str) -> str:
+    # id записи потока - миллисекунды XADD
+    milliseconds = int(entry_id.split("-", 1)[0])
+    return f"{milliseconds // 1000}.{milliseconds % 1000:03d}"
+
+
+class OrderStreamConsumer:
+    """
+    Читатель потока заказов одного узла. Запись подтверждается после записи
+    результата и постановки последующих задач; записи упавшего читателя
+    через ORDER_STREAM_CLAIM_IDLE секунд забирает любой другой (XAUTOCLAIM) -
+    это заменяет check_pending_orders конвейера celery
+    """
+
+    def __init__(self, node: RedisNode, name: str):
+        self.node = node
+        self.name = name
+        self._claim_cursor = "0-0"
+        self._next_claim = 0.0
+
+    def run(self, stop: threading.Event) -> None:
+        backend_redis.create_order_stream_group(self.node)
+        logger.info(f"Order stream consumer {self.name} reading {self.node}")
+        while not stop.is_set():
+            try:
+                if time.monotonic() >= self._next_claim:
+                    self._reclaim()
+                entries = backend_redis.read_order_stream(
+                    self.node,
+                    self.name,
+                    CONFIG.order_stream_batch,
+                    CONFIG.order_stream_block,
+                )
+                if entries:
+                    self.process(entries)
+            except Exception as error:
+                # Неподтверждённые записи заберёт XAUTOCLAIM
+                logger.error(f"Order stream on {self.node} failed: {error}")
+                stop.wait(1.0)
+
+    def _reclaim(self) -> None:
+        self._claim_cursor, entries = backend_redis.claim_stalled_orders(
+            self.node,
+            self.name,
+            CONFIG.order_stream_claim_idle * 1000,
+            self._claim_cursor,
+            CONFIG.order_stream_batch,
+        )
+        if entries:
+            logger.info(f"Reclaimed {len(entries)} stalled orders on {self.node}")
+            self.process(entries, reclaimed=True)
+        # Пока не пройден весь список неподтверждённых, следующая страница -
+        # на следующем шаге
+        if self._claim_cursor == "0-0":
+            self._next_claim = time.monotonic() + CONFIG.order_stream_claim_interval
+
+    def process(
+        self, entries: list[tuple[str, dict[str, str]]], reclaimed: bool = False
+    ) -> None:
+        # (task_id, заказ, строки, остальные поля hash заказа)
+        orders: list[tuple[str, RequestOrder | RequestCartOrder, list[dict], dict]] = []
+        results: dict[str, tuple[str, str]] = {}
+        for entry_id, fields in entries:
+            try:
+                task_id = fields["task_id"]
+                order = _parse_order(fields)
+            except (KeyError, ValueError) as error:
+                # ValidationError pydantic - тоже ValueError. Запись
+                # подтверждается вместе с пачкой, чтобы не забирать её снова
+                logger.error(f"Dropping malformed order entry {entry_id}: {error}")
+                if "task_id" in fields:
+                    results[fields["task_id"]] = (
+                        TaskState.FAILURE.value,
+                        _result(
+                            fields["task_id"], TaskState.FAILURE, "Malformed order"
+                        ),
+                    )
+                continue
+            if isinstance(order, RequestCartOrder):
+                lines = order_lines(items=[item.model_dump() for item in order.items])
+            else:
+                lines = order_lines(order.product, order.quantity)
+            record = {
+                "email": order.email,
+                "task_id": task_id,
+                "queued_at": _queued_at(entry_id),
+            }
+            orders.append((task_id, order, lines, record))
+
+        reservations = backend_redis.reserve_stocks(
+            [(order.order_id, lines, record) for _, order, lines, record in orders]
+        )
+
+        # Запись забрана у упавшего читателя: дубль - её собственное
+        # резервирование, только если заказ записан под тем же task_id.
+        # Иначе это другой заказ с тем же order_id, и он отклоняется
+        replayed: set[str] = set()
+        if reclaimed:
+            duplicates = [
+                (task_id, order.order_id)
+                for (task_id, order, _, _), reservation in zip(orders, reservations)
+                if reservation.status == ReservationStatus.DUPLICATE
+            ]
+            if duplicates:
+                reserved_by = backend_redis.order_task_ids(
+                    [order_id for _, order_id in duplicates]
+                )
+                replayed = {
+                    task_id
+                    for (task_id, _), owner in zip(duplicates, reserved_by)
+                    if owner == task_id
+                }
+
+        notifications: list[tuple[str, str]] = []
+        invoices: list[dict] = []
+        for (task_id, order, lines, _), reservation in zip(orders, reservations):
+            STOCK_RESERVATIONS.labels(reservation.status.value).inc()
+            order_id = order.order_id
+            # Последующие задачи повтора ставятся заново
+            if reservation.status == ReservationStatus.RESERVED or task_id in replayed:
+                results[task_id] = (
+                    TaskState.SUCCESS.value,
+                    _result(task_id, TaskState.SUCCESS),
+                )
+                notifications.append(
+                    (order.email, ORDER_PROCESSED_MESSAGE.format(order_id=order_id))
+                )
+                invoices.append({"order_id": order_id, "items": lines})
+                continue
+
+            if reservation.status == ReservationStatus.DUPLICATE:
+                error = "This order has already been received!"
+            else:
+                error = f"{stock_key(reservation.product)}: Insufficient stock!"
+            logger.error(f"Order {order_id}: {error}")
+            results[task_id] = (
+                TaskState.FAILURE.value,
+                _result(task_id, TaskState.FAILURE, error),
+            )
+
+        notify_many(notifications)
+        # В ленивом режиме инвойс генерирует API при первом запросе
+        if invoices and not CONFIG.invoice_lazy_generation:
+            generate_invoices.delay(orders=invoices)
+        if results:
+            backend_redis.save_order_results(results, CELERY.conf.result_expires)
+        backend_redis.ack_order_entries(
+            self.node, [entry_id for entry_id, _ in entries]
+        )
+
+
+def run(stop: threading.Event) -> None:
+    """Читатель на каждый узел заказов, до установки stop"""
+    name = f"{socket.gethostname()}-{os.getpid()}"
+    threads = [
+        threading.Thread(
+            target=OrderStreamConsumer(node, name).run,
+            args=(stop,),
+            name=f"order-stream@{node}",
+        )
+        for node in get_router().nodes(KeyClass.ORDER)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+if __name__ == "__main__":
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+
+    if CONFIG.metrics_enabled and CONFIG.metrics_worker_port:
+        from backend.metrics import start_worker_exporter
+
+        start_worker_exporter(CONFIG.metrics_worker_port)
+
+    try:
+        run(stop)
+    finally:
+        backend_redis.close()
@@ -1,56 +1,143 @@
-import time
+import functools
 import logging
+from concurrent.futures import Future
+
+from celery import group
 
 from celery_service.celery_app import CELERY
-from backend.utils import throw_bad_request, create_invoice
+from backend.models.order.enums import ReservationStatus
+from backend.config import CONFIG
+from backend.invoice import render_invoice, render_invoices
+from backend.metrics import STOCK_RESERVATIONS
+from backend.notifications import get_dispatcher
+from backend.utils import throw_bad_request
 from backend.registry import backend_redis
+from backend.storage.db.keys import invoice_lock_key, stock_key
 
 celery_logger = logging.getLogger(__name__)
 
+ORDER_PROCESSED_MESSAGE = "Your order #{order_id} has been processed successfully!"
+
+
+def notify(email: str, message: str, urgent: bool = False) -> None:
+    """
+    Уведомление получателю. При NOTIFICATION_DIGEST_WINDOW > 0 сообщения
+    копятся в дайджест и отправляются одним письмом по окончании окна;
+    urgent=True отправляет сразу.
+    """
+    if urgent or not CONFIG.notification_digest_window:
+        send_notification.delay(email=email, message=message)
+        backend_redis.incr_notification_stat("immediate")
+        return
+    backend_redis.buffer_notification(email, message, CONFIG.notification_digest_window)
+
+
+def notify_many(notifications: list[tuple[str, str]]) -> None:
+    """notify() для пачки (email, сообщение): сразу - одной группой задач"""
+    if not notifications:
+        return
+    if not CONFIG.notification_digest_window:
+        group(
+            send_notification.s(email=email, message=message)
+            for email, message in notifications
+        ).apply_async()
+        backend_redis.incr_notification_stat("immediate", len(notifications))
+        return
+    for email, message in notifications:
+        backend_redis.buffer_notification(
+            email, message, CONFIG.notification_digest_window
+        )
+
+
+def order_lines(
+    product: str | None = None,
+    quantity: int | None = None,
+    items: list[dict] | None = None,
+) -> list[dict]:
+    """Строки заказа {product, quantity}: заказ из одного товара - корзина из одной строки"""
+    if items is None:
+        return [{"product": product, "quantity": quantity}]
+    return items
+
 
 @CELERY.task(name="backend.tasks.worker_tasks.process_order", bind=True)
-def process_order(self, order_id: int, product: str, quantity: int, email: str):
+def process_order(
+    self,
+    order_id: int,
+    product: str | None = None,
+    quantity: int | None = None,
+    email: str | None = None,
+    items: list[dict] | None = None,
+):
     try:
+        lines = order_lines(product, quantity, items)
+        reservation = backend_redis.reserve_stock(
+            order_id, lines, {"email": email, "task_id": self.request.id}
+        )
 
-        check_status = backend_redis.get(f"order:{order_id}:status")
-
-        celery_logger.info(f"check_status, {check_status}")
+        celery_logger.info(f"reservation, {reservation}")
+        STOCK_RESERVATIONS.labels(reservation.status.value).inc()
 
-        if check_status is not None:
+        if reservation.status == ReservationStatus.DUPLICATE:
             celery_logger.error(f"This order {order_id} has already been received!")
             raise throw_bad_request("This order has already been received!")
 
-        stock_key = f"stock:{product}"
-        current_stock = backend_redis.get(stock_key)
+        if reservation.status == ReservationStatus.INSUFFICIENT_STOCK:
+            celery_logger.error(
+                f"{stock_key(reservation.product)}: Insufficient stock!"
+            )
+            raise throw_bad_request(
+                f"{stock_key(reservation.product)}: Insufficient stock!"
+            )
 
-        if current_stock is None or int(current_stock) < quantity:
-            celery_logger.error(f"{stock_key}: Insufficient stock!")
-            raise throw_bad_request(f"{stock_key}: Insufficient stock!")
+        celery_logger.info(f"New stock: {reservation.stocks}")
 
-        new_stock = int(current_stock) - quantity
-        backend_redis.set(stock_key, new_stock)
-        celery_logger.info(f"New stock: {new_stock}")
-        backend_redis.set(f"order:{order_id}:status", "processed")
+        message = ORDER_PROCESSED_MESSAGE.format(order_id=order_id)
 
-        message = f"Your order #{order_id} has been processed successfully!"
-
-        send_notification.delay(email=email, message=message)
+        notify(email=email, message=message)
 
-        generate_invoice.delay(order_id=order_id, product=product, quantity=quantity)
+        # В ленивом режиме инвойс генерирует API при первом запросе
+        if not CONFIG.invoice_lazy_generation:
+            generate_invoice.delay(order_id=order_id, items=lines)
     except Exception as error:
         celery_logger.error(f"Error in process_order: {error}")
         raise
 
 
+def _on_notification_sent(
+    email: str, message: str, attempt: int, future: Future
+) -> None:
+    """Итог отправки в диспетчере: ошибка транспорта - новая задача с паузой"""
+    error = future.exception()
+    if error is None:
+        celery_logger.info(f"Sent notification to {email}")
+        return
+    if attempt >= CONFIG.notification_retries:
+        celery_logger.error(
+            f"Notification to {email} failed after {attempt + 1} attempts: {error}"
+        )
+        return
+    send_notification.apply_async(
+        kwargs={"email": email, "message": message, "attempt": attempt + 1},
+        countdown=CONFIG.notification_retry_delay,
+    )
+
+
 @CELERY.task(name="backend.tasks.worker_tasks.send_notification")
-def send_notification(email: str, message: str):
+def send_notification(email: str, message: str, attempt: int = 0):
     try:
 
         if "@" not in email:
             celery_logger.error(f"Invalid email: {email}")
             raise throw_bad_request("Invalid email")
-        time.sleep(5)
-        celery_logger.info(f"Sent notification to {email}: {message}")
+        # Отправка идёт в asyncio-диспетчере процесса: он держит до
+        # NOTIFICATION_CONCURRENCY отправок, задача возвращается сразу после
+        # передачи и не занимает слот воркера. Итог отправки обрабатывает
+        # callback: ошибка транспорта ставит задачу заново с countdown
+        future = get_dispatcher().submit(email, message)
+        future.add_done_callback(
+            functools.partial(_on_notification_sent, email, message, attempt)
+        )
 
     except Exception as error:
         celery_logger.error(f"Error in send_notification: {error}")
@@ -58,20 +145,57 @@ def send_notification(email: str, message: str):
 
 
 @CELERY.task(name="backend.tasks.worker_tasks.generate_invoice")
-def generate_invoice(order_id: int, product: str, quantity: int):
+def generate_invoice(
+    order_id: int,
+    product: str | None = None,
+    quantity: int | None = None,
+    items: list[dict] | None = None,
+):
     try:
-        """Генерация PDF инвойса с помощью FPDF"""
+        """Генерация PDF инвойса по заготовке"""
         celery_logger.info(f"Generating PDF invoice for order {order_id}")
 
-        pdf_bytes = create_invoice(order_id, product, quantity)
+        pdf_bytes = render_invoice(order_id, order_lines(product, quantity, items))
 
         if pdf_bytes is None or not len(pdf_bytes):
             celery_logger.warning("Pdf_bytes is empty!")
 
-        backend_redis.set(f"invoice:{order_id}", pdf_bytes)
+        backend_redis.save_invoices({order_id: pdf_bytes})
 
         celery_logger.info(f"Invoice generated and saved for order {order_id}")
 
     except Exception as error:
         celery_logger.error(f"Error in generate_invoice: {error}")
         raise
+    finally:
+        # Блокировка ленивой генерации снимается и после ошибки: следующий
+        # запрос инвойса запустит генерацию, не дожидаясь INVOICE_LOCK_TTL
+        backend_redis.delete(invoice_lock_key(order_id))
+
+
+@CELERY.task(name="backend.tasks.worker_tasks.generate_invoices")
+def generate_invoices(orders: list[dict]):
+    try:
+        """
+        Пакетная генерация инвойсов: orders - [{order_id, items}]
+        или [{order_id, product, quantity}]
+        """
+        celery_logger.info(f"Generating {len(orders)} PDF invoices")
+
+        invoices = render_invoices(
+            {
+                "order_id": order["order_id"],
+                "items": order_lines(
+                    order.get("product"), order.get("quantity"), order.get("items")
+                ),
+            }
+            for order in orders
+        )
+
+        backend_redis.save_invoices(invoices)
+
+        celery_logger.info(f"{len(invoices)} invoices generated and saved")
+
+    except Exception as error:
+        celery_logger.error(f"Error in generate_invoices: {error}")
+        raise
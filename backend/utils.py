@@ -1,7 +1,6 @@
 from datetime import datetime
 
 from fastapi import HTTPException
-from fpdf import FPDF
 from starlette import status
 from starlette.responses import JSONResponse
 
@@ -18,6 +17,10 @@ def throw_not_found(message: str):
     raise HTTPException(status.HTTP_404_NOT_FOUND, message)
 
 
+def throw_unprocessable_entity(message: str):
+    raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, message)
+
+
 def throw_failed_dependency(message: str):
     raise HTTPException(status.HTTP_424_FAILED_DEPENDENCY, message)
 
@@ -34,33 +37,15 @@ def get_ok_message():
     return JSONResponse({"message": "ok"})
 
 
-def create_invoice(order_id: int, product: str, quantity: int) -> bytes:
+def create_invoice(order_id: int, items: list[dict]) -> bytes:
+    # fpdf нужен только воркерам: процесс API его не загружает
+    from fpdf import FPDF
+
+    from backend.invoice import draw_invoice
+
     # ✅ Создаём PDF
     pdf = FPDF()
-    pdf.add_page()
-
-    # Заголовок
-    pdf.set_font("Arial", "B", 24)
-    pdf.cell(0, 10, "INVOICE", ln=True, align="C")
-    pdf.ln(10)
-
-    # Детали
-    pdf.set_font("Arial", "", 12)
-    pdf.cell(0, 10, f"Order ID: #{order_id}", ln=True)
-    pdf.cell(0, 10, f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M')}", ln=True)
-    pdf.ln(5)
-
-    # Линия
-    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
-    pdf.ln(5)
-
-    # Товары
-    pdf.set_font("Arial", "B", 14)
-    pdf.cell(0, 10, "Order Details:", ln=True)
-    pdf.set_font("Arial", "", 12)
-    pdf.cell(0, 10, f"Product: {product}", ln=True)
-    pdf.cell(0, 10, f"Quantity: {quantity}", ln=True)
-    pdf.ln(5)
+    draw_invoice(pdf, order_id, datetime.now().strftime("%Y-%m-%d %H:%M"), items)
 
     # ✅ Получаем bytes
     pdf_bytes = pdf.output(dest="S").encode("latin1")
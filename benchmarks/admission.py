@@ -0,0 +1,124 @@
+"""
+Cost of order admission control: latency and Redis commands of an accepted
+order, a rate-limited one (429) and one refused by queue backpressure (503).
+
+No worker runs: accepted orders stay in the broker queue and then stand in
+for a stalled backlog.
+
+Run: python -m benchmarks.admission --requests 2000
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+from benchmarks.common import (
+    add_target_arguments,
+    configure_env,
+    report,
+    resolve_target,
+    summarize,
+)
+
+PRODUCT = "benchmark"
+
+
+def _redis_commands() -> float:
+    from backend.metrics import REDIS_COMMAND_DURATION
+
+    return sum(
+        sample.value
+        for metric in REDIS_COMMAND_DURATION.collect()
+        for sample in metric.samples
+        if sample.name.endswith("_count")
+    )
+
+
+async def _phase(client, order_ids, count: int, expected: int) -> dict:
+    latencies = []
+    commands = _redis_commands()
+    for _ in range(count):
+        order_id = next(order_ids)
+        started = time.perf_counter()
+        response = await client.post(
+            "/api/order/",
+            json={
+                "order_id": order_id,
+                "product": PRODUCT,
+                "quantity": 1,
+                "email": f"user{order_id}@example.com",
+            },
+        )
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == expected, response.status_code
+    result = summarize(latencies)
+    # Команды клиентов backend; публикация задачи идёт через соединение kombu
+    result["redis_commands_per_request"] = (_redis_commands() - commands) / count
+    return result
+
+
+async def _run(args) -> dict:
+    import httpx
+
+    from backend.api.order.admission import order_admission
+    from backend.config import CONFIG
+    from backend.main import app
+    from backend.registry import async_backend_redis
+
+    order_ids = iter(range(int(time.time() * 1000) * 1000, 2**62))
+    backpressure = order_admission.backpressure
+    results = {}
+    async with app.router.lifespan_context(app):
+        await async_backend_redis.set_stock(PRODUCT, args.requests)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://benchmark"
+        ) as client:
+            CONFIG.order_wait_slo = 0
+            CONFIG.order_rate_limit = 0
+            results["accepted[no admission]"] = await _phase(
+                client, order_ids, args.requests, 201
+            )
+            CONFIG.order_rate_limit = 10**9
+            CONFIG.order_rate_burst = 10**9
+            results["accepted[rate limit]"] = await _phase(
+                client, order_ids, args.requests, 201
+            )
+
+            # Бакет из одного токена почти не пополняется: первый заказ
+            # принимается, остальные получают 429
+            CONFIG.order_rate_limit = 0.001
+            CONFIG.order_rate_burst = 1
+            await _phase(client, order_ids, 1, 201)
+            results["rate_limited"] = await _phase(
+                client, order_ids, args.requests, 429
+            )
+
+            # Принятые заказы лежат в очереди, а воркеров нет: после двух
+            # замеров скорость обработки - 0, ожидание выше любого SLO
+            CONFIG.order_rate_limit = 0
+            CONFIG.order_wait_slo = 1
+            CONFIG.order_backpressure_min_depth = 1
+            backpressure.retry_after()
+            while backpressure.retry_after() is None:
+                await asyncio.sleep(CONFIG.order_backpressure_interval)
+            results["backpressure"] = await _phase(
+                client, order_ids, args.requests, 503
+            )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=1000)
+    add_target_arguments(parser)
+    args = parser.parse_args()
+
+    host, port, target = resolve_target(args)
+    configure_env(host, port)
+    logging.disable(logging.WARNING)
+    results = asyncio.run(_run(args))
+
+    params = {"requests": args.requests, "redis": target}
+    report("admission", params, results, args.output)
@@ -0,0 +1,77 @@
+"""
+Cold start of the API process: time to import backend.main (the module
+uvicorn loads), peak RSS after it and whether worker-side code got pulled in.
+Each sample is a fresh interpreter; Redis is not touched until the lifespan
+starts, so no server is needed.
+
+Run: python -m benchmarks.api_startup --repeat 20
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.common import report, summarize
+
+# Модули стороны воркера: в процессе API их быть не должно
+_WORKER_MODULES = (
+    "celery_service.celery_app",
+    "backend.tasks.worker_tasks",
+    "backend.notifications",
+    "fpdf",
+)
+
+_CHILD = """
+import json, resource, sys, time
+from benchmarks.common import configure_env
+configure_env("127.0.0.1", 6379)
+started = time.perf_counter()
+import backend.main
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    "import_s": elapsed,
+    "rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "modules": len(sys.modules),
+    "worker_modules": sorted(set(sys.argv[1:]) & set(sys.modules)),
+}))
+"""
+
+
+def _sample() -> dict:
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", _CHILD, *_WORKER_MODULES],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONPATH": os.getcwd()},
+    ).stdout
+    sample = json.loads(output.strip().splitlines()[-1])
+    sample["process_s"] = time.perf_counter() - started
+    return sample
+
+
+def run(args) -> dict:
+    # Первый запуск прогревает кэш байткода и файловый кэш ОС
+    _sample()
+    samples = [_sample() for _ in range(args.repeat)]
+    rss_mb = [sample["rss_kb"] / 1024 for sample in samples]
+    return {
+        "import_backend_main": summarize([sample["import_s"] for sample in samples]),
+        "process_start_to_exit": summarize([sample["process_s"] for sample in samples]),
+        "rss_mb_mean": sum(rss_mb) / len(rss_mb),
+        "rss_mb_max": max(rss_mb),
+        "modules_loaded": samples[-1]["modules"],
+        "worker_modules_loaded": samples[-1]["worker_modules"],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", default=None, help="write JSON results here")
+    args = parser.parse_args()
+    report("api_startup", {"repeat": args.repeat}, run(args), args.output)
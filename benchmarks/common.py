@@ -0,0 +1,157 @@
+"""
+Shared helpers of the benchmark harness: Redis target, env, stats, JSON output.
+"""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+
+def start_fake_redis() -> tuple[str, int]:
+    """In-process fakeredis TCP server on a free port"""
+    from fakeredis import TcpFakeServer
+
+    server = TcpFakeServer(("127.0.0.1", 0), server_type="redis")
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.server_address
+
+
+_FAKE_REDIS_PROCESS = """
+from fakeredis import TcpFakeServer
+server = TcpFakeServer(("127.0.0.1", 0), server_type="redis")
+server.daemon_threads = True
+print(server.server_address[1], flush=True)
+server.serve_forever()
+"""
+
+
+def start_fake_redis_process() -> tuple[str, int, subprocess.Popen]:
+    """
+    fakeredis TCP server in a separate process: several such servers stand in
+    for independent redis-server nodes (own interpreter, own GIL)
+    """
+    process = subprocess.Popen(
+        [sys.executable, "-c", _FAKE_REDIS_PROCESS], stdout=subprocess.PIPE, text=True
+    )
+    port = int(process.stdout.readline())
+    return "127.0.0.1", port, process
+
+
+def configure_env(host: str, port: int, **overrides: str) -> None:
+    """
+    Настройки приложения для прогона. Вызывается до импорта backend/celery_service,
+    потому что CONFIG и приложение Celery читают окружение при импорте.
+    """
+    defaults = {
+        "REDIS_HOST": host,
+        "REDIS_PORT": str(port),
+        "REDIS_DB": "0",
+        "REDIS_MAX_CONNECTIONS": "50",
+        "REDIS_SOCKET_TIMEOUT": "5",
+        "REDIS_DECODE_RESPONSES": "true",
+        "CELERY_BROKER_DSN": f"redis://{host}:{port}/0",
+        "CELERY_BACKEND_DSN": f"redis://{host}:{port}/1",
+    }
+    defaults.update(overrides)
+    for name, value in defaults.items():
+        os.environ[name] = value
+
+
+def add_target_arguments(parser) -> None:
+    parser.add_argument(
+        "--redis-host",
+        default=None,
+        help="real redis-server; fakeredis in-process server when omitted",
+    )
+    parser.add_argument("--redis-port", type=int, default=6379)
+    parser.add_argument("--output", default=None, help="write JSON results here")
+
+
+def resolve_target(args) -> tuple[str, int, str]:
+    if args.redis_host is None:
+        host, port = start_fake_redis()
+        return host, port, "fakeredis"
+    return args.redis_host, args.redis_port, "redis-server"
+
+
+def summarize(latencies: list[float], elapsed: float | None = None) -> dict:
+    """Перцентили в миллисекундах и пропускная способность в операциях/с"""
+    if not latencies:
+        return {"count": 0}
+    ordered = sorted(latencies)
+
+    def percentile(fraction: float) -> float:
+        index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+        return ordered[index] * 1000
+
+    result = {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "max_ms": ordered[-1] * 1000,
+    }
+    if elapsed is None:
+        elapsed = sum(ordered)
+    result["throughput_per_s"] = len(ordered) / elapsed if elapsed else 0.0
+    return result
+
+
+def measure(func, repeat: int) -> dict:
+    """Последовательные вызовы синхронной функции"""
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - started)
+    return summarize(latencies)
+
+
+async def measure_async(func, repeat: int) -> dict:
+    """Последовательные вызовы корутинной функции"""
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        latencies.append(time.perf_counter() - started)
+    return summarize(latencies)
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def report(name: str, params: dict, results: dict, output: str | None) -> dict:
+    """JSON с метаданными прогона: в файл (для сравнения прогонов) или в stdout"""
+    document = {
+        "benchmark": name,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_revision": _git_revision(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "params": params,
+        "results": results,
+    }
+    text = json.dumps(document, indent=2, default=str)
+    if output:
+        with open(output, "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+    return document
@@ -0,0 +1,130 @@
+"""
+Latency of individual hot functions: invoice rendering, Redis client calls
+and the beat scans over a populated keyspace.
+
+Run: python -m benchmarks.hot_paths --repeat 500 --products 10000 --pending 10000
+     python -m benchmarks.hot_paths --redis-host localhost --output hot.json
+"""
+
+import argparse
+import asyncio
+import logging
+import tempfile
+import time
+
+from benchmarks.common import (
+    add_target_arguments,
+    configure_env,
+    measure,
+    measure_async,
+    report,
+    resolve_target,
+)
+
+
+def _seed(products: int, pending: int) -> None:
+    import json
+
+    from backend.registry import backend_redis
+    from backend.storage.db.keys import (
+        PENDING_ORDERS_KEY,
+        PENDING_ORDERS_PAYLOAD_KEY,
+        stock_key,
+    )
+
+    backend_redis.ensure_connected()
+    backend_redis.mset({stock_key(f"sku{index}"): 100 for index in range(products)})
+    # Свежие ожидающие заказы: check_pending_orders должен читать только
+    # просроченный хвост индекса, то есть ничего
+    now = time.time()
+    with backend_redis.client.pipeline(transaction=False) as pipe:
+        pipe.zadd(PENDING_ORDERS_KEY, {str(index): now for index in range(pending)})
+        pipe.hset(
+            PENDING_ORDERS_PAYLOAD_KEY,
+            mapping={
+                str(index): json.dumps({"order_id": index}) for index in range(pending)
+            },
+        )
+        pipe.execute()
+
+
+def _sync_benchmarks(repeat: int, beat_repeat: int) -> dict:
+    from backend.invoice import render_invoice
+    from backend.registry import backend_redis
+    from backend.tasks.beat_tasks import check_pending_orders, daily_stock_report
+    from backend.utils import create_invoice
+
+    items = [{"product": "iphone", "quantity": 2}]
+    render_invoice(0, items)
+    reserve_ids = iter(range(10**9, 2 * 10**9))
+
+    return {
+        "create_invoice": measure(lambda: create_invoice(1, items), repeat),
+        "render_invoice": measure(lambda: render_invoice(1, items), repeat),
+        "SyncRedisClient.get": measure(lambda: backend_redis.get("stock:sku0"), repeat),
+        "SyncRedisClient.reserve_stock": measure(
+            lambda: backend_redis.reserve_stock(
+                next(reserve_ids), [{"product": "sku1", "quantity": 0}]
+            ),
+            repeat,
+        ),
+        "daily_stock_report": measure(daily_stock_report, beat_repeat),
+        "check_pending_orders": measure(check_pending_orders, beat_repeat),
+    }
+
+
+async def _async_benchmarks(repeat: int) -> dict:
+    from backend.config import CONFIG
+    from backend.registry import async_backend_redis
+
+    await async_backend_redis.connect()
+    results = {}
+    try:
+        for coalesce in (False, True):
+            CONFIG.redis_coalesce_reads = coalesce
+            results[f"RedisClient.get[coalesce={coalesce}]"] = await measure_async(
+                lambda: async_backend_redis.get("stock:sku0"), repeat
+            )
+        results["RedisClient.mget[100]"] = await measure_async(
+            lambda: async_backend_redis.mget(*(f"stock:sku{i}" for i in range(100))),
+            repeat,
+        )
+    finally:
+        await async_backend_redis.close()
+    return results
+
+
+def run(args) -> dict:
+    from backend.notifications import get_dispatcher
+
+    logging.disable(logging.WARNING)
+    _seed(args.products, args.pending)
+    try:
+        results = _sync_benchmarks(args.repeat, args.beat_repeat)
+        results.update(asyncio.run(_async_benchmarks(args.repeat)))
+    finally:
+        get_dispatcher().close(timeout=10)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=300)
+    parser.add_argument("--beat-repeat", type=int, default=5)
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--pending", type=int, default=5000)
+    add_target_arguments(parser)
+    args = parser.parse_args()
+
+    host, port, target = resolve_target(args)
+    # Отчёт daily_stock_report пишется во временный каталог
+    configure_env(host, port, STOCK_REPORT_DIR=tempfile.mkdtemp())
+    results = run(args)
+
+    params = {
+        name: value
+        for name, value in vars(args).items()
+        if name not in ("output", "redis_host", "redis_port")
+    }
+    params["redis"] = target
+    report("hot_paths", params, results, args.output)
@@ -0,0 +1,44 @@
+"""
+Invoices per second: FPDF per invoice vs precompiled template.
+
+Run: python -m benchmarks.invoice --count 5000 --lines 5
+"""
+
+import argparse
+import time
+
+from backend.invoice import render_invoices
+from backend.utils import create_invoice
+
+
+def run(count: int, lines: int) -> dict[str, float]:
+    items = [{"product": f"sku{line}", "quantity": 2} for line in range(lines)]
+    orders = [{"order_id": order_id, "items": items} for order_id in range(count)]
+
+    started = time.perf_counter()
+    for order in orders:
+        create_invoice(**order)
+    create_invoice_rate = count / (time.perf_counter() - started)
+
+    # Заготовка строится вне замера, как и в воркере после первого заказа
+    render_invoices(orders[:1])
+    started = time.perf_counter()
+    render_invoices(orders)
+    render_invoices_rate = count / (time.perf_counter() - started)
+
+    return {
+        "create_invoice": create_invoice_rate,
+        "render_invoices": render_invoices_rate,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=5000)
+    parser.add_argument("--lines", type=int, default=1)
+    args = parser.parse_args()
+
+    results = run(args.count, args.lines)
+    for name, rate in results.items():
+        print(f"{name}: {rate:.0f} invoices/s")
+    print(f"speedup: {results['render_invoices'] / results['create_invoice']:.2f}x")
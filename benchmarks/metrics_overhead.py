@@ -0,0 +1,99 @@
+"""
+Cost of the metrics instrumentation: API requests and Redis commands with
+METRICS_ENABLED off and on.
+
+Run: python -m benchmarks.metrics_overhead --requests 5000
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+from benchmarks.common import (
+    add_target_arguments,
+    configure_env,
+    report,
+    resolve_target,
+    summarize,
+)
+
+
+async def _requests(client, count: int) -> list[float]:
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        # Ответ из кэша остатков: запрос почти ничего не стоит, накладные
+        # расходы метрик видны в чистом виде
+        response = await client.get("/api/stock/iphone")
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 200
+    return latencies
+
+
+async def _redis_commands(count: int) -> list[float]:
+    from backend.registry import async_backend_redis
+
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        await async_backend_redis.client.get("stock:iphone")
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+async def _run(args) -> dict:
+    import httpx
+
+    from backend.config import CONFIG
+    from backend.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://benchmark"
+        ) as client:
+            # Прогрев: подписка кэша остатков и соединения
+            await _requests(client, 100)
+            await asyncio.sleep(0.2)
+            # Режимы чередуются раундами, чтобы дрейф (GC, прогрев) не попал
+            # в разницу между ними
+            samples = {
+                f"{name}[metrics={enabled}]": []
+                for name in ("api_request", "redis_get")
+                for enabled in (False, True)
+            }
+            per_round = max(1, args.requests // args.rounds)
+            for _ in range(args.rounds):
+                for enabled in (False, True):
+                    CONFIG.metrics_enabled = enabled
+                    samples[f"api_request[metrics={enabled}]"] += await _requests(
+                        client, per_round
+                    )
+                    samples[f"redis_get[metrics={enabled}]"] += await _redis_commands(
+                        per_round
+                    )
+            results = {name: summarize(values) for name, values in samples.items()}
+
+    for name in ("api_request", "redis_get"):
+        off = results[f"{name}[metrics=False]"]["p50_ms"]
+        on = results[f"{name}[metrics=True]"]["p50_ms"]
+        # Медиана устойчивее среднего к паузам GC
+        results[f"{name}_p50_overhead_us"] = (on - off) * 1000
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--rounds", type=int, default=10)
+    add_target_arguments(parser)
+    args = parser.parse_args()
+
+    host, port, target = resolve_target(args)
+    configure_env(host, port)
+    logging.disable(logging.WARNING)
+    results = asyncio.run(_run(args))
+
+    params = {"requests": args.requests, "rounds": args.rounds, "redis": target}
+    report("metrics_overhead", params, results, args.output)
@@ -0,0 +1,73 @@
+"""
+Notifications per second in one worker process.
+
+Run: python -m benchmarks.notifications --count 2000 --latency 0.05
+     python -m benchmarks.notifications --transport smtp  (needs aiosmtpd)
+"""
+
+import argparse
+import logging
+import time
+
+from backend.notifications import NotificationDispatcher
+from backend.notifications.transports import LogTransport, SmtpTransport
+
+
+def run(
+    transport: str, count: int, latency: float, concurrency: int
+) -> dict[str, float]:
+    controller = None
+    if transport == "smtp":
+        from aiosmtpd.controller import Controller
+        from aiosmtpd.handlers import Sink
+
+        controller = Controller(Sink(), hostname="127.0.0.1", port=8025)
+        controller.start()
+
+        def factory():
+            return SmtpTransport(
+                host="127.0.0.1", port=8025, sender="bench@example.com"
+            )
+
+    else:
+
+        def factory():
+            return LogTransport(delay=latency)
+
+    dispatcher = NotificationDispatcher(
+        factory, concurrency=concurrency, max_pending=concurrency * 10
+    )
+    try:
+        started_cpu = time.process_time()
+        started = time.perf_counter()
+        futures = [
+            dispatcher.submit(f"user{index}@example.com", "Your order is ready")
+            for index in range(count)
+        ]
+        for future in futures:
+            future.result()
+        elapsed = time.perf_counter() - started
+        cpu = time.process_time() - started_cpu
+    finally:
+        dispatcher.close()
+        if controller is not None:
+            controller.stop()
+
+    return {
+        "notifications_per_second": count / elapsed,
+        "notifications_per_cpu_second": count / cpu if cpu else float("inf"),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--transport", choices=("log", "smtp"), default="log")
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, default=100)
+    args = parser.parse_args()
+
+    logging.getLogger("backend.notifications").setLevel(logging.WARNING)
+    results = run(args.transport, args.count, args.latency, args.concurrency)
+    for name, value in results.items():
+        print(f"{name}: {value:.0f}")
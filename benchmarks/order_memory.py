@@ -0,0 +1,145 @@
+"""
+Redis memory per processed order: the former layout (order:{id}:status and
+order:{id}:details strings) against one hash order:{id} with the fields the
+workers write now, retention TTL included.
+
+Needs a real redis-server: fakeredis does not implement INFO memory / MEMORY
+USAGE. The benchmark writes into --db, which must be empty, and flushes it
+after each layout.
+
+Run: python -m benchmarks.order_memory --redis-host localhost --orders 1000000
+"""
+
+import argparse
+import json
+import time
+import uuid
+
+from benchmarks.common import add_target_arguments, configure_env, report
+
+_PRODUCTS = 100
+_SAMPLE = 1000
+
+
+def _legacy(order_id: int, items: list[dict]) -> list[tuple]:
+    return [
+        ("set", f"order:{order_id}:status", "processed"),
+        ("set", f"order:{order_id}:details", json.dumps({"items": items})),
+    ]
+
+
+def _hash(order_id: int, items: list[dict]) -> list[tuple]:
+    from backend.config import CONFIG
+    from backend.storage.db.keys import order_key
+    from backend.storage.db.redis_client import _order_fields
+
+    now = f"{time.time():.6f}"
+    record = {
+        "email": f"user{order_id}@example.com",
+        "task_id": str(uuid.uuid4()),
+        "queued_at": now,
+    }
+    # Те же поля, что пишет RESERVE_STOCK
+    fields = ["status", "processed", "processed_at", now]
+    fields += _order_fields(items, record)
+    commands = [("hset", order_key(order_id), *fields)]
+    if CONFIG.order_retention_ttl:
+        commands.append(("expire", order_key(order_id), CONFIG.order_retention_ttl))
+    return commands
+
+
+def _items(order_id: int, cart_share: float) -> list[dict]:
+    line = {"product": f"sku{order_id % _PRODUCTS}", "quantity": 1 + order_id % 3}
+    if (order_id % 100) < cart_share * 100:
+        return [line, {"product": f"sku{(order_id + 1) % _PRODUCTS}", "quantity": 1}]
+    return [line]
+
+
+def _layout(client, name: str, build, args) -> dict:
+    client.flushdb()
+    before = client.info("memory")["used_memory"]
+    started = time.perf_counter()
+    for first in range(0, args.orders, args.batch):
+        with client.pipeline(transaction=False) as pipe:
+            for order_id in range(first, min(first + args.batch, args.orders)):
+                for command, *params in build(
+                    order_id, _items(order_id, args.cart_share)
+                ):
+                    getattr(pipe, command)(*params)
+            pipe.execute()
+    elapsed = time.perf_counter() - started
+    used = client.info("memory")["used_memory"] - before
+
+    step = max(1, args.orders // _SAMPLE)
+    sample = [
+        key
+        for order_id in range(0, args.orders, step)
+        for key in (
+            (f"order:{order_id}",)
+            if name == "hash"
+            else (f"order:{order_id}:status", f"order:{order_id}:details")
+        )
+    ]
+    with client.pipeline(transaction=False) as pipe:
+        for key in sample:
+            pipe.memory_usage(key, samples=0)
+        usage = pipe.execute()
+    orders_sampled = len(range(0, args.orders, step))
+
+    result = {
+        "keys": client.dbsize(),
+        "used_memory_bytes": used,
+        "bytes_per_order": used / args.orders,
+        "memory_usage_per_order": sum(usage) / orders_sampled,
+        "write_s": elapsed,
+    }
+    if name == "hash":
+        result["encoding"] = client.object("encoding", "order:0")
+    client.flushdb()
+    return result
+
+
+def run(args) -> dict:
+    import redis
+
+    client = redis.Redis(
+        host=args.redis_host, port=args.redis_port, db=args.db, decode_responses=True
+    )
+    if client.dbsize():
+        raise SystemExit(f"Redis db {args.db} is not empty, pick another --db")
+    try:
+        results = {
+            "legacy": _layout(client, "legacy", _legacy, args),
+            "hash": _layout(client, "hash", _hash, args),
+        }
+    finally:
+        client.close()
+    results["reduction_ratio"] = (
+        results["legacy"]["bytes_per_order"] / results["hash"]["bytes_per_order"]
+    )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--batch", type=int, default=10_000)
+    parser.add_argument(
+        "--cart-share", type=float, default=0.1, help="share of two-line orders"
+    )
+    parser.add_argument("--db", type=int, default=15)
+    add_target_arguments(parser)
+    args = parser.parse_args()
+    if args.redis_host is None:
+        parser.error("--redis-host is required: fakeredis does not report memory")
+
+    configure_env(args.redis_host, args.redis_port)
+    results = run(args)
+
+    params = {
+        name: value
+        for name, value in vars(args).items()
+        if name not in ("output", "redis_host", "redis_port")
+    }
+    params["redis"] = "redis-server"
+    report("order_memory", params, results, args.output)
@@ -0,0 +1,208 @@
+"""
+Orders per second through the two order pipelines (ORDER_PIPELINE): a Celery
+process_order task per order against the Redis Streams consumer reading
+orders:stream in batches.
+
+Orders are submitted through the FastAPI app (ASGI client, admission control
+off); the order worker runs as a separate process: `celery_service.worker
+default` or `backend.tasks.order_stream`. Follow-up tasks (notifications,
+invoices) are published in both modes and left in the broker.
+
+Run: python -m benchmarks.order_stream --orders 2000 --concurrency 20
+     python -m benchmarks.order_stream --redis-host localhost --output stream.json
+"""
+
+import argparse
+import asyncio
+import logging
+import subprocess
+import sys
+import time
+
+from benchmarks.common import (
+    add_target_arguments,
+    configure_env,
+    report,
+    resolve_target,
+    start_fake_redis_process,
+    summarize,
+)
+
+PRODUCT = "benchmark"
+
+_WORKERS = {
+    "celery": ["-m", "celery_service.worker", "default", "--loglevel=warning"],
+    "stream": ["-m", "backend.tasks.order_stream"],
+}
+
+
+def _wait_ready(pipeline: str, timeout: float = 60.0) -> None:
+    from backend.config import CONFIG
+    from backend.registry import backend_redis
+    from backend.storage.db.keys import ORDER_STREAM_KEY
+    from celery_service.celery_app import CELERY
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if pipeline == "celery":
+            if CELERY.control.ping(timeout=0.5):
+                return
+            continue
+        try:
+            if backend_redis.client.xinfo_consumers(
+                ORDER_STREAM_KEY, CONFIG.order_stream_group
+            ):
+                return
+        except Exception:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"{pipeline} worker did not start")
+
+
+async def _drive(client, args, id_base: int) -> dict:
+    from backend.registry import async_backend_redis
+
+    order_ids = list(range(id_base, id_base + args.orders))
+    pending = iter(order_ids)
+    submitted: dict[int, float] = {}
+    submit_latencies: list[float] = []
+
+    async def client_loop() -> None:
+        for order_id in pending:
+            started = time.perf_counter()
+            response = await client.post(
+                "/api/order/",
+                json={
+                    "order_id": order_id,
+                    "product": PRODUCT,
+                    "quantity": 1,
+                    "email": f"user{order_id}@example.com",
+                },
+            )
+            assert response.status_code == 201, response.status_code
+            submitted[order_id] = started
+            submit_latencies.append(time.perf_counter() - started)
+
+    async def watch() -> tuple[list[float], float | None, int]:
+        latencies: list[float] = []
+        waiting = set(order_ids)
+        deadline = time.perf_counter() + args.timeout
+        done_at = None
+        while waiting and time.perf_counter() < deadline:
+            await asyncio.sleep(args.poll_interval)
+            now = time.perf_counter()
+            batch = [order_id for order_id in waiting if order_id in submitted]
+            if not batch:
+                continue
+            statuses = await async_backend_redis.order_statuses(batch)
+            for order_id, value in zip(batch, statuses):
+                if value is not None:
+                    waiting.discard(order_id)
+                    latencies.append(now - submitted[order_id])
+            if not waiting:
+                done_at = now
+        return latencies, done_at, len(waiting)
+
+    started = time.perf_counter()
+    watcher = asyncio.create_task(watch())
+    await asyncio.gather(*(client_loop() for _ in range(args.concurrency)))
+    submit_elapsed = time.perf_counter() - started
+    latencies, done_at, unfinished = await watcher
+
+    elapsed = done_at - started if done_at else None
+    return {
+        "submit": summarize(submit_latencies, submit_elapsed),
+        "processed": summarize(latencies, elapsed),
+        "orders_per_s": args.orders / elapsed if elapsed else None,
+        "unfinished": unfinished,
+    }
+
+
+async def _run(args) -> dict:
+    import httpx
+
+    from backend.config import CONFIG
+    from backend.main import app
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://benchmark"
+        ) as client:
+            for pipeline in args.pipelines:
+                CONFIG.order_pipeline = pipeline
+                worker = subprocess.Popen(
+                    [sys.executable, *_WORKERS[pipeline]], stderr=subprocess.DEVNULL
+                )
+                try:
+                    await asyncio.to_thread(_wait_ready, pipeline)
+                    id_base = int(time.time() * 1000) * 1000
+                    results[pipeline] = await _drive(client, args, id_base)
+                finally:
+                    worker.terminate()
+                    worker.wait(timeout=30)
+    return results
+
+
+def run(args) -> dict:
+    from backend.registry import backend_redis
+    from backend.storage.db.keys import stock_key
+
+    logging.disable(logging.WARNING)
+    backend_redis.set(stock_key(PRODUCT), 10**9)
+
+    results = asyncio.run(_run(args))
+
+    if "celery" in results and "stream" in results:
+        celery, stream = (
+            results["celery"]["orders_per_s"],
+            results["stream"]["orders_per_s"],
+        )
+        if celery and stream:
+            results["speedup"] = stream / celery
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--pipelines",
+        nargs="+",
+        default=["celery", "stream"],
+        choices=("celery", "stream"),
+    )
+    parser.add_argument("--orders", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--poll-interval", type=float, default=0.05)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    add_target_arguments(parser)
+    args = parser.parse_args()
+
+    server = None
+    if args.redis_host is None:
+        # Воркер - отдельный процесс, ему нужен Redis вне процесса бенчмарка
+        host, port, server = start_fake_redis_process()
+        target = "fakeredis"
+    else:
+        host, port, target = resolve_target(args)
+    configure_env(
+        host,
+        port,
+        METRICS_ENABLED="false",
+        ORDER_RATE_LIMIT="0",
+        ORDER_WAIT_SLO="0",
+    )
+    try:
+        results = run(args)
+    finally:
+        if server is not None:
+            server.terminate()
+
+    params = {
+        name: value
+        for name, value in vars(args).items()
+        if name not in ("output", "redis_host", "redis_port")
+    }
+    params["redis"] = target
+    report("order_stream", params, results, args.output)
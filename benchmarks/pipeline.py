@@ -0,0 +1,167 @@
+"""
+End-to-end order pipeline: submit -> processed -> invoice available.
+
+The FastAPI app is driven in-process through an ASGI client; Celery tasks run
+eagerly inside the request, in an embedded worker consuming from the broker,
+or in an external worker started separately against the same Redis.
+
+Run: python -m benchmarks.pipeline --mode eager --orders 500 --concurrency 20
+     python -m benchmarks.pipeline --mode worker --worker-pool threads --worker-concurrency 8
+     python -m benchmarks.pipeline --mode external --redis-host localhost --output run.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import logging
+import time
+
+from benchmarks.common import (
+    add_target_arguments,
+    configure_env,
+    report,
+    resolve_target,
+    summarize,
+)
+
+PRODUCT = "benchmark"
+
+
+async def _drive(args, id_base: int) -> dict:
+    import httpx
+
+    from backend.main import app
+    from backend.models.order.enums import OrderStatus
+    from backend.registry import async_backend_redis
+    from backend.storage.db.keys import order_key
+
+    stages: dict[str, list[float]] = {"submit": [], "processed": [], "invoice": []}
+    failed = 0
+    order_ids = iter(range(id_base, id_base + args.orders))
+
+    async def wait_for(check) -> bool:
+        deadline = time.perf_counter() + args.timeout
+        while time.perf_counter() < deadline:
+            if await check():
+                return True
+            await asyncio.sleep(args.poll_interval)
+        return False
+
+    async def client_loop(client: httpx.AsyncClient) -> None:
+        nonlocal failed
+        for order_id in order_ids:
+            started = time.perf_counter()
+            response = await client.post(
+                "/api/order/",
+                json={
+                    "order_id": order_id,
+                    "product": PRODUCT,
+                    "quantity": 1,
+                    "email": f"user{order_id}@example.com",
+                },
+            )
+            if response.status_code != 201:
+                failed += 1
+                continue
+            stages["submit"].append(time.perf_counter() - started)
+
+            async def processed() -> bool:
+                value = await async_backend_redis.hget(order_key(order_id), "status")
+                return value == OrderStatus.PROCESSED
+
+            if not await wait_for(processed):
+                failed += 1
+                continue
+            stages["processed"].append(time.perf_counter() - started)
+
+            async def invoice_ready() -> bool:
+                response = await client.get(f"/api/invoice/{order_id}")
+                return response.status_code == 200
+
+            if not await wait_for(invoice_ready):
+                failed += 1
+                continue
+            stages["invoice"].append(time.perf_counter() - started)
+
+    async with app.router.lifespan_context(app):
+        await async_backend_redis.set_stock(PRODUCT, args.orders)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://benchmark"
+        ) as client:
+            started = time.perf_counter()
+            await asyncio.gather(
+                *(client_loop(client) for _ in range(args.concurrency))
+            )
+            elapsed = time.perf_counter() - started
+
+    results = {
+        stage: summarize(latencies, elapsed) for stage, latencies in stages.items()
+    }
+    results["failed"] = failed
+    results["elapsed_s"] = elapsed
+    return results
+
+
+def run(args) -> dict:
+    from celery_service.celery_app import CELERY
+    from celery_service.queues import QUEUES
+    from backend.notifications import get_dispatcher
+
+    # API отправляет задачи по имени: для eager и встроенного воркера их код
+    # регистрируется в приложении здесь
+    import backend.tasks.worker_tasks  # noqa: F401
+
+    # Логи задач на каждый заказ искажают замер
+    logging.disable(logging.WARNING)
+
+    worker = contextlib.nullcontext()
+    if args.mode == "eager":
+        CELERY.conf.task_always_eager = True
+    elif args.mode == "worker":
+        from celery.contrib.testing.worker import start_worker
+
+        worker = start_worker(
+            CELERY,
+            pool=args.worker_pool,
+            concurrency=args.worker_concurrency,
+            perform_ping_check=False,
+            loglevel="WARNING",
+            queues=list(QUEUES),
+        )
+
+    # Уникальные id, чтобы повторные прогоны на том же Redis не были дублями
+    id_base = int(time.time() * 1000) * 1000
+    try:
+        with worker:
+            return asyncio.run(_drive(args, id_base))
+    finally:
+        get_dispatcher().close(timeout=10)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--mode", choices=("eager", "worker", "external"), default="eager"
+    )
+    parser.add_argument("--orders", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--worker-pool", default="threads")
+    parser.add_argument("--worker-concurrency", type=int, default=4)
+    parser.add_argument("--poll-interval", type=float, default=0.005)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    add_target_arguments(parser)
+    args = parser.parse_args()
+
+    host, port, target = resolve_target(args)
+    # Замеряется конвейер, а не допуск: все клиенты прогона - один адрес
+    configure_env(host, port, ORDER_RATE_LIMIT="0", ORDER_WAIT_SLO="0")
+    results = run(args)
+
+    params = {
+        name: value
+        for name, value in vars(args).items()
+        if name not in ("output", "redis_host", "redis_port")
+    }
+    params["redis"] = target
+    report("pipeline", params, results, args.output)
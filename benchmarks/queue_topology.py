@@ -0,0 +1,205 @@
+"""
+Orders per second under mixed load: process_order interleaved with invoice
+rendering, with invoices sharing the order worker (one prefork worker on
+both queues, Celery defaults) or on their own queue and pool
+(celery_service/queues.py).
+
+Workers run as separate processes against the same Redis.
+
+Run: python -m benchmarks.queue_topology --orders 1000 --invoices 3000
+     python -m benchmarks.queue_topology --redis-host localhost --output topology.json
+"""
+
+import argparse
+import logging
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.common import (
+    add_target_arguments,
+    configure_env,
+    report,
+    resolve_target,
+    start_fake_redis_process,
+    summarize,
+)
+
+PRODUCT = "benchmark"
+
+
+def _workers(topology: str) -> list[list[str]]:
+    if topology == "shared":
+        # Прежняя схема: инвойсы и заказы в одном prefork-воркере
+        return [
+            [
+                "-m",
+                "celery",
+                "-A",
+                "celery_service.celery_app",
+                "worker",
+                "--queues=default,invoices",
+                "--pool=prefork",
+                f"--concurrency={os.cpu_count() or 1}",
+                "--loglevel=warning",
+            ]
+        ]
+    return [
+        ["-m", "celery_service.worker", queue, "--loglevel=warning"]
+        for queue in ("default", "invoices")
+    ]
+
+
+def _wait_ready(expected: int, timeout: float = 60.0) -> None:
+    from celery_service.celery_app import CELERY
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if len(CELERY.control.ping(timeout=0.5)) >= expected:
+            return
+    raise RuntimeError("Celery workers did not start")
+
+
+def _drive(args, id_base: int) -> dict:
+    from backend.registry import backend_redis
+    from backend.storage.db.keys import invoice_key
+    from backend.tasks.worker_tasks import generate_invoice, process_order
+
+    order_ids = list(range(id_base, id_base + args.orders))
+    invoice_ids = list(
+        range(id_base + args.orders, id_base + args.orders + args.invoices)
+    )
+    items = [{"product": PRODUCT, "quantity": 1}]
+    invoice_items = [
+        {"product": f"sku{line}", "quantity": 1} for line in range(args.invoice_lines)
+    ]
+    enqueued: dict[int, float] = {}
+
+    started = time.perf_counter()
+    per_order = args.invoices / max(1, args.orders)
+    pending_invoices = iter(invoice_ids)
+    budget = 0.0
+    for order_id in order_ids:
+        # Инвойсы идут вперемешку с заказами, как при реальной нагрузке
+        budget += per_order
+        while budget >= 1:
+            generate_invoice.apply_async(
+                kwargs={"order_id": next(pending_invoices), "items": invoice_items}
+            )
+            budget -= 1
+        enqueued[order_id] = time.perf_counter()
+        process_order.apply_async(
+            kwargs={
+                "order_id": order_id,
+                "items": items,
+                "email": f"user{order_id}@example.com",
+            }
+        )
+    for invoice_id in pending_invoices:
+        generate_invoice.apply_async(
+            kwargs={"order_id": invoice_id, "items": invoice_items}
+        )
+
+    latencies: list[float] = []
+    waiting_orders = set(order_ids)
+    waiting_invoices = set(invoice_ids)
+    orders_done = invoices_done = None
+    deadline = time.perf_counter() + args.timeout
+    while (waiting_orders or waiting_invoices) and time.perf_counter() < deadline:
+        time.sleep(args.poll_interval)
+        now = time.perf_counter()
+        if waiting_orders:
+            batch = list(waiting_orders)
+            statuses = backend_redis.order_statuses(batch)
+            for order_id, value in zip(batch, statuses):
+                if value is not None:
+                    waiting_orders.discard(order_id)
+                    latencies.append(now - enqueued[order_id])
+            if not waiting_orders:
+                orders_done = now - started
+        if waiting_invoices:
+            batch = list(waiting_invoices)
+            with backend_redis.client.pipeline(transaction=False) as pipe:
+                for invoice_id in batch:
+                    pipe.exists(invoice_key(invoice_id))
+                found = pipe.execute()
+            waiting_invoices.difference_update(
+                invoice_id for invoice_id, exists in zip(batch, found) if exists
+            )
+            if not waiting_invoices:
+                invoices_done = now - started
+
+    result = summarize(latencies, orders_done)
+    result["orders_done_s"] = orders_done
+    result["invoices_done_s"] = invoices_done
+    result["invoices_per_s"] = args.invoices / invoices_done if invoices_done else None
+    result["unfinished_orders"] = len(waiting_orders)
+    result["unfinished_invoices"] = len(waiting_invoices)
+    return result
+
+
+def run(args) -> dict:
+    from backend.registry import backend_redis
+    from backend.storage.db.keys import stock_key
+
+    logging.disable(logging.WARNING)
+    backend_redis.set(stock_key(PRODUCT), 10**9)
+
+    results = {}
+    for topology in args.topologies:
+        commands = _workers(topology)
+        workers = [
+            subprocess.Popen([sys.executable, *command], stderr=subprocess.DEVNULL)
+            for command in commands
+        ]
+        try:
+            _wait_ready(len(workers))
+            id_base = int(time.time() * 1000) * 1000
+            results[topology] = _drive(args, id_base)
+        finally:
+            for worker in workers:
+                worker.terminate()
+            for worker in workers:
+                worker.wait(timeout=30)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--topologies",
+        nargs="+",
+        default=["shared", "split"],
+        choices=("shared", "split"),
+    )
+    parser.add_argument("--orders", type=int, default=500)
+    parser.add_argument("--invoices", type=int, default=1500)
+    parser.add_argument("--invoice-lines", type=int, default=10)
+    parser.add_argument("--poll-interval", type=float, default=0.1)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    add_target_arguments(parser)
+    args = parser.parse_args()
+
+    server = None
+    if args.redis_host is None:
+        # Воркеры - отдельные процессы, им нужен Redis вне процесса бенчмарка
+        host, port, server = start_fake_redis_process()
+        target = "fakeredis"
+    else:
+        host, port, target = resolve_target(args)
+    configure_env(host, port, METRICS_ENABLED="false", NOTIFICATION_TRANSPORT="log")
+    try:
+        results = run(args)
+    finally:
+        if server is not None:
+            server.terminate()
+
+    params = {
+        name: value
+        for name, value in vars(args).items()
+        if name not in ("output", "redis_host", "redis_port")
+    }
+    params["redis"] = target
+    params["cpus"] = os.cpu_count()
+    report("queue_topology", params, results, args.output)
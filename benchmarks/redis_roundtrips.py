@@ -0,0 +1,85 @@
+"""
+Redis round trips per request for concurrent single-key reads of the async client.
+
+Run: python -m benchmarks.redis_roundtrips --requests 1000
+     (without --host starts an in-process fakeredis server, needs fakeredis)
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+
+from redis.asyncio.connection import AbstractConnection
+
+from backend.config import CONFIG
+from backend.registry import async_backend_redis
+
+
+class RoundTripCounter:
+    """Считает команды и пачки команд, отправленные в сокет"""
+
+    def __init__(self):
+        self.round_trips = 0
+        self._original = AbstractConnection.send_packed_command
+
+    def __enter__(self) -> "RoundTripCounter":
+        counter = self
+
+        async def send_packed_command(connection, command, check_health=True):
+            counter.round_trips += 1
+            return await counter._original(connection, command, check_health)
+
+        AbstractConnection.send_packed_command = send_packed_command
+        return self
+
+    def __exit__(self, *exc) -> None:
+        AbstractConnection.send_packed_command = self._original
+
+
+async def _run(requests: int, coalesce: bool) -> dict[str, float]:
+    CONFIG.redis_coalesce_reads = coalesce
+    keys = [f"order:{index}:status" for index in range(requests)]
+    await async_backend_redis.mset({key: "processed" for key in keys})
+
+    with RoundTripCounter() as counter:
+        started = time.perf_counter()
+        # Как N одновременных запросов к API, каждый читает свой ключ
+        values = await asyncio.gather(*map(async_backend_redis.get, keys))
+        elapsed = time.perf_counter() - started
+    assert all(value == "processed" for value in values)
+
+    return {
+        "round_trips_per_request": counter.round_trips / requests,
+        "requests_per_second": requests / elapsed,
+    }
+
+
+async def main(requests: int) -> None:
+    await async_backend_redis.connect()
+    try:
+        for coalesce in (False, True):
+            results = await _run(requests, coalesce)
+            print(f"coalesce_reads={coalesce}")
+            for name, value in results.items():
+                print(f"  {name}: {value:.3f}")
+    finally:
+        await async_backend_redis.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--port", type=int, default=6379)
+    args = parser.parse_args()
+
+    if args.host is None:
+        from fakeredis import TcpFakeServer
+
+        server = TcpFakeServer(("127.0.0.1", 0), server_type="redis")
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        args.host, args.port = server.server_address
+
+    CONFIG.redis_host, CONFIG.redis_port = args.host, args.port
+    asyncio.run(main(args.requests))
@@ -0,0 +1,153 @@
+"""
+Throughput of the storage hot path as Redis nodes are added: stock, order and
+invoice rings over the first 1..N nodes (see backend/storage/db/router.py).
+
+Each client process runs reserve_stock on unique one-line orders and reads the
+order status back, so every operation touches a stock key and an order's keys.
+When the product and the order land on different nodes the reservation takes
+the cross-node path, its share is reported as cross_node_share.
+
+Run: python -m benchmarks.sharding --max-nodes 3 --clients 8 --orders 2000
+     python -m benchmarks.sharding --nodes localhost:6380,localhost:6381,localhost:6382
+"""
+
+import argparse
+import multiprocessing
+import time
+
+from benchmarks.common import (
+    configure_env,
+    report,
+    start_fake_redis_process,
+    summarize,
+)
+
+
+def _node_overrides(nodes: list[str]) -> dict[str, str]:
+    spec = ",".join(nodes)
+    return {
+        "REDIS_STOCK_NODES": spec,
+        "REDIS_ORDER_NODES": spec,
+        "REDIS_INVOICE_NODES": spec,
+        "METRICS_ENABLED": "false",
+    }
+
+
+def _client(task: tuple) -> tuple[list[float], int, float]:
+    main, nodes, products, first_id, orders, start_at = task
+    host, port = main.split(":")
+    configure_env(host, int(port), **_node_overrides(nodes))
+
+    from backend.registry import backend_redis
+    from backend.storage.db.keys import order_key
+    from backend.storage.db.redis_client import _colocated
+    from backend.storage.db.router import get_router
+
+    backend_redis.ensure_connected()
+    for node in get_router().nodes_for_pattern("stock:*"):
+        backend_redis._node(node).ping()
+
+    latencies = []
+    cross_node = 0
+    # Общий старт: замер не включает запуск интерпретаторов
+    time.sleep(max(0.0, start_at - time.time()))
+    for order_id in range(first_id, first_id + orders):
+        product = f"sku{order_id % products}"
+        cross_node += not _colocated(order_id, {product: 1})
+        started = time.perf_counter()
+        backend_redis.reserve_stock(order_id, [{"product": product, "quantity": 1}])
+        backend_redis.hget(order_key(order_id), "status")
+        latencies.append(time.perf_counter() - started)
+    return latencies, cross_node, time.time()
+
+
+def _seed(main: str, nodes: list[str], products: int) -> None:
+    host, port = main.split(":")
+    configure_env(host, int(port), **_node_overrides(nodes))
+
+    from backend.registry import backend_redis
+    from backend.storage.db.keys import stock_key
+
+    backend_redis.mset({stock_key(f"sku{index}"): 10**9 for index in range(products)})
+    backend_redis.close()
+
+
+def run(args, nodes: list[str]) -> dict:
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    # Процессы spawn импортируют backend заново, поэтому каждая конфигурация
+    # узлов получает свой CONFIG и свой роутер
+    for count in range(1, len(nodes) + 1):
+        active = nodes[:count]
+        with context.Pool(1) as seeder:
+            seeder.apply(_seed, (nodes[0], active, args.products))
+        id_base = int(time.time() * 1000) * 1000
+        start_at = time.time() + 2.0
+        tasks = [
+            (
+                nodes[0],
+                active,
+                args.products,
+                id_base + client * args.orders,
+                args.orders,
+                start_at,
+            )
+            for client in range(args.clients)
+        ]
+        with context.Pool(args.clients) as pool:
+            outcomes = pool.map(_client, tasks)
+        elapsed = max(finished for _, _, finished in outcomes) - start_at
+        latencies = [value for chunk, _, _ in outcomes for value in chunk]
+        summary = summarize(latencies, elapsed)
+        summary["cross_node_share"] = sum(cross for _, cross, _ in outcomes) / len(
+            latencies
+        )
+        results[f"nodes={count}"] = summary
+    base = results["nodes=1"]["throughput_per_s"]
+    for count in range(2, len(nodes) + 1):
+        results[f"nodes={count}"]["speedup"] = (
+            results[f"nodes={count}"]["throughput_per_s"] / base
+        )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--nodes",
+        default=None,
+        help="host:port of redis-server nodes; fakeredis processes when omitted",
+    )
+    parser.add_argument("--max-nodes", type=int, default=3)
+    parser.add_argument("--clients", type=int, default=6)
+    parser.add_argument("--orders", type=int, default=1000)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--output", default=None, help="write JSON results here")
+    args = parser.parse_args()
+
+    servers = []
+    if args.nodes:
+        nodes = [node.strip() for node in args.nodes.split(",")]
+        target = "redis-server"
+    else:
+        nodes = []
+        for _ in range(args.max_nodes):
+            host, port, process = start_fake_redis_process()
+            servers.append(process)
+            nodes.append(f"{host}:{port}")
+        target = "fakeredis"
+    try:
+        results = run(args, nodes)
+    finally:
+        for process in servers:
+            process.terminate()
+
+    params = {
+        name: value
+        for name, value in vars(args).items()
+        if name not in ("output", "nodes")
+    }
+    params["nodes"] = nodes
+    params["redis"] = target
+    params["cpus"] = multiprocessing.cpu_count()
+    report("sharding", params, results, args.output)
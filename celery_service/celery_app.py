@@ -1,28 +1,30 @@
-from celery import Celery
-from celery.signals import worker_shutdown, worker_ready
+"""
+Celery app of workers and beat: the producer app from client.py plus task
+modules, the beat schedule and worker signals. The API imports client.py only.
+"""
 
-from celery_service.config import celery_config
+import json
 import logging.config
+import os
+import time
+
+from celery.signals import (
+    task_postrun,
+    task_prerun,
+    task_revoked,
+    worker_init,
+    worker_process_shutdown,
+    worker_ready,
+    worker_shutdown,
+)
+
+from celery_service.client import CELERY, PROCESS_ORDER_TASK
 
 logging.config.fileConfig("backend/logging.conf")
 
 celery_logger = logging.getLogger(__name__)
 
-CELERY = Celery(
-    "worker",
-    broker=celery_config.celery_broker_dsn,
-    backend=celery_config.celery_backend_dsn,
-    include=["backend.tasks.worker_tasks", "backend.tasks.beat_tasks"],
-    result_expires=3600,
-)
-
-CELERY.conf.task_routes = {
-    "backend.tasks.worker_tasks.send_notification": {"queue": "priority"},
-    "backend.tasks.worker_tasks.process_order": {"queue": "default"},
-    "backend.tasks.worker_tasks.generate_invoice": {"queue": "default"},
-    "backend.tasks.beat_tasks.daily_stock_report": {"queue": "default"},
-    "backend.tasks.beat_tasks.check_pending_orders": {"queue": "default"},
-}
+CELERY.conf.include = ["backend.tasks.worker_tasks", "backend.tasks.beat_tasks"]
 
 CELERY.conf.beat_schedule = {
     "daily_stock_report": {
@@ -33,16 +35,37 @@ CELERY.conf.beat_schedule = {
         "task": "backend.tasks.beat_tasks.check_pending_orders",
         "schedule": 300.0,
     },
+    "flush_notification_digests": {
+        "task": "backend.tasks.beat_tasks.flush_notification_digests",
+        "schedule": 10.0,
+    },
 }
 
-CELERY.conf.update(
-    broker_connection_retry_on_startup=True,
-    task_serializer="json",
-    accept_content=["json"],
-    result_serializer="json",
-    timezone="UTC",
-    enable_utc=True,
-)
+
+@worker_init.connect
+def on_worker_init(sender=None, **kwargs):
+    """Размер пулов Redis по конкурентности воркера, до запуска процессов пула"""
+    from backend.storage.db.redis_client import SyncRedisClient
+
+    pool_cls = sender.pool_cls
+    pool_name = pool_cls if isinstance(pool_cls, str) else pool_cls.__module__
+    # prefork/solo: одна задача на процесс; threads/gevent/eventlet - concurrency
+    single_task = pool_name.split(":")[0].rsplit(".", 1)[-1] in (
+        "prefork",
+        "processes",
+        "solo",
+    )
+    SyncRedisClient.configure_pool(1 if single_task else sender.concurrency)
+
+    from backend.config import CONFIG
+
+    if CONFIG.metrics_enabled and CONFIG.metrics_worker_port:
+        from backend.metrics import start_worker_exporter
+
+        try:
+            start_worker_exporter(CONFIG.metrics_worker_port)
+        except OSError as e:
+            celery_logger.error(f"Failed to start metrics exporter: {e}")
 
 
 @worker_ready.connect
@@ -53,19 +76,32 @@ def on_worker_ready(**kwargs):
     try:
         from backend.registry import broker_redis, backend_redis
 
-        if not broker_redis.client:
-            broker_redis.connect()
-        if not backend_redis.client:
-            backend_redis.connect()
+        broker_redis.ensure_connected()
+        backend_redis.ensure_connected()
 
         celery_logger.info("Redis connected for Celery worker")
     except Exception as e:
         celery_logger.error(f"Failed to connect Redis in worker: {e}")
 
 
+def _close_notifications() -> None:
+    """Досылка принятых уведомлений перед остановкой процесса"""
+    try:
+        from backend.notifications import get_dispatcher
+
+        # Вне процесса, где dispatcher запущен, close() ничего не делает
+        get_dispatcher().close(timeout=30)
+    except Exception as e:
+        celery_logger.error(f"Error closing notification dispatcher: {e}")
+
+
 @worker_shutdown.connect
 def on_worker_shutdown(**kwargs):
     """Graceful shutdown для Celery"""
+    # Пулы threads и solo выполняют задачи в главном процессе воркера, и
+    # worker_process_shutdown для них не приходит
+    _close_notifications()
+
     celery_logger.info("Celery worker shutting down, closing Redis connections...")
 
     try:
@@ -76,3 +112,77 @@ def on_worker_shutdown(**kwargs):
         celery_logger.info("Redis connections closed successfully")
     except Exception as e:
         celery_logger.error(f"Error closing Redis connections: {e}")
+
+
+@worker_process_shutdown.connect
+def on_worker_process_shutdown(**kwargs):
+    """Остановка дочернего процесса пула prefork"""
+    _close_notifications()
+
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def _publish_task_status(task_id: str, status: str, counter: str | None = None) -> None:
+    """Публикация смены состояния задачи для потоковых подписчиков API"""
+    try:
+        from backend.registry import backend_redis
+        from backend.storage.db.keys import TASK_STATUS_CHANNEL
+
+        backend_redis.publish(
+            TASK_STATUS_CHANNEL,
+            json.dumps({"task_id": task_id, "status": status}),
+            counter=counter,
+        )
+    except Exception as e:
+        celery_logger.error(f"Failed to publish status of task {task_id}: {e}")
+
+
+# Начало выполнения задач процесса для celery_task_runtime_seconds
+_task_started: dict[str, float] = {}
+
+
+@task_prerun.connect
+def on_task_prerun(task_id=None, task=None, **kwargs):
+    _publish_task_status(task_id, "STARTED")
+
+    from backend.config import CONFIG
+
+    if CONFIG.metrics_enabled:
+        from backend.metrics import TASK_WAIT
+
+        _task_started[task_id] = time.perf_counter()
+        published_at = task.request.get("published_at") if task else None
+        if published_at:
+            TASK_WAIT.labels(task.name).observe(max(0.0, time.time() - published_at))
+
+
+@task_postrun.connect
+def on_task_postrun(task_id=None, task=None, state=None, **kwargs):
+    # Сигнал приходит после записи результата в backend
+    if state:
+        # Обработанные заказы считаются тем же вызовом: по счётчику API
+        # оценивает пропускную способность воркеров (admission.py)
+        counter = None
+        if task is not None and task.name == PROCESS_ORDER_TASK:
+            from backend.storage.db.keys import ORDERS_PROCESSED_KEY
+
+            counter = ORDERS_PROCESSED_KEY
+        _publish_task_status(task_id, state, counter)
+
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        from backend.metrics import TASK_RUNTIME, TASKS, observe_pools
+        from backend.storage.db.redis_client import iter_pools
+
+        TASK_RUNTIME.labels(task.name).observe(time.perf_counter() - started)
+        TASKS.labels(task.name, state or "UNKNOWN").inc()
+        observe_pools(iter_pools())
+
+
+@task_revoked.connect
+def on_task_revoked(request=None, **kwargs):
+    if request is not None:
+        _publish_task_status(request.id, "REVOKED")
@@ -0,0 +1,66 @@
+"""
+Celery app as seen by task producers: broker, routing and message settings,
+plus signatures of the tasks the API sends. It imports no task code, so the
+API process does not load the worker side (fpdf, notification transports,
+worker signals); celery_app.py extends the same app for workers and beat.
+"""
+
+import time
+
+from celery import Celery
+from celery.signals import before_task_publish
+
+from celery_service.config import celery_config
+from celery_service.queues import (
+    DEFAULT_QUEUE,
+    INVOICE_QUEUE,
+    PRIORITY_QUEUE,
+    task_annotations,
+)
+
+PROCESS_ORDER_TASK = "backend.tasks.worker_tasks.process_order"
+SEND_NOTIFICATION_TASK = "backend.tasks.worker_tasks.send_notification"
+GENERATE_INVOICE_TASK = "backend.tasks.worker_tasks.generate_invoice"
+
+CELERY = Celery(
+    "worker",
+    broker=celery_config.celery_broker_dsn,
+    backend=celery_config.celery_backend_dsn,
+    result_expires=3600,
+)
+
+CELERY.conf.task_routes = {
+    SEND_NOTIFICATION_TASK: {"queue": PRIORITY_QUEUE},
+    PROCESS_ORDER_TASK: {"queue": DEFAULT_QUEUE},
+    GENERATE_INVOICE_TASK: {"queue": INVOICE_QUEUE},
+    "backend.tasks.worker_tasks.generate_invoices": {"queue": INVOICE_QUEUE},
+    "backend.tasks.beat_tasks.daily_stock_report": {"queue": DEFAULT_QUEUE},
+    "backend.tasks.beat_tasks.check_pending_orders": {"queue": DEFAULT_QUEUE},
+    "backend.tasks.beat_tasks.flush_notification_digests": {"queue": PRIORITY_QUEUE},
+}
+# acks_late - по очереди задачи: повтор после падения воркера безопасен для
+# заказов (проверка дубля) и инвойсов, но не для уже отправленных уведомлений
+CELERY.conf.task_annotations = task_annotations(CELERY.conf.task_routes)
+
+CELERY.conf.update(
+    broker_connection_retry_on_startup=True,
+    task_serializer="json",
+    accept_content=["json"],
+    result_serializer="json",
+    timezone="UTC",
+    enable_utc=True,
+)
+
+# Задачи по имени: в процессе без кода задач сообщение уходит через
+# send_task с теми же маршрутами, в воркере - через зарегистрированную задачу
+process_order = CELERY.signature(PROCESS_ORDER_TASK)
+send_notification = CELERY.signature(SEND_NOTIFICATION_TASK)
+generate_invoice = CELERY.signature(GENERATE_INVOICE_TASK)
+
+
+@before_task_publish.connect
+def on_before_task_publish(headers=None, **kwargs):
+    # Время публикации уходит в заголовке сообщения: из него считается
+    # ожидание задачи в очереди
+    if headers is not None:
+        headers.setdefault("published_at", time.time())
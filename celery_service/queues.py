@@ -0,0 +1,70 @@
+"""
+Celery queues and the execution pool of each queue's worker
+"""
+
+import os
+from typing import NamedTuple
+
+from backend.config import CONFIG
+
+# I/O: заказы (Redis) и периодические задачи
+DEFAULT_QUEUE = "default"
+# I/O: уведомления
+PRIORITY_QUEUE = "priority"
+# CPU: рендер PDF, отдельно, чтобы не занимать слоты заказов
+INVOICE_QUEUE = "invoices"
+
+QUEUES = (DEFAULT_QUEUE, PRIORITY_QUEUE, INVOICE_QUEUE)
+
+# Шаги приоритетов транспорта redis (kombu: "очередь\x06\x16N")
+_PRIORITY_STEPS = (3, 6, 9)
+_PRIORITY_SEPARATOR = "\x06\x16"
+
+
+class QueueSettings(NamedTuple):
+    pool: str
+    concurrency: int
+    prefetch: int
+    acks_late: bool
+    autoscale: str
+
+
+def queue_settings(queue: str) -> QueueSettings:
+    """Настройки WORKER_<QUEUE>_* из конфига"""
+    settings = QueueSettings(
+        *(getattr(CONFIG, f"worker_{queue}_{name}") for name in QueueSettings._fields)
+    )
+    if settings.concurrency <= 0:
+        settings = settings._replace(concurrency=os.cpu_count() or 1)
+    return settings
+
+
+def worker_argv(queue: str, loglevel: str = "info") -> list[str]:
+    """Аргументы celery worker для воркера одной очереди"""
+    settings = queue_settings(queue)
+    argv = [
+        "worker",
+        f"--queues={queue}",
+        f"--hostname={queue}@%h",
+        f"--pool={settings.pool}",
+        f"--concurrency={settings.concurrency}",
+        f"--prefetch-multiplier={settings.prefetch}",
+        f"--loglevel={loglevel}",
+    ]
+    # Автомасштабирование поддерживает только prefork
+    if settings.autoscale and settings.pool == "prefork":
+        argv.append(f"--autoscale={settings.autoscale}")
+    return argv
+
+
+def broker_keys(queue: str) -> list[str]:
+    """Списки брокера с сообщениями очереди: сама очередь и её приоритеты"""
+    return [queue] + [f"{queue}{_PRIORITY_SEPARATOR}{step}" for step in _PRIORITY_STEPS]
+
+
+def task_annotations(routes: dict[str, dict]) -> dict[str, dict]:
+    """acks_late задач по настройкам их очереди"""
+    return {
+        task: {"acks_late": queue_settings(route["queue"]).acks_late}
+        for task, route in routes.items()
+    }
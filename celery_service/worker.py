@@ -0,0 +1,18 @@
+"""
+Worker of one queue with the pool settings from the config.
+
+Run: python -m celery_service.worker invoices
+"""
+
+import argparse
+
+from celery_service.celery_app import CELERY
+from celery_service.queues import QUEUES, worker_argv
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("queue", choices=QUEUES)
+    parser.add_argument("--loglevel", default="info")
+    args = parser.parse_args()
+
+    CELERY.worker_main(worker_argv(args.queue, args.loglevel))
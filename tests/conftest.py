@@ -0,0 +1,20 @@
+"""
+Test setup: an in-process fakeredis server, configured before backend and
+celery_service are imported (CONFIG reads the environment at import).
+"""
+
+from benchmarks.common import configure_env, start_fake_redis
+
+configure_env(*start_fake_redis(), ORDER_RATE_LIMIT="0", ORDER_WAIT_SLO="0")
+
+import pytest  # noqa: E402
+
+from backend.registry import backend_redis  # noqa: E402
+
+
+@pytest.fixture
+def redis_client():
+    backend_redis.connect()
+    backend_redis.client.flushdb()
+    yield backend_redis.client
+    backend_redis.client.flushdb()
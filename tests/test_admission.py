@@ -0,0 +1,27 @@
+from backend.api.order.admission import Backpressure
+
+
+def test_idle_queue_keeps_busy_throughput():
+    backpressure = Backpressure(interval=1.0)
+    backpressure._observe(depth=100, processed=0, now=0.0)
+    backpressure._observe(depth=80, processed=50, now=1.0)
+    assert backpressure.throughput == 50
+
+    # Очередь пуста минуту: воркерам нечего обрабатывать
+    backpressure._observe(depth=0, processed=100, now=2.0)
+    for second in range(3, 60):
+        backpressure._observe(depth=0, processed=100, now=float(second))
+    assert backpressure.throughput > 40
+
+    # Новая волна заказов оценивается по прежней скорости
+    backpressure._observe(depth=500, processed=100, now=60.0)
+    assert backpressure.depth / backpressure.throughput < 15
+
+
+def test_stalled_workers_drive_throughput_down():
+    backpressure = Backpressure(interval=1.0)
+    backpressure._observe(depth=100, processed=0, now=0.0)
+    backpressure._observe(depth=100, processed=50, now=1.0)
+    for second in range(2, 20):
+        backpressure._observe(depth=100, processed=50, now=float(second))
+    assert backpressure.throughput < 1
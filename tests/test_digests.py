@@ -0,0 +1,85 @@
+import pytest
+
+from backend.registry import backend_redis
+from backend.storage.db.keys import (
+    NOTIFICATION_DIGESTS_DUE_KEY,
+    NOTIFICATION_STATS_KEY,
+    notification_digest_key,
+)
+
+
+def test_claimed_digest_stays_until_ack(redis_client):
+    backend_redis.buffer_notification("a@example.com", "one", window=0)
+    backend_redis.buffer_notification("a@example.com", "two", window=0)
+    backend_redis.buffer_notification("b@example.com", "three", window=0)
+
+    digests = dict(backend_redis.claim_digests(limit=10, lease=60))
+    assert digests == {"a@example.com": ["one", "two"], "b@example.com": ["three"]}
+    # Захваченные дайджесты не берёт другой проход, но сообщения на месте
+    assert backend_redis.claim_digests(limit=10, lease=60) == []
+    assert redis_client.llen(notification_digest_key("a@example.com")) == 2
+
+    # Сообщение после захвата остаётся до следующего прохода
+    backend_redis.buffer_notification("a@example.com", "four", window=0)
+    backend_redis.ack_digests([("a@example.com", 2), ("b@example.com", 1)])
+    assert redis_client.lrange(notification_digest_key("a@example.com"), 0, -1) == [
+        "four"
+    ]
+    assert redis_client.zrange(NOTIFICATION_DIGESTS_DUE_KEY, 0, -1) == ["a@example.com"]
+    assert not redis_client.exists(notification_digest_key("b@example.com"))
+    assert redis_client.hgetall(NOTIFICATION_STATS_KEY) == {
+        "buffered": "4",
+        "digests": "2",
+        "digested": "3",
+    }
+
+
+def test_unacked_digest_is_claimed_again(redis_client):
+    backend_redis.buffer_notification("a@example.com", "one", window=0)
+    assert backend_redis.claim_digests(limit=10, lease=0) == [
+        ("a@example.com", ["one"])
+    ]
+    assert backend_redis.claim_digests(limit=10, lease=0) == [
+        ("a@example.com", ["one"])
+    ]
+
+
+def test_flush_keeps_digests_when_enqueue_fails(redis_client, monkeypatch):
+    from backend.tasks import beat_tasks
+
+    class _BrokerDown:
+        def __init__(self, tasks):
+            list(tasks)
+
+        def apply_async(self):
+            raise ConnectionError("broker is down")
+
+    monkeypatch.setattr(beat_tasks, "group", _BrokerDown)
+    backend_redis.buffer_notification("a@example.com", "one", window=0)
+    with pytest.raises(ConnectionError):
+        beat_tasks.flush_notification_digests()
+    assert redis_client.lrange(notification_digest_key("a@example.com"), 0, -1) == [
+        "one"
+    ]
+    assert redis_client.zrange(NOTIFICATION_DIGESTS_DUE_KEY, 0, -1) == ["a@example.com"]
+
+
+def test_flush_queues_digest_then_deletes_it(redis_client, monkeypatch):
+    from backend.tasks import beat_tasks
+
+    queued = []
+
+    class _Group:
+        def __init__(self, tasks):
+            self.tasks = list(tasks)
+
+        def apply_async(self):
+            queued.extend(task.kwargs for task in self.tasks)
+
+    monkeypatch.setattr(beat_tasks, "group", _Group)
+    backend_redis.buffer_notification("a@example.com", "one", window=0)
+    backend_redis.buffer_notification("a@example.com", "two", window=0)
+    beat_tasks.flush_notification_digests()
+    assert [task["email"] for task in queued] == ["a@example.com"]
+    assert not redis_client.exists(notification_digest_key("a@example.com"))
+    assert not redis_client.exists(NOTIFICATION_DIGESTS_DUE_KEY)
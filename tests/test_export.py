@@ -0,0 +1,103 @@
+import json
+
+from backend.export import decode_cursor, iter_export
+from backend.models.export.enums import ExportFormat, ExportKind
+from backend.storage.db.keys import order_key, stock_key
+
+
+def _ndjson(chunks) -> list[dict]:
+    return [json.loads(line) for line in "".join(chunks).splitlines()]
+
+
+def test_stock_export_multi_digit_values(redis_client, monkeypatch):
+    from backend.config import CONFIG
+
+    monkeypatch.setattr(CONFIG, "redis_scan_count", 3)
+    stock = {f"sku{index}": 100 + index for index in range(10)}
+    for product, quantity in stock.items():
+        redis_client.set(stock_key(product), quantity)
+
+    lines = _ndjson(iter_export(ExportKind.STOCK, ExportFormat.NDJSON))
+    rows = {line["product"]: line["quantity"] for line in lines if "product" in line}
+    assert rows == stock
+    assert lines[-1] == {"cursor": None}
+
+    csv = "".join(iter_export(ExportKind.STOCK, ExportFormat.CSV, cursors=False))
+    assert csv.splitlines()[0] == "product,quantity"
+    assert sorted(csv.splitlines()[1:]) == sorted(
+        f"{product},{quantity}" for product, quantity in stock.items()
+    )
+
+
+def test_stock_export_resumes_from_cursor(redis_client, monkeypatch):
+    from backend.config import CONFIG
+
+    monkeypatch.setattr(CONFIG, "redis_scan_count", 2)
+    for index in range(10):
+        redis_client.set(stock_key(f"sku{index}"), 10)
+
+    lines = _ndjson(iter_export(ExportKind.STOCK, ExportFormat.NDJSON))
+    first_cursor = next(line["cursor"] for line in lines if line.get("cursor"))
+    seen = []
+    for line in lines:
+        if "product" in line:
+            seen.append(line["product"])
+        if line.get("cursor") == first_cursor:
+            break
+
+    resumed = _ndjson(
+        iter_export(ExportKind.STOCK, ExportFormat.NDJSON, decode_cursor(first_cursor))
+    )
+    rest = [line["product"] for line in resumed if "product" in line]
+    assert sorted(seen + rest) == sorted(f"sku{index}" for index in range(10))
+
+
+def test_order_export(redis_client):
+    redis_client.hset(
+        order_key(1),
+        mapping={"status": "processed", "product": "iphone", "quantity": "12"},
+    )
+    redis_client.hset(
+        order_key(2),
+        mapping={
+            "status": "processed",
+            "items": json.dumps([{"product": "a", "quantity": 1}]),
+        },
+    )
+    # Заявка заказа - строка, в выгрузку не попадает
+    redis_client.set("order:3:claim", "task")
+
+    lines = _ndjson(iter_export(ExportKind.ORDERS, ExportFormat.NDJSON, cursors=False))
+    assert sorted(lines, key=lambda line: line["order_id"]) == [
+        {
+            "order_id": 1,
+            "status": "processed",
+            "items": [{"product": "iphone", "quantity": 12}],
+        },
+        {
+            "order_id": 2,
+            "status": "processed",
+            "items": [{"product": "a", "quantity": 1}],
+        },
+    ]
+
+
+def test_export_endpoints(redis_client):
+    from fastapi.testclient import TestClient
+
+    from backend.main import app
+
+    with TestClient(app) as client:
+        redis_client.set(stock_key("iphone"), 50)
+        response = client.get("/api/export/stock")
+        assert response.status_code == 200
+        assert {"product": "iphone", "quantity": 50} in _ndjson([response.text])
+
+        response = client.get("/api/export/stock", params={"format": "csv"})
+        assert response.status_code == 200
+        assert "iphone,50" in response.text.splitlines()
+
+        assert client.get("/api/export/orders").status_code == 200
+        assert (
+            client.get("/api/export/stock", params={"cursor": "zzz"}).status_code == 400
+        )
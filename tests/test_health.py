@@ -0,0 +1,82 @@
+import socket
+
+import pytest
+import redis
+from redis.backoff import NoBackoff
+from redis.exceptions import TimeoutError
+from redis.retry import Retry
+
+from backend.storage.db.health import GuardedConnection, get_breaker
+
+
+def _client(host: str, port: int) -> redis.Redis:
+    return redis.Redis(
+        connection_pool=redis.ConnectionPool(
+            host=host,
+            port=port,
+            socket_timeout=0.2,
+            connection_class=GuardedConnection,
+            retry=Retry(NoBackoff(), 0),
+        )
+    )
+
+
+@pytest.fixture
+def server():
+    from backend.config import CONFIG
+
+    return CONFIG.redis_host, CONFIG.redis_port
+
+
+def _failures(monkeypatch, host: str, port: int) -> list:
+    # Успешная команда обнуляет счётчик брейкера, поэтому ошибки копятся отдельно
+    failures = []
+    breaker = get_breaker(host, port)
+    monkeypatch.setattr(breaker, "record_failure", failures.append)
+    return failures
+
+
+def test_request_timeout_counts_as_failure(monkeypatch):
+    # Сервер принимает соединение, но не отвечает
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+    host, port = listener.getsockname()
+    failures = _failures(monkeypatch, host, port)
+    client = _client(host, port)
+    try:
+        with pytest.raises(TimeoutError):
+            client.get("key")
+        assert failures
+    finally:
+        client.close()
+        listener.close()
+
+
+def test_blocking_read_timeout_is_not_a_failure(redis_client, server, monkeypatch):
+    failures = _failures(monkeypatch, *server)
+    client = _client(*server)
+    try:
+        client.xgroup_create("stream", "group", id="0", mkstream=True)
+        with pytest.raises(TimeoutError):
+            client.xreadgroup("group", "consumer", {"stream": ">"}, block=1000)
+        with pytest.raises(TimeoutError):
+            client.blpop(["list"], timeout=1)
+        assert failures == []
+    finally:
+        client.close()
+
+
+def test_idle_subscription_is_not_a_failure(redis_client, server, monkeypatch):
+    failures = _failures(monkeypatch, *server)
+    client = _client(*server)
+    pubsub = client.pubsub()
+    try:
+        pubsub.subscribe("channel")
+        pubsub.get_message(timeout=1)
+        with pytest.raises(TimeoutError):
+            pubsub.parse_response(block=True)
+        assert failures == []
+    finally:
+        pubsub.close()
+        client.close()
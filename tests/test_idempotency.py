@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException, Response
+
+from backend.models.order.requests import RequestOrder
+from backend.registry import async_backend_redis
+
+
+def _run(scenario):
+    async def main():
+        try:
+            return await scenario()
+        finally:
+            await async_backend_redis.close()
+
+    return asyncio.run(main())
+
+
+def _order(order_id: int) -> RequestOrder:
+    return RequestOrder(
+        order_id=order_id, product="iphone", quantity=1, email="user@example.com"
+    )
+
+
+@pytest.fixture
+def enqueued(monkeypatch):
+    from backend.api.order import handlers
+
+    orders = []
+
+    async def enqueue(batch, task_ids):
+        orders.extend(task_ids.items())
+
+    monkeypatch.setattr(handlers, "_enqueue", enqueue)
+    return orders
+
+
+def test_replayed_order_returns_original_task_id(redis_client, enqueued):
+    from backend.api.order.handlers import _admit
+
+    async def scenario():
+        first, replay = Response(), Response()
+        created = await _admit(_order(1), first, "key-1")
+        # Повтор без ключа и повтор с тем же ключом
+        replayed = await _admit(_order(1), replay, None)
+        replayed_by_key = await _admit(_order(1), Response(), "key-1")
+        return created, replayed, replayed_by_key, replay
+
+    created, replayed, replayed_by_key, replay = _run(scenario)
+    assert replayed.task_id == replayed_by_key.task_id == created.task_id
+    assert replay.status_code == 200
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert enqueued == [(1, str(created.task_id))]
+
+
+def test_idempotency_key_of_another_order_is_rejected(redis_client, enqueued):
+    from backend.api.order.handlers import _admit
+
+    async def scenario():
+        await _admit(_order(1), Response(), "key-1")
+        await _admit(_order(2), Response(), "key-1")
+
+    with pytest.raises(HTTPException) as error:
+        _run(scenario)
+    assert error.value.status_code == 422
+    assert len(enqueued) == 1
+
+
+def test_batch_claims_return_task_ids_of_accepted_orders(redis_client):
+    async def scenario():
+        assert await async_backend_redis.claim_orders({1: "t1", 2: "t2"}) == {}
+        return await async_backend_redis.claim_orders({2: "t3", 3: "t4"})
+
+    assert _run(scenario) == {2: "t2"}
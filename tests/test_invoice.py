@@ -0,0 +1,61 @@
+import pytest
+
+from backend.registry import backend_redis
+from backend.storage.db.keys import invoice_lock_key
+
+PDF = b"%PDF-1.4 invoice " * 200
+
+
+def test_gzip_and_identity_have_distinct_etags(redis_client, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from backend.config import CONFIG
+    from backend.main import app
+
+    monkeypatch.setattr(CONFIG, "invoice_compression", True)
+    backend_redis.save_invoices({1: PDF})
+
+    with TestClient(app) as client:
+        gzipped = client.get("/api/invoice/1", headers={"Accept-Encoding": "gzip"})
+        identity = client.get("/api/invoice/1", headers={"Accept-Encoding": "identity"})
+        assert gzipped.headers["Content-Encoding"] == "gzip"
+        assert "Content-Encoding" not in identity.headers
+        assert gzipped.content == identity.content == PDF
+        assert gzipped.headers["ETag"] != identity.headers["ETag"]
+
+        # Валидатор одного представления не подходит к другому
+        response = client.get(
+            "/api/invoice/1",
+            headers={
+                "Accept-Encoding": "identity",
+                "If-None-Match": gzipped.headers["ETag"],
+            },
+        )
+        assert response.status_code == 200
+        response = client.get(
+            "/api/invoice/1",
+            headers={
+                "Accept-Encoding": "gzip",
+                "If-None-Match": gzipped.headers["ETag"],
+            },
+        )
+        assert response.status_code == 304
+
+
+@pytest.mark.parametrize("fails", [False, True])
+def test_generate_invoice_releases_lock(redis_client, monkeypatch, fails):
+    from backend.tasks import worker_tasks
+
+    def render(order_id, lines):
+        if fails:
+            raise RuntimeError("render failed")
+        return PDF
+
+    monkeypatch.setattr(worker_tasks, "render_invoice", render)
+    redis_client.set(invoice_lock_key(1), "1", ex=30)
+
+    result = worker_tasks.generate_invoice.apply(
+        kwargs={"order_id": 1, "product": "iphone", "quantity": 1}
+    )
+    assert result.failed() is fails
+    assert not redis_client.exists(invoice_lock_key(1))
@@ -0,0 +1,88 @@
+import threading
+
+import pytest
+
+from backend.notifications import BaseTransport, NotificationDispatcher, dispatcher
+from backend.notifications.transports import LogTransport
+
+
+def test_get_dispatcher_is_shared_between_threads(monkeypatch):
+    monkeypatch.setattr(dispatcher, "_dispatcher", None)
+    barrier = threading.Barrier(16)
+    created = []
+
+    def worker():
+        barrier.wait()
+        created.append(dispatcher.get_dispatcher())
+
+    threads = [threading.Thread(target=worker) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(instance) for instance in created}) == 1
+
+
+class _FailingTransport(BaseTransport):
+    async def send(self, email: str, message: str) -> None:
+        raise ConnectionError("smtp is down")
+
+
+def _use_transport(monkeypatch, factory) -> NotificationDispatcher:
+    instance = NotificationDispatcher(factory, concurrency=4, max_pending=16)
+    monkeypatch.setattr(dispatcher, "_dispatcher", instance)
+    return instance
+
+
+def test_transport_must_implement_send():
+    with pytest.raises(TypeError):
+        BaseTransport()
+
+
+def test_send_notification_returns_after_submit(monkeypatch):
+    from backend.tasks.worker_tasks import send_notification
+
+    instance = _use_transport(monkeypatch, LogTransport)
+    try:
+        result = send_notification.apply(
+            kwargs={"email": "user@example.com", "message": "hi"}
+        )
+        assert result.successful()
+    finally:
+        instance.close()
+    assert instance.sent == 1
+
+
+@pytest.mark.parametrize("attempt, retried", [(0, True), (3, False)])
+def test_failed_delivery_is_requeued_until_retries_run_out(
+    monkeypatch, attempt, retried
+):
+    from backend.config import CONFIG
+    from backend.tasks import worker_tasks
+
+    requeued = []
+    monkeypatch.setattr(
+        worker_tasks.send_notification,
+        "apply_async",
+        lambda **options: requeued.append(options),
+    )
+    monkeypatch.setattr(CONFIG, "notification_retries", 3)
+    instance = _use_transport(monkeypatch, _FailingTransport)
+    try:
+        result = worker_tasks.send_notification.apply(
+            kwargs={"email": "user@example.com", "message": "hi", "attempt": attempt}
+        )
+        # Задача не ждёт отправки: ошибка транспорта её не роняет
+        assert result.successful()
+    finally:
+        instance.close()
+    assert instance.failed == 1
+    if retried:
+        assert requeued == [
+            {
+                "kwargs": {"email": "user@example.com", "message": "hi", "attempt": 1},
+                "countdown": CONFIG.notification_retry_delay,
+            }
+        ]
+    else:
+        assert requeued == []
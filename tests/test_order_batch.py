@@ -0,0 +1,34 @@
+import asyncio
+
+from backend.models.order.requests import RequestOrderBatch
+from backend.registry import async_backend_redis
+
+
+def test_non_object_element_is_rejected_alone(redis_client):
+    from backend.api.order.handlers import order_batch
+
+    batch = RequestOrderBatch.model_validate(
+        {
+            "orders": [
+                {
+                    "order_id": 1,
+                    "product": "iphone",
+                    "quantity": 1,
+                    "email": "user@example.com",
+                },
+                "not an order",
+                None,
+            ]
+        }
+    )
+
+    async def main():
+        try:
+            return await order_batch(batch, request=None)
+        finally:
+            await async_backend_redis.close()
+
+    result = asyncio.run(main())
+    assert [item.order_id for item in result.accepted] == [1]
+    assert [error.index for error in result.rejected] == [1, 2]
+    assert {error.errors[0].type for error in result.rejected} == {"model_type"}
@@ -0,0 +1,106 @@
+import json
+
+from backend.registry import backend_redis
+from backend.storage.db.keys import order_key, stock_key
+from backend.storage.db.router import KeyClass, get_router
+
+
+def _entry(entry_id: str, task_id: str, order) -> tuple[str, dict[str, str]]:
+    raw = order if isinstance(order, str) else json.dumps(order)
+    return entry_id, {"task_id": task_id, "order": raw}
+
+
+def test_malformed_entries_are_dropped_without_failing_the_batch(
+    redis_client, monkeypatch
+):
+    from backend.tasks import order_stream
+
+    notified = []
+    monkeypatch.setattr(order_stream, "notify_many", notified.extend)
+    monkeypatch.setattr(order_stream.CONFIG, "invoice_lazy_generation", True)
+    redis_client.set(stock_key("iphone"), 10)
+
+    node = get_router().nodes(KeyClass.ORDER)[0]
+    consumer = order_stream.OrderStreamConsumer(node, "test")
+    consumer.process(
+        [
+            _entry("1-0", "no-order-id", {"product": "iphone", "quantity": 1}),
+            _entry("2-0", "bad-json", "{"),
+            _entry(
+                "3-0",
+                "bad-email",
+                {"order_id": 3, "product": "iphone", "quantity": 1, "email": "nope"},
+            ),
+            _entry(
+                "4-0",
+                "empty-cart",
+                {"order_id": 4, "items": [], "email": "user@example.com"},
+            ),
+            ("5-0", {"order": "{}"}),
+            _entry(
+                "6-0",
+                "valid",
+                {
+                    "order_id": 6,
+                    "product": "iphone",
+                    "quantity": 2,
+                    "email": "user@example.com",
+                },
+            ),
+            _entry(
+                "7-0",
+                "cart",
+                {
+                    "order_id": 7,
+                    "items": [{"product": "iphone", "quantity": 1}],
+                    "email": "cart@example.com",
+                },
+            ),
+        ]
+    )
+
+    assert redis_client.get(stock_key("iphone")) == "7"
+    assert redis_client.hget(order_key(6), "status") == "processed"
+    assert redis_client.hget(order_key(7), "status") == "processed"
+    assert [email for email, _ in notified] == ["user@example.com", "cart@example.com"]
+    for task_id in ("no-order-id", "bad-json", "bad-email", "empty-cart"):
+        meta = json.loads(backend_redis.get(f"celery-task-meta-{task_id}"))
+        assert meta["status"] == "FAILURE"
+    assert (
+        json.loads(backend_redis.get("celery-task-meta-valid"))["status"] == "SUCCESS"
+    )
+
+
+def test_reclaimed_duplicate_is_a_replay_only_for_the_same_task(
+    redis_client, monkeypatch
+):
+    from backend.tasks import order_stream
+
+    notified = []
+    monkeypatch.setattr(order_stream, "notify_many", notified.extend)
+    monkeypatch.setattr(order_stream.CONFIG, "invoice_lazy_generation", True)
+    redis_client.set(stock_key("iphone"), 10)
+    order = {
+        "order_id": 1,
+        "product": "iphone",
+        "quantity": 1,
+        "email": "user@example.com",
+    }
+
+    node = get_router().nodes(KeyClass.ORDER)[0]
+    consumer = order_stream.OrderStreamConsumer(node, "test")
+    consumer.process([_entry("1-0", "first", order)])
+    # Упавший читатель успел зарезервировать заказ, запись забрана снова;
+    # вместе с ней забран другой заказ с тем же order_id
+    consumer.process(
+        [_entry("1-0", "first", order), _entry("2-0", "second", order)],
+        reclaimed=True,
+    )
+
+    assert redis_client.get(stock_key("iphone")) == "9"
+    assert json.loads(backend_redis.get("celery-task-meta-first"))["status"] == (
+        "SUCCESS"
+    )
+    assert json.loads(backend_redis.get("celery-task-meta-second"))["status"] == (
+        "FAILURE"
+    )
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import time
+import uuid
+
+import pytest
+
+from backend.api.order.handlers import _track_pending
+from backend.models.order.requests import RequestOrder
+from backend.registry import async_backend_redis, backend_redis
+from backend.storage.db.keys import PENDING_ORDERS_KEY, PENDING_ORDERS_PAYLOAD_KEY
+from celery_service.client import process_order
+from celery_service.queues import DEFAULT_QUEUE
+
+
+def _track(order_id: int, queued_at: float) -> str:
+    task_id = str(uuid.uuid4())
+    order = RequestOrder(
+        order_id=order_id, product="sku", quantity=1, email="a@example.com"
+    )
+
+    async def main():
+        try:
+            await _track_pending([order], {order_id: task_id})
+        finally:
+            await async_backend_redis.close()
+
+    asyncio.run(main())
+    backend_redis.client.zadd(PENDING_ORDERS_KEY, {order_id: queued_at})
+    return task_id
+
+
+def _queued() -> list[dict]:
+    return [
+        json.loads(message)["headers"]
+        for message in backend_redis.client.lrange(DEFAULT_QUEUE, 0, -1)
+    ]
+
+
+def test_stale_order_requeued_with_its_task_id(redis_client):
+    from backend.tasks.beat_tasks import check_pending_orders
+
+    task_id = _track(1, time.time() - 1000)
+    check_pending_orders()
+
+    (headers,) = _queued()
+    assert headers["id"] == task_id
+    assert json.loads(redis_client.hget(PENDING_ORDERS_PAYLOAD_KEY, 1))["task_id"] == (
+        task_id
+    )
+
+
+def test_finished_order_is_not_requeued(redis_client):
+    from backend.tasks.beat_tasks import check_pending_orders
+
+    task_id = _track(1, time.time() - 1000)
+    backend_redis.set(
+        f"celery-task-meta-{task_id}",
+        json.dumps({"status": "FAILURE", "task_id": task_id}),
+    )
+    check_pending_orders()
+
+    assert _queued() == []
+    assert redis_client.zcard(PENDING_ORDERS_KEY) == 0
+    assert not redis_client.hexists(PENDING_ORDERS_PAYLOAD_KEY, 1)
+
+
+def test_order_behind_broker_backlog_is_not_requeued(redis_client):
+    from backend.tasks.beat_tasks import check_pending_orders
+
+    # В очереди ещё ждёт заказ, опубликованный раньше зависшего
+    process_order.apply_async(
+        kwargs={"order_id": 2}, headers={"published_at": time.time() - 2000}
+    )
+    _track(1, time.time() - 1000)
+    check_pending_orders()
+
+    assert len(_queued()) == 1
+    assert redis_client.zscore(PENDING_ORDERS_KEY, 1) is not None
+
+
+def test_failed_enqueue_leaves_no_pending_entry(redis_client, monkeypatch):
+    from fastapi import Response
+
+    from backend.api.order import handlers
+
+    class _BrokerDown:
+        def apply_async(self, **kwargs):
+            raise ConnectionError("broker is down")
+
+    monkeypatch.setattr(handlers, "process_order", _BrokerDown())
+    order = RequestOrder(order_id=1, product="sku", quantity=1, email="a@example.com")
+
+    async def main():
+        try:
+            await handlers._admit(order, Response(), "key")
+        finally:
+            await async_backend_redis.close()
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(main())
+    assert redis_client.zcard(PENDING_ORDERS_KEY) == 0
+    assert redis_client.hlen(PENDING_ORDERS_PAYLOAD_KEY) == 0
+    # Захват снят: повтор клиента ставит заказ заново
+    assert redis_client.keys("*") == []
@@ -0,0 +1,129 @@
+import pytest
+
+from backend.config import CONFIG
+from backend.models.order.enums import ReservationStatus
+from backend.registry import backend_redis
+from backend.storage.db import router
+from backend.storage.db.keys import (
+    PENDING_ORDERS_KEY,
+    PENDING_ORDERS_PAYLOAD_KEY,
+    order_key,
+    stock_key,
+    stock_reservation_key,
+)
+from backend.storage.db.redis_client import _lines_params
+from backend.storage.db.router import KeyClass, get_router
+
+CART = [
+    {"product": "iphone", "quantity": 1},
+    {"product": "macbook", "quantity": 3},
+]
+
+
+def test_cart_with_one_short_line_reserves_nothing(redis_client):
+    redis_client.set(stock_key("iphone"), 5)
+    redis_client.set(stock_key("macbook"), 2)
+    redis_client.zadd(PENDING_ORDERS_KEY, {1: 100.0})
+    redis_client.hset(PENDING_ORDERS_PAYLOAD_KEY, 1, "{}")
+
+    reservation = backend_redis.reserve_stock(1, CART, {"task_id": "t1"})
+
+    assert reservation.status == ReservationStatus.INSUFFICIENT_STOCK
+    assert reservation.product == "macbook"
+    # Первая строка не списана: все или ни одной
+    assert redis_client.get(stock_key("iphone")) == "5"
+    assert redis_client.get(stock_key("macbook")) == "2"
+    assert not redis_client.exists(order_key(1))
+    # Отказ - тоже итог: заказ снимается с индекса ожидающих
+    assert redis_client.zcard(PENDING_ORDERS_KEY) == 0
+    assert redis_client.hlen(PENDING_ORDERS_PAYLOAD_KEY) == 0
+
+
+def test_duplicate_order_id_is_reserved_once(redis_client):
+    redis_client.set(stock_key("iphone"), 5)
+    redis_client.set(stock_key("macbook"), 5)
+
+    first = backend_redis.reserve_stock(1, CART, {"task_id": "t1"})
+    second = backend_redis.reserve_stock(1, CART, {"task_id": "t2"})
+
+    assert first.status == ReservationStatus.RESERVED
+    assert first.stocks == {"iphone": 4, "macbook": 2}
+    assert second.status == ReservationStatus.DUPLICATE
+    assert redis_client.get(stock_key("iphone")) == "4"
+    assert redis_client.get(stock_key("macbook")) == "2"
+    assert redis_client.hget(order_key(1), "task_id") == "t1"
+
+
+@pytest.fixture
+def two_stock_nodes(redis_client, monkeypatch):
+    """Остатки на двух узлах (db0 и db2 того же сервера), заказы на db0"""
+    main = get_router().main
+    other = main._replace(db=2)
+    monkeypatch.setattr(
+        router,
+        "_router",
+        router.KeyRouter(
+            main=main,
+            results=get_router().node_for(KeyClass.RESULTS, ""),
+            stock=[main, other],
+            order=[main],
+            invoice=[],
+            replicas=CONFIG.redis_ring_replicas,
+        ),
+    )
+    client = backend_redis._node(other)
+    client.flushdb()
+    yield main, other
+    client.flushdb()
+
+
+def _products_on(node, count: int) -> list[str]:
+    products = (f"sku-{index}" for index in range(1000))
+    return [p for p in products if get_router().stock_node(p) == node][:count]
+
+
+def test_cross_node_cart_releases_reserved_lines(two_stock_nodes):
+    main, other = two_stock_nodes
+    (first,) = _products_on(main, 1)
+    (second,) = _products_on(other, 1)
+    backend_redis.set(stock_key(first), 5)
+    backend_redis.set(stock_key(second), 1)
+
+    reservation = backend_redis.reserve_stock(
+        1,
+        [{"product": first, "quantity": 2}, {"product": second, "quantity": 3}],
+        {"task_id": "t1"},
+    )
+
+    assert reservation.status == ReservationStatus.INSUFFICIENT_STOCK
+    assert reservation.product == second
+    # Резерв первого узла возвращён RELEASE_LINES вместе с отметкой
+    assert backend_redis.mget(stock_key(first), stock_key(second)) == ["5", "1"]
+    for node in (main, other):
+        assert not backend_redis._node(node).exists(stock_reservation_key(1))
+    assert not backend_redis.exists(order_key(1))
+
+
+def test_cross_node_retry_does_not_reserve_twice(two_stock_nodes):
+    main, other = two_stock_nodes
+    (first,) = _products_on(main, 1)
+    (second,) = _products_on(other, 1)
+    backend_redis.set(stock_key(first), 5)
+    backend_redis.set(stock_key(second), 5)
+    lines = [{"product": first, "quantity": 2}, {"product": second, "quantity": 1}]
+
+    # Задача упала после резерва на узле второго товара, до записи заказа
+    keys, args = _lines_params(1, {second: 1})
+    backend_redis._reserve_lines(
+        keys=keys, args=args, client=backend_redis._node(other)
+    )
+    reservation = backend_redis.reserve_stock(1, lines, {"task_id": "t1"})
+
+    assert reservation.status == ReservationStatus.RESERVED
+    assert reservation.stocks == {first: 3, second: 4}
+    assert backend_redis.hget(order_key(1), "task_id") == "t1"
+    assert (
+        backend_redis.reserve_stock(1, lines, {"task_id": "t2"}).status
+        == ReservationStatus.DUPLICATE
+    )
+    assert backend_redis.mget(stock_key(first), stock_key(second)) == ["3", "4"]
@@ -0,0 +1,62 @@
+import asyncio
+import json
+
+import pytest
+from redis.exceptions import ConnectionError
+
+from backend.api.status.hub import RESYNC, TaskStatusHub
+from backend.registry import async_backend_redis
+from backend.storage.db.keys import TASK_STATUS_CHANNEL
+from backend.storage.db.router import get_router
+
+
+def _run(scenario):
+    async def main():
+        try:
+            return await scenario()
+        finally:
+            await async_backend_redis.close()
+
+    return asyncio.run(main())
+
+
+def test_subscribe_fails_until_subscription_is_confirmed(redis_client, monkeypatch):
+    async def unavailable(node=None):
+        raise ConnectionError("redis is down")
+
+    async def scenario():
+        hub = TaskStatusHub(reconnect_delay=0.05)
+        monkeypatch.setattr(async_backend_redis, "pubsub", unavailable)
+        with pytest.raises(ConnectionError):
+            await hub.subscribe(["task"])
+        assert not hub._listeners
+
+        monkeypatch.undo()
+        queue = await hub.subscribe(["task"])
+        await async_backend_redis.client.publish(
+            TASK_STATUS_CHANNEL, json.dumps({"task_id": "task", "status": "STARTED"})
+        )
+        assert await asyncio.wait_for(queue.get(), 2) == ("task", "STARTED")
+        await hub.close()
+
+    _run(scenario)
+
+
+def test_reconnect_asks_listeners_to_resync(redis_client):
+    async def scenario():
+        hub = TaskStatusHub(reconnect_delay=0.05)
+        queue = await hub.subscribe(["task"])
+
+        # Сервер закрыл соединение подписки: события из разрыва потеряны
+        pool = async_backend_redis._subscribers[get_router().main].connection_pool
+        (connection,) = pool._in_use_connections
+        connection._reader.feed_eof()
+        assert await asyncio.wait_for(queue.get(), 2) is RESYNC
+
+        await async_backend_redis.client.publish(
+            TASK_STATUS_CHANNEL, json.dumps({"task_id": "task", "status": "SUCCESS"})
+        )
+        assert await asyncio.wait_for(queue.get(), 2) == ("task", "SUCCESS")
+        await hub.close()
+
+    _run(scenario)
@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+from backend.api.stock.cache import StockCache
+from backend.registry import async_backend_redis
+from backend.storage.db.keys import stock_key
+from backend.storage.db.router import get_router
+
+
+def _run(scenario):
+    async def main():
+        try:
+            return await scenario()
+        finally:
+            await async_backend_redis.close()
+
+    return asyncio.run(main())
+
+
+async def _until(predicate, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+def test_subscription_drop_resets_cache(redis_client):
+    redis_client.set(stock_key("sku"), 5)
+
+    async def scenario():
+        cache = StockCache(maxsize=100, reconnect_delay=0.05)
+        try:
+            await cache.get("sku")
+            await _until(lambda: cache._listening)
+            assert await cache.get("sku") == 5
+            assert len(cache) == 1
+
+            # Сервер закрыл соединение подписки: redis-py не должен молча
+            # переподписаться, кэш сбрасывается до новой подписки
+            pool = async_backend_redis._subscribers[get_router().main].connection_pool
+            (connection,) = pool._in_use_connections
+            assert connection.socket_timeout is None
+            connection._reader.feed_eof()
+            await _until(lambda: not cache._listening)
+            assert len(cache) == 0
+
+            redis_client.set(stock_key("sku"), 3)
+            await _until(lambda: cache._listening)
+            assert await cache.get("sku") == 3
+        finally:
+            await cache.close()
+
+    _run(scenario)
+
+
+def test_entries_expire_without_invalidation(redis_client):
+    redis_client.set(stock_key("sku"), 5)
+
+    async def scenario():
+        cache = StockCache(maxsize=100, ttl=0.1)
+        try:
+            await cache.get("sku")
+            await _until(lambda: cache._listening)
+            assert await cache.get("sku") == 5
+
+            # Запись без публикации в канал инвалидаций
+            redis_client.set(stock_key("sku"), 3)
+            assert await cache.get("sku") == 5
+            await asyncio.sleep(0.15)
+            assert await cache.get("sku") == 3
+        finally:
+            await cache.close()
+
+    _run(scenario)